@@ -0,0 +1,106 @@
+"""
+Compares file size and decode time of the JSON artifacts with their MessagePack twins.
+The artifacts get generated from the bundled test assets.
+
+Usage: PYTHONPATH=src python benchmarks/binary_format.py
+"""
+import json
+import os
+import sys
+import tempfile
+import timeit
+from datetime import date
+from typing import Callable, Dict, List, Tuple
+
+import msgpack
+
+import binary_converter
+import main
+from entities import Canteen, Menu, Week
+from menu_parser import FMIBistroMenuParser, MedizinerMensaMenuParser, StraubingMensaMenuParser
+from utils import file_util
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "scripts"))
+import combine  # noqa: E402 # pylint: disable=wrong-import-position,wrong-import-order
+
+ASSETS = "src/test/assets"
+
+
+def get_weeks() -> Dict[Canteen, Dict[int, Week]]:
+    fmi_parser = FMIBistroMenuParser()
+    fmi_menus = {}
+    for calendar_week in (44, 45):
+        text = file_util.load_txt(f"{ASSETS}/fmi/for-generation/calendar_week_2021_{calendar_week}.txt")
+        fmi_menus.update(fmi_parser.get_menus(text, 2021, calendar_week))
+
+    mediziner_parser = MedizinerMensaMenuParser()
+    mediziner_menus: Dict[date, Menu] = {}
+    for calendar_week in (44, 47):
+        text = file_util.load_txt(f"{ASSETS}/mediziner-mensa/for-generation/week_2018_{calendar_week}.txt")
+        mediziner_menus.update(mediziner_parser.get_menus(text, 2018, calendar_week) or {})
+
+    straubing_parser = StraubingMensaMenuParser()
+    straubing_menus = {}
+    for calendar_week in (16, 17):
+        with open(f"{ASSETS}/straubing/for-generation/{calendar_week}.csv", encoding="cp1252") as f:
+            straubing_menus.update(straubing_parser.parse_menu(straubing_parser.parse_csv(f.read())))
+
+    return {
+        Canteen.FMI_BISTRO: Week.to_weeks(fmi_menus),
+        Canteen.MEDIZINER_MENSA: Week.to_weeks(mediziner_menus),
+        Canteen.MENSA_STRAUBING: Week.to_weeks(straubing_menus),
+    }
+
+
+def time_decode(decode: Callable[[bytes], object], data: bytes) -> float:
+    number = 200
+    return min(timeit.repeat(lambda: decode(data), number=number, repeat=5)) / number
+
+
+def benchmark(dist: str) -> List[Tuple[str, int, int, float, float]]:
+    results = []
+    for directory, _, filenames in sorted(os.walk(dist)):
+        for filename in sorted(filenames):
+            if not filename.endswith(".json") or filename[:-5].isdigit():
+                # the week files are part of "combined.json" anyway
+                continue
+            json_path = os.path.join(directory, filename)
+            binary_path = binary_converter.convert_file(json_path)
+            with open(json_path, "rb") as f:
+                json_data = f.read()
+            with open(binary_path, "rb") as f:
+                binary_data = f.read()
+            results.append(
+                (
+                    os.path.relpath(json_path, dist),
+                    len(json_data),
+                    len(binary_data),
+                    time_decode(json.loads, json_data),
+                    time_decode(msgpack.unpackb, binary_data),
+                ),
+            )
+    return results
+
+
+def run() -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dist = os.path.join(temp_dir, "dist")
+        for canteen, weeks in get_weeks().items():
+            main.jsonify(weeks, os.path.join(dist, canteen.canteen_id), canteen, True)
+        cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            combine.main()
+        finally:
+            os.chdir(cwd)
+
+        print(f"{'artifact':<40} {'json B':>9} {'msgpack B':>10} {'size':>6} {'json ms':>9} {'msgpack ms':>11}")
+        for name, json_size, binary_size, json_time, binary_time in benchmark(dist):
+            print(
+                f"{name:<40} {json_size:>9} {binary_size:>10} {binary_size / json_size:>6.0%} "
+                f"{json_time * 1000:>9.3f} {binary_time * 1000:>11.3f}",
+            )
+
+
+if __name__ == "__main__":
+    run()
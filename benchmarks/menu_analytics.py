@@ -0,0 +1,42 @@
+"""
+Measures loading a synthetic year of menus of all canteens into NumPy arrays and computing the analytics,
+both from the parsed menus and from a menu archive.
+
+Usage: PYTHONPATH=src python benchmarks/menu_analytics.py [DISHES_PER_DAY]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from query_index import generate_year
+
+from analytics import MenuArrays, compute_analytics
+from archive import MenuArchive
+from entities import Canteen
+
+
+def run(dishes_per_day: int) -> None:
+    canteen_menus = generate_year(dishes_per_day)
+
+    start = time.perf_counter()
+    arrays = MenuArrays.from_menus(canteen_menus)
+    from_menus_duration = time.perf_counter() - start
+    print(f"{len(arrays)} servings of {len(arrays.dish_names)} dishes in {len(arrays.canteen_ids)} canteens")
+    print(f"{'arrays from parsed menus':<28} {from_menus_duration:>7.3f} s")
+
+    start = time.perf_counter()
+    compute_analytics(arrays)
+    print(f"{'analytics':<28} {time.perf_counter() - start:>7.3f} s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        with MenuArchive(os.path.join(directory, "archive.sqlite3")) as archive:
+            for canteen_id, menus in canteen_menus.items():
+                archive.add_menus(Canteen.get_canteen_by_str(canteen_id), menus)
+            start = time.perf_counter()
+            arrays = MenuArrays.from_archive(archive)
+            print(f"{'arrays from archive':<28} {time.perf_counter() - start:>7.3f} s")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 15)
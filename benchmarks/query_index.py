@@ -0,0 +1,106 @@
+"""
+Compares queries on the MenuIndex with filtering the flat list of all dishes, the way clients filter "all_ref.json".
+The dishes are generated for a synthetic year of all canteens.
+
+Usage: PYTHONPATH=src python benchmarks/query_index.py [DISHES_PER_DAY]
+"""
+import random
+import sys
+import time
+import timeit
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+from entities import Canteen, Dish, Label, Menu, Price, Prices
+from query import DishEntry, build_index
+
+START = date(2022, 1, 1)
+DISH_TYPES = ("Tagesgericht", "Aktionsessen", "Beilagen", "Salat", "Dessert")
+
+
+def generate_year(dishes_per_day: int) -> Dict[str, Dict[date, Menu]]:
+    rng = random.Random(42)  # nosec: no cryptography
+    labels = list(Label)
+    canteen_menus: Dict[str, Dict[date, Menu]] = {}
+    for canteen in Canteen:
+        menus = {}
+        for day in range(365):
+            menu_date = START + timedelta(days=day)
+            if menu_date.weekday() >= 5:
+                continue
+            dishes = []
+            for number in range(dishes_per_day):
+                price = round(rng.uniform(0.8, 6.0), 2)
+                dishes.append(
+                    Dish(
+                        f"Gericht {rng.randrange(5000)}",
+                        Prices(Price(price), Price(price + 1), Price(price + 2)),
+                        set(rng.sample(labels, rng.randint(0, 5))),
+                        DISH_TYPES[number % len(DISH_TYPES)],
+                    ),
+                )
+            menus[menu_date] = Menu(menu_date, dishes)
+        canteen_menus[canteen.canteen_id] = menus
+    return canteen_menus
+
+
+def scan(entries: List[DishEntry], canteen_id: str, day: date, max_price: float) -> List[DishEntry]:
+    return [
+        entry
+        for entry in entries
+        if entry.canteen_id == canteen_id
+        and entry.date == day
+        and Label.VEGAN in entry.dish.labels
+        and entry.dish.prices.students is not None
+        and entry.dish.prices.students.base_price is not None
+        and entry.dish.prices.students.base_price <= max_price
+    ]
+
+
+def run(dishes_per_day: int) -> None:
+    canteen_menus = generate_year(dishes_per_day)
+    start = time.perf_counter()
+    index = build_index(canteen_menus)
+    build_duration = time.perf_counter() - start
+    print(f"{len(index)} dishes of {len(canteen_menus)} canteens, index built in {build_duration:.3f} s")
+
+    entries = index.entries
+    day = START + timedelta(days=150)
+    queries: List[Tuple[str, Callable[[], Any], Callable[[], Any]]] = [
+        (
+            "vegan under 3€ in Garching on a day",
+            lambda: index.query(["mensa-garching"], day, day, [Label.VEGAN], max_price=3.0),
+            lambda: scan(entries, "mensa-garching", day, 3.0),
+        ),
+        (
+            "vegan without gluten in a week",
+            lambda: index.query(None, day, day + timedelta(days=6), [Label.VEGAN], [Label.GLUTEN]),
+            lambda: [
+                entry
+                for entry in entries
+                if day <= entry.date <= day + timedelta(days=6)
+                and Label.VEGAN in entry.dish.labels
+                and Label.GLUTEN not in entry.dish.labels
+            ],
+        ),
+        (
+            "all dishes between 5.90€ and 6€",
+            lambda: index.query(min_price=5.9, max_price=6.0),
+            lambda: [
+                entry
+                for entry in entries
+                if entry.dish.prices.students is not None and 5.9 <= (entry.dish.prices.students.base_price or 0) <= 6.0
+            ],
+        ),
+    ]
+    print(f"{'query':<38} {'results':>8} {'index':>11} {'scan':>11}")
+    for name, indexed, scanned in queries:
+        assert indexed() == scanned()  # nosec: sanity check of the benchmark
+        number = 20
+        index_time = timeit.timeit(indexed, number=number) / number
+        scan_time = timeit.timeit(scanned, number=number) / number
+        print(f"{name:<38} {len(indexed()):>8} {index_time * 1000:>8.3f} ms {scan_time * 1000:>8.3f} ms")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 15)
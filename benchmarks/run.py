@@ -0,0 +1,292 @@
+"""
+Times the parsers and serializers on the bundled test assets and stores the results as JSON.
+With --compare, the results get compared with a stored baseline and every benchmark that got slower than the threshold
+is reported as regression, in which case the exit code is 1.
+
+Usage: PYTHONPATH=src python benchmarks/run.py [--filter TEXT] [--output PATH] [--compare BASELINE] [--threshold 0.1]
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+from typing import Any, Callable, Dict, List, NamedTuple, TypeVar
+
+from lxml import html  # nosec: https://github.com/TUM-Dev/eat-api/issues/19
+
+import main
+import openmensa
+from entities import Canteen, Menu, Week
+from menu_parser import (
+    FMIBistroMenuParser,
+    IPPBistroMenuParser,
+    MedizinerMensaMenuParser,
+    StraubingMensaMenuParser,
+    StudentenwerkMenuParser,
+)
+from utils import file_util
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "scripts"))
+import combine  # noqa: E402 # pylint: disable=wrong-import-position,wrong-import-order
+import reformat  # noqa: E402 # pylint: disable=wrong-import-position,wrong-import-order
+
+ASSETS = "src/test/assets"
+REPEAT = 5
+
+T = TypeVar("T")
+
+
+class Benchmark(NamedTuple):
+    name: str
+    func: Callable[[], object]
+
+
+def load_studentenwerk_pages() -> Dict[datetime.date, html.Element]:
+    directory = f"{ASSETS}/studentenwerk/{Canteen.MENSA_GARCHING.canteen_id}/for-generation"
+    return {
+        datetime.date.fromisoformat(filename[:-5]): file_util.load_html(os.path.join(directory, filename))
+        for filename in sorted(os.listdir(directory))
+        if filename[:4].isdigit()
+    }
+
+
+def load_texts() -> Dict[str, Any]:
+    texts: Dict[str, Any] = {
+        "fmi": {
+            week: file_util.load_txt(f"{ASSETS}/fmi/for-generation/calendar_week_2021_{week}.txt") for week in (44, 45)
+        },
+        "ipp": {
+            (2017, 47): file_util.load_txt(f"{ASSETS}/ipp/in/menu_kw_47_2017.txt"),
+            (2017, 48): file_util.load_txt(f"{ASSETS}/ipp/in/menu_kw_48_2017.txt"),
+        },
+        "mediziner": {
+            week: file_util.load_txt(f"{ASSETS}/mediziner-mensa/for-generation/week_2018_{week}.txt")
+            for week in (44, 47)
+        },
+        "straubing": {},
+    }
+    for week in (16, 17):
+        with open(f"{ASSETS}/straubing/for-generation/{week}.csv", encoding="cp1252") as f:
+            texts["straubing"][week] = f.read()
+    return texts
+
+
+def parse_studentenwerk(pages: Dict[datetime.date, html.Element]) -> Dict[datetime.date, Menu]:
+    parser = StudentenwerkMenuParser()
+    menus = {}
+    for menu_date, page in pages.items():
+        menu = parser.get_menu(page, Canteen.MENSA_GARCHING, menu_date)
+        if menu is not None:
+            menus[menu_date] = menu
+    return menus
+
+
+def parse_fmi(texts: Dict[int, str]) -> Dict[datetime.date, Menu]:
+    parser = FMIBistroMenuParser()
+    menus = {}
+    for week, text in texts.items():
+        menus.update(parser.get_menus(text, 2021, week))
+    return menus
+
+
+def parse_ipp(texts: Dict[Any, str]) -> Dict[datetime.date, Menu]:
+    parser = IPPBistroMenuParser()
+    menus: Dict[datetime.date, Menu] = {}
+    # the parser warns about every price it cannot read
+    with contextlib.redirect_stdout(io.StringIO()):
+        for (year, week), text in texts.items():
+            menus.update(parser.get_menus(text, year, week) or {})
+    return menus
+
+
+def parse_mediziner(texts: Dict[int, str]) -> Dict[datetime.date, Menu]:
+    parser = MedizinerMensaMenuParser()
+    menus: Dict[datetime.date, Menu] = {}
+    for week, text in texts.items():
+        menus.update(parser.get_menus(text, 2018, week) or {})
+    return menus
+
+
+def parse_straubing(texts: Dict[int, str]) -> Dict[datetime.date, Menu]:
+    parser = StraubingMensaMenuParser()
+    menus = {}
+    for text in texts.values():
+        menus.update(parser.parse_menu(parser.parse_csv(text)))
+    return menus
+
+
+def shift_to_current_week(menus: Dict[datetime.date, Menu]) -> Dict[datetime.date, Menu]:
+    """
+    Moves the menus by whole weeks, so the first one is in the current week, as reformat.py drops all past days.
+    """
+    first = min(menus)
+    today = datetime.date.today()
+    delta = (today - datetime.timedelta(days=today.weekday())) - (first - datetime.timedelta(days=first.weekday()))
+    return {menu_date + delta: Menu(menu_date + delta, menu.dishes) for menu_date, menu in menus.items()}
+
+
+def reset_json_fragments(weeks: Dict[int, Week]) -> None:
+    # serializing is measured without the fragments cached by a previous round
+    for week in weeks.values():
+        week.invalidate_json_fragment()
+        for menu in week.days:
+            menu.invalidate_json_fragment()
+            for dish in menu.dishes:
+                dish.invalidate_json_fragment()
+
+
+def restoring_cwd(func: Callable[[], T]) -> Callable[[], T]:
+    # the scripts change the working directory
+    def call() -> T:
+        cwd = os.getcwd()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                return func()
+        finally:
+            os.chdir(cwd)
+
+    return call
+
+
+def get_benchmarks(temp_dir: str) -> List[Benchmark]:
+    pages = load_studentenwerk_pages()
+    texts = load_texts()
+    canteen_menus = {
+        Canteen.MENSA_GARCHING: parse_studentenwerk(pages),
+        Canteen.FMI_BISTRO: parse_fmi(texts["fmi"]),
+        Canteen.IPP_BISTRO: parse_ipp(texts["ipp"]),
+        Canteen.MEDIZINER_MENSA: parse_mediziner(texts["mediziner"]),
+        Canteen.MENSA_STRAUBING: parse_straubing(texts["straubing"]),
+    }
+    canteen_weeks = {canteen: Week.to_weeks(menus) for canteen, menus in canteen_menus.items()}
+
+    # an output directory with current dates for the combine and reformat steps
+    dist = os.path.join(temp_dir, "dist")
+    for canteen, menus in canteen_menus.items():
+        main.jsonify(Week.to_weeks(shift_to_current_week(menus)), os.path.join(dist, canteen.canteen_id), canteen, True)
+    with open(os.path.join(dist, "all.json"), "wb") as f:
+        f.write(restoring_cwd(lambda: combine.get_combined_bytes(dist))())
+
+    def to_weeks() -> None:
+        for menus in canteen_menus.values():
+            Week.to_weeks(menus)
+
+    def to_json_obj() -> None:
+        for weeks in canteen_weeks.values():
+            for week in weeks.values():
+                week.to_json_obj()
+
+    def jsonify() -> None:
+        for canteen, weeks in canteen_weeks.items():
+            reset_json_fragments(weeks)
+            main.jsonify(weeks, os.path.join(temp_dir, "jsonify", canteen.canteen_id), canteen, True)
+
+    def streamed_feed() -> None:
+        for canteen, weeks in canteen_weeks.items():
+            openmensa.write_feed(weeks, os.path.join(temp_dir, f"{canteen.canteen_id}.xml"))
+
+    def reformat_all() -> None:
+        sys.argv = ["reformat.py", dist]
+        reformat.main()
+
+    return [
+        Benchmark("parser.studentenwerk.get_menu", lambda: parse_studentenwerk(pages)),
+        Benchmark("parser.fmi.get_menus", lambda: parse_fmi(texts["fmi"])),
+        Benchmark("parser.ipp.get_menus", lambda: parse_ipp(texts["ipp"])),
+        Benchmark("parser.mediziner.get_menus", lambda: parse_mediziner(texts["mediziner"])),
+        Benchmark("parser.straubing.parse_menu", lambda: parse_straubing(texts["straubing"])),
+        Benchmark("entities.Week.to_weeks", to_weeks),
+        Benchmark("entities.Week.to_json_obj", to_json_obj),
+        Benchmark("main.jsonify", jsonify),
+        Benchmark("openmensa.write_feed", streamed_feed),
+        Benchmark("scripts.combine", restoring_cwd(lambda: combine.get_combined_bytes(dist))),
+        Benchmark("scripts.reformat", restoring_cwd(reformat_all)),
+    ]
+
+
+def measure(func: Callable[[], object]) -> Dict[str, Any]:
+    """
+    :return: Statistics of the duration of a single call in seconds
+    """
+    timer = timeit.Timer(func)
+    # as many calls per round as take at least 0.2 seconds
+    number, _ = timer.autorange()
+    durations = [duration / number for duration in timer.repeat(repeat=REPEAT, number=number)]
+    return {
+        "min": min(durations),
+        "median": statistics.median(durations),
+        "mean": statistics.mean(durations),
+        "stdev": statistics.stdev(durations),
+        "rounds": REPEAT,
+        "calls_per_round": number,
+    }
+
+
+def run(name_filter: str = "") -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for benchmark in get_benchmarks(temp_dir):
+            if name_filter in benchmark.name:
+                results[benchmark.name] = measure(benchmark.func)
+                print(f"{benchmark.name:<36} {results[benchmark.name]['min'] * 1000:>10.3f} ms")
+    return {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compares the fastest round of every benchmark, which is the least affected by other load on the machine.
+
+    :return: Names of the benchmarks that got slower by more than the threshold, e.g. 0.1 for 10 %
+    """
+    regressions = []
+    print(f"{'benchmark':<36} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for name, result in report["results"].items():
+        if name not in baseline["results"]:
+            print(f"{name:<36} {'-':>12} {result['min'] * 1000:>12.3f} {'new':>8}")
+            continue
+        before = baseline["results"][name]["min"]
+        change = result["min"] / before - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<36} {before * 1000:>12.3f} {result['min'] * 1000:>12.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="benchmarks the parsers and serializers on the bundled test assets")
+    parser.add_argument("--filter", default="", metavar="TEXT", help="only run benchmarks whose name contains TEXT")
+    parser.add_argument("--output", metavar="PATH", help="writes the results as JSON to PATH")
+    parser.add_argument("--compare", metavar="BASELINE", help="compares the results with the JSON results at BASELINE")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown that counts as regression (default: %(default)s)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    benchmark_report = run(args.filter)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as outfile:
+            json.dump(benchmark_report, outfile, indent=2)
+    if args.compare is not None:
+        with open(args.compare, encoding="utf-8") as infile:
+            baseline_report = json.load(infile)
+        if compare(benchmark_report, baseline_report, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,161 @@
+"""
+Measures how the time and the peak memory of the output steps grow with the number of synthetic canteens and weeks.
+For every step, the growth between two sizes is given as exponent of the number of dishes: about 1 is linear, clearly
+above 1 is super-linear and gets flagged.
+
+Usage: PYTHONPATH=src python benchmarks/scaling.py [--canteens 1,4,16,64] [--weeks 13] [--output PATH]
+"""
+import argparse
+import json
+import math
+import operator
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from run import reset_json_fragments, restoring_cwd
+from synthetic import generate_canteens
+
+import main
+from entities import Week
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "scripts"))
+import combine  # noqa: E402 # pylint: disable=wrong-import-position,wrong-import-order
+import reformat  # noqa: E402 # pylint: disable=wrong-import-position,wrong-import-order
+
+REPEAT = 3
+# exponents above this count as super-linear, as small sizes are noisy
+SUPER_LINEAR = 1.2
+# durations below this are too noisy to flag
+MIN_SECONDS = 0.01
+
+
+def measure(func: Callable[[], object]) -> Tuple[float, int]:
+    """
+    :return: The duration of the fastest of REPEAT calls in seconds and the peak of the memory allocated by one call
+    """
+    durations = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    # tracing allocations slows down the call, so the memory is measured in a call of its own
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(durations), peak
+
+
+def measure_size(canteens: int, weeks: int) -> Dict[str, Any]:
+    synthetic_canteens = generate_canteens(canteens, weeks)
+    canteen_weeks = {canteen.name: Week.to_weeks(canteen.menus) for canteen in synthetic_canteens}
+
+    with tempfile.TemporaryDirectory() as dist:
+
+        def to_weeks() -> None:
+            for canteen in synthetic_canteens:
+                Week.to_weeks(canteen.menus)
+
+        def jsonify() -> None:
+            for canteen in synthetic_canteens:
+                reset_json_fragments(canteen_weeks[canteen.name])
+                main.jsonify(canteen_weeks[canteen.name], os.path.join(dist, canteen.name), canteen.canteen, True)
+
+        def combine_all() -> None:
+            content = combine.get_combined_bytes(dist)
+            with open(os.path.join(dist, "all.json"), "wb") as outfile:
+                outfile.write(content)
+
+        def reformat_all() -> None:
+            sys.argv = ["reformat.py", dist]
+            reformat.main()
+
+        steps: Dict[str, Dict[str, float]] = {}
+        for name, func in (
+            ("Week.to_weeks", to_weeks),
+            ("main.jsonify", jsonify),
+            ("scripts.combine", restoring_cwd(combine_all)),
+            ("scripts.reformat", restoring_cwd(reformat_all)),
+        ):
+            seconds, peak = measure(func)
+            steps[name] = {"seconds": seconds, "peak_bytes": peak}
+    return {
+        "canteens": canteens,
+        "weeks": weeks,
+        "dishes": sum(len(menu.dishes) for canteen in synthetic_canteens for menu in canteen.menus.values()),
+        "steps": steps,
+    }
+
+
+def get_exponent(before: Dict[str, Any], after: Dict[str, Any], step: str, key: str) -> float:
+    """
+    :return: The exponent k of the growth from one size to the next one, assuming value ~ dishes^k
+    """
+    ratio = after["steps"][step][key] / max(before["steps"][step][key], 1e-9)
+    return math.log(max(ratio, 1e-9)) / math.log(after["dishes"] / before["dishes"])
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    results = sorted(results, key=operator.itemgetter("dishes"))
+    for step in results[0]["steps"]:
+        print(step)
+        print(f"  {'canteens':>8} {'weeks':>6} {'dishes':>9} {'time ms':>11} {'k':>6} {'peak MiB':>10} {'k':>6}")
+        for index, result in enumerate(results):
+            seconds = result["steps"][step]["seconds"]
+            peak = result["steps"][step]["peak_bytes"]
+            time_exponent, memory_exponent, flag = "", "", ""
+            if index > 0 and result["dishes"] > results[index - 1]["dishes"]:
+                time_k = get_exponent(results[index - 1], result, step, "seconds")
+                memory_k = get_exponent(results[index - 1], result, step, "peak_bytes")
+                time_exponent, memory_exponent = f"{time_k:.2f}", f"{memory_k:.2f}"
+                if (time_k > SUPER_LINEAR and seconds >= MIN_SECONDS) or memory_k > SUPER_LINEAR:
+                    flag = "  SUPER-LINEAR"
+            # a bar per row, so the growth can be seen at a glance
+            time_bar = "#" * max(1, round(40 * seconds / max(r["steps"][step]["seconds"] for r in results)))
+            print(
+                f"  {result['canteens']:>8} {result['weeks']:>6} {result['dishes']:>9} {seconds * 1000:>11.2f} "
+                f"{time_exponent:>6} {peak / 2**20:>10.2f} {memory_exponent:>6}  {time_bar}{flag}",
+            )
+
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(size) for size in value.split(",")]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="measures how the output steps scale with synthetic menus")
+    parser.add_argument(
+        "--canteens",
+        type=parse_sizes,
+        default=[1, 4, 16, 64],
+        metavar="N,N,...",
+        help="numbers of canteens (default: 1,4,16,64)",
+    )
+    parser.add_argument(
+        "--weeks",
+        type=parse_sizes,
+        default=[13],
+        metavar="N,N,...",
+        help="numbers of weeks per canteen (default: 13)",
+    )
+    parser.add_argument("--output", metavar="PATH", help="writes the results as JSON to PATH")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    scaling_results = []
+    for week_count in args.weeks:
+        for canteen_count in args.canteens:
+            scaling_results.append(measure_size(canteen_count, week_count))
+            print(f"measured {canteen_count} canteens with {week_count} weeks", file=sys.stderr)
+    print_results(scaling_results)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as results_file:
+            json.dump(scaling_results, results_file, indent=2)
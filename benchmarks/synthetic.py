@@ -0,0 +1,193 @@
+"""
+Generates synthetic menus and upstream documents at any scale out of the bundled test assets.
+The menus are made of the dishes parsed from the assets and start in the current week, so no step drops them as past.
+The documents are the assets repeated for as many weeks as requested, with all dates shifted to the week they stand
+for. The layouts stay the same, so the parsers can read them.
+
+Usage: PYTHONPATH=src python benchmarks/synthetic.py OUT [--weeks 52]
+"""
+import argparse
+import datetime
+import os
+import random
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from run import (
+    ASSETS,
+    load_studentenwerk_pages,
+    load_texts,
+    parse_fmi,
+    parse_ipp,
+    parse_mediziner,
+    parse_straubing,
+    parse_studentenwerk,
+)
+
+from entities import Canteen, Dish, Menu
+
+DATE_PATTERN = re.compile(rb"\b(\d{1,2})\.(\d{1,2})\.(\d{4})\b")
+
+# the assets with the iso calendar week they contain
+FMI_WEEKS: List[Tuple[int, int]] = [(2021, 44), (2021, 45)]
+IPP_WEEKS: List[Tuple[int, int]] = [(2017, 47), (2017, 48)]
+MEDIZINER_WEEKS: List[Tuple[int, int]] = [(2018, 44), (2018, 47)]
+STRAUBING_WEEKS: List[Tuple[int, int]] = [(2022, 16), (2022, 17)]
+
+
+class SyntheticCanteen(NamedTuple):
+    # unique directory name of the canteen, e.g. "mensa-garching-3"
+    name: str
+    # the real canteen it poses as
+    canteen: Canteen
+    menus: Dict[datetime.date, Menu]
+
+
+def get_current_monday() -> datetime.date:
+    today = datetime.date.today()
+    return today - datetime.timedelta(days=today.weekday())
+
+
+def load_dish_pool() -> List[Dish]:
+    """
+    :return: All distinct dishes of the bundled test assets
+    """
+    texts = load_texts()
+    dishes: Dict[str, Dish] = {}
+    for menus in (
+        parse_studentenwerk(load_studentenwerk_pages()),
+        parse_fmi(texts["fmi"]),
+        parse_ipp(texts["ipp"]),
+        parse_mediziner(texts["mediziner"]),
+        parse_straubing(texts["straubing"]),
+    ):
+        for menu in menus.values():
+            for dish in menu.dishes:
+                dishes.setdefault(dish.name, dish)
+    return list(dishes.values())
+
+
+def generate_canteens(
+    canteens: int,
+    weeks: int,
+    dishes_per_day: int = 12,
+    start: Optional[datetime.date] = None,
+    seed: int = 42,
+) -> List[SyntheticCanteen]:
+    """
+    Generates the menus of every weekday of the given number of weeks for the given number of canteens.
+    Every dish is a new object, so nothing that is cached per dish is shared between menus.
+
+    :param start: Monday of the first week, the current week by default
+    """
+    rng = random.Random(seed)  # nosec: no cryptography
+    pool = load_dish_pool()
+    real_canteens = list(Canteen)
+    start = start or get_current_monday()
+    synthetic_canteens = []
+    for number in range(canteens):
+        canteen = real_canteens[number % len(real_canteens)]
+        menus = {}
+        for day in range(weeks * 7):
+            menu_date = start + datetime.timedelta(days=day)
+            if menu_date.weekday() >= 5:
+                continue
+            dishes = [
+                Dish(dish.name, dish.prices, set(dish.labels), dish.dish_type)
+                for dish in rng.sample(pool, min(dishes_per_day, len(pool)))
+            ]
+            menus[menu_date] = Menu(menu_date, dishes)
+        synthetic_canteens.append(SyntheticCanteen(f"{canteen.canteen_id}-{number}", canteen, menus))
+    return synthetic_canteens
+
+
+def shift_dates(document: bytes, days: int) -> bytes:
+    """
+    Moves every date in the format of "dd.mm.yyyy" (or "d.m.yyyy") by the given number of days.
+    """
+
+    def shift(match: "re.Match[bytes]") -> bytes:
+        day, month, year = match.groups()
+        try:
+            shifted = datetime.date(int(year), int(month), int(day)) + datetime.timedelta(days=days)
+        except ValueError:
+            # not a date after all
+            return match.group(0)
+        return f"{shifted.day:0{len(day)}d}.{shifted.month:0{len(month)}d}.{shifted.year}".encode()
+
+    return DATE_PATTERN.sub(shift, document)
+
+
+def _days_since(template_week: Tuple[int, int], monday: datetime.date) -> int:
+    return (monday - datetime.date.fromisocalendar(template_week[0], template_week[1], 1)).days
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as infile:
+        return infile.read()
+
+
+def generate_documents(weeks: int, start: Optional[datetime.date] = None) -> Iterator[Tuple[str, bytes]]:
+    """
+    Generates the documents the parsers fetch upstream for the given number of weeks, one after another, so even a
+    large corpus does not have to fit into memory.
+
+    :return: Paths, named like the test assets, with the content of the documents
+    """
+    start = start or get_current_monday()
+    studentenwerk_directory = f"{ASSETS}/studentenwerk/{Canteen.MENSA_GARCHING.canteen_id}/for-generation"
+    studentenwerk_pages: Dict[Tuple[int, int], List[str]] = {}
+    for filename in sorted(os.listdir(studentenwerk_directory)):
+        if filename[:4].isdigit():
+            year, week, _ = datetime.date.fromisoformat(filename[:-5]).isocalendar()
+            studentenwerk_pages.setdefault((year, week), []).append(filename)
+    studentenwerk_weeks = sorted(studentenwerk_pages)
+
+    for number in range(weeks):
+        monday = start + datetime.timedelta(weeks=number)
+        year, week, _ = monday.isocalendar()
+        template_week = studentenwerk_weeks[number % len(studentenwerk_weeks)]
+        days = _days_since(template_week, monday)
+        for filename in studentenwerk_pages[template_week]:
+            menu_date = datetime.date.fromisoformat(filename[:-5]) + datetime.timedelta(days=days)
+            page = _read(os.path.join(studentenwerk_directory, filename))
+            yield f"studentenwerk/{menu_date.isoformat()}.html", shift_dates(page, days)
+
+        template_week = FMI_WEEKS[number % len(FMI_WEEKS)]
+        text = _read(f"{ASSETS}/fmi/for-generation/calendar_week_{template_week[0]}_{template_week[1]}.txt")
+        yield f"fmi/calendar_week_{year}_{week}.txt", shift_dates(text, _days_since(template_week, monday))
+
+        template_week = IPP_WEEKS[number % len(IPP_WEEKS)]
+        text = _read(f"{ASSETS}/ipp/in/menu_kw_{template_week[1]}_{template_week[0]}.txt")
+        yield f"ipp/menu_kw_{week}_{year}.txt", shift_dates(text, _days_since(template_week, monday))
+
+        template_week = MEDIZINER_WEEKS[number % len(MEDIZINER_WEEKS)]
+        text = _read(f"{ASSETS}/mediziner-mensa/for-generation/week_{template_week[0]}_{template_week[1]}.txt")
+        yield f"mediziner-mensa/week_{year}_{week}.txt", shift_dates(text, _days_since(template_week, monday))
+
+        # cp1252, like the CSV files served upstream
+        template_week = STRAUBING_WEEKS[number % len(STRAUBING_WEEKS)]
+        csv = _read(f"{ASSETS}/straubing/for-generation/{template_week[1]}.csv")
+        yield f"straubing/{year}_{week}.csv", shift_dates(csv, _days_since(template_week, monday))
+
+
+def write_documents(directory: str, weeks: int) -> int:
+    """
+    :return: The number of written documents
+    """
+    count = 0
+    for path, content in generate_documents(weeks):
+        path = os.path.join(directory, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as outfile:
+            outfile.write(content)
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="writes synthetic upstream documents based on the test assets")
+    parser.add_argument("directory", metavar="OUT")
+    parser.add_argument("--weeks", type=int, default=52, help="number of weeks (default: %(default)s)")
+    args = parser.parse_args()
+    print(f"{write_documents(args.directory, args.weeks)} documents written to {args.directory}")
@@ -0,0 +1,56 @@
+"""
+Measures the translation throughput of util.translate_dishes offline with the FakeTranslator, which simulates the
+round trip to DeepL by sleeping for every request.
+
+Usage: PYTHONPATH=src python benchmarks/translation.py [LATENCY_SECONDS]
+"""
+import copy
+import sys
+import time
+from datetime import date
+from typing import Dict
+
+from entities import Menu
+from menu_parser import StraubingMensaMenuParser
+from utils import util
+
+ASSETS = "src/test/assets"
+
+
+def get_menus() -> Dict[date, Menu]:
+    parser = StraubingMensaMenuParser()
+    menus = {}
+    for calendar_week in (16, 17):
+        with open(f"{ASSETS}/straubing/for-generation/{calendar_week}.csv", encoding="cp1252") as f:
+            menus.update(parser.parse_menu(parser.parse_csv(f.read())))
+    return menus
+
+
+def translate_one_by_one(menus: Dict[date, Menu], translator: util.FakeTranslator) -> None:
+    # the way dishes got translated before: one request per dish
+    for menu in menus.values():
+        for dish in menu.dishes:
+            dish.name = translator.translate_text(dish.name, source_lang="DE", target_lang="EN-US").text
+
+
+def run(latency: float) -> None:
+    menus = get_menus()
+    dish_count = sum(len(menu.dishes) for menu in menus.values())
+    print(f"{len(menus)} days, {dish_count} dishes, simulated latency {latency * 1000:.0f} ms per request")
+    for name, translate in (
+        ("one request per dish", translate_one_by_one),
+        ("batched", lambda menus_, translator: util.translate_dishes(menus_, "EN-US", translator)),
+    ):
+        translator = util.FakeTranslator(latency)
+        menus_copy = copy.deepcopy(menus)
+        start = time.perf_counter()
+        translate(menus_copy, translator)
+        duration = time.perf_counter() - start
+        print(
+            f"{name:<22} {translator.requests:>5} requests {translator.texts:>5} texts "
+            f"{duration:>7.3f} s {dish_count / duration:>9.0f} dishes/s",
+        )
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 0.05)
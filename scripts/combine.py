@@ -1,43 +1,67 @@
 #!/bin/python3
+import datetime
 import json
 import os
+import sys
 from typing import List
 
 
-def get_combined_str() -> str:
-    os.chdir("dist")
+def get_combined_bytes(directory: str = "dist") -> bytes:
+    os.chdir(directory)
     files: List[str] = []
 
     combined_df_name: str = "combined"
 
-    for directory in os.listdir("."):
-        if os.path.isdir(directory):
-            os.chdir(directory)
+    for canteen_directory in os.listdir("."):
+        if os.path.isdir(canteen_directory):
+            os.chdir(canteen_directory)
             if os.path.isdir(combined_df_name):
                 os.chdir(combined_df_name)
                 if os.path.exists(combined_df_name + ".json"):
                     files.append(os.path.join(os.getcwd(), combined_df_name + ".json"))
-                    print("Found " + combined_df_name + ".json for: " + directory)
+                    print("Found " + combined_df_name + ".json for: " + canteen_directory)
                 os.chdir("..")
             os.chdir("..")
 
-    out_str: str = '{"canteens": [\n'
-    for i, file in enumerate(files):
-        with open(file, encoding="utf-8") as in_file:
-            for line in in_file:
-                out_str += line
-            if i < len(files) - 1:
-                out_str += ","
-    out_str += "]}"
-    return out_str
+    # "combined.json" files are already compact JSON, so they get spliced as they are instead of being decoded and
+    # encoded again
+    combined_jsons: List[bytes] = []
+    for file in files:
+        with open(file, "rb") as in_file:
+            combined_jsons.append(in_file.read().strip())
+    return b'{"canteens":[' + b",".join(combined_jsons) + b"]}"
+
+
+def get_day_bytes(directory: str, date: datetime.date) -> bytes:
+    """
+    Splices the "<canteen>/days/<date>.json" files of all canteens that serve anything on the given date.
+    """
+    day_jsons: List[bytes] = []
+    for canteen in sorted(os.listdir(directory)):
+        day_file = os.path.join(directory, canteen, "days", date.isoformat() + ".json")
+        if os.path.isfile(day_file):
+            with open(day_file, "rb") as in_file:
+                day_jsons.append(in_file.read().strip())
+    return b'{"date":' + json.dumps(date.isoformat()).encode() + b',"canteens":[' + b",".join(day_jsons) + b"]}"
 
 
 def main():
-    if os.path.isdir("dist"):
-        out_str: str = get_combined_str()
+    # the output directory of a language, e.g. "dist/en"
+    directory = sys.argv[1] if len(sys.argv) > 1 else "dist"
+    if os.path.isdir(directory):
+        # read before get_combined_bytes changes the working directory
+        today = datetime.date.today()
+        day_outputs = {
+            "today.json": get_day_bytes(directory, today),
+            "tomorrow.json": get_day_bytes(directory, today + datetime.timedelta(days=1)),
+        }
+        out_bytes: bytes = get_combined_bytes(directory)
         out_file_name: str = "all.json"
-        with open(out_file_name, "w", encoding="utf-8") as out_file:
-            json.dump(json.loads(out_str), out_file, separators=(",", ":"))
+        with open(out_file_name, "wb") as out_file:
+            out_file.write(out_bytes)
+        for day_file_name, day_bytes in day_outputs.items():
+            with open(day_file_name, "wb") as out_file:
+                out_file.write(day_bytes)
 
 
 if __name__ == "__main__":
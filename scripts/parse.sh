@@ -3,6 +3,21 @@
 CANTEEN_LIST=$(python3 src/main.py --canteens | python3 scripts/parse_canteen_list.py)
 OUT_DIR="${OUT_DIR:-dist}"
 LANGUAGE="${LANGUAGE_EAT_API:-DE}"
+BINARY_OUTPUT="${BINARY_OUTPUT_EAT_API:-false}"
+FINGERPRINT="${FINGERPRINT_EAT_API:-false}"
+# Translations are remembered across runs, so unchanged dishes are never sent to DeepL again:
+export TRANSLATION_MEMORY_EAT_API="${TRANSLATION_MEMORY_EAT_API:-.cache/translation_memory.sqlite3}"
+# All parsed menus are appended to the archive, so past weeks can be regenerated with src/archive.py:
+ARCHIVE="${ARCHIVE_EAT_API:-.cache/archive.sqlite3}"
+# Optionally write the time spent in every stage and counters like the fetched bytes per canteen:
+METRICS="${METRICS_EAT_API:-}"
+# The previous all.json of every language is kept, so each run can publish what changed since:
+CHANGES_STATE="${CHANGES_STATE_EAT_API:-.cache/changes}"
+# The previous run report is kept, so canteens that got slower or worse are flagged:
+REPORT_STATE="${REPORT_STATE_EAT_API:-.cache/run_report}"
+CANTEEN_REPORTS="$REPORT_STATE/canteens"
+# The search index is kept, so it is only extended with the dishes that are new since the previous run:
+SEARCH_STATE="${SEARCH_STATE_EAT_API:-.cache/search}"
 
 # Delete old output directory if it exists:
 if [ -d $OUT_DIR ]; then
@@ -10,41 +25,84 @@ if [ -d $OUT_DIR ]; then
 fi
 # Create empty output directory:
 mkdir -p $OUT_DIR
+# Every run starts without canteen reports:
+rm -rf "$CANTEEN_REPORTS"
+mkdir -p "$CANTEEN_REPORTS"
 
 parse(){
     echo "Parsing menus for: $1 in $2..."
-    python3 src/main.py -p "$1" -j "./$OUT_DIR/$1" -c --language $2
+    RUN_ARGS=(--report "$CANTEEN_REPORTS")
+    if [ -n "$METRICS" ]; then
+        RUN_ARGS+=(--metrics "$METRICS")
+    fi
+    if [ "$2" = "ALL" ]; then
+        # Parse once and create the output for every language:
+        python3 src/main.py -p "$1" -j "./$OUT_DIR/$1" -c --all-languages --archive "$ARCHIVE" --openmensa "./$OUT_DIR/$1" "${RUN_ARGS[@]}"
+    else
+        python3 src/main.py -p "$1" -j "./$OUT_DIR/$1" -c --language $2 --archive "$ARCHIVE" --openmensa "./$OUT_DIR/$1" "${RUN_ARGS[@]}"
+    fi
     echo "Parsing menus for: $1 done."
 }
 
-# Parse all canteens:
+# The output directories of all languages (e.g. "dist" and "dist/en/"):
+LANGUAGE_DIRS="$OUT_DIR"
+if [ "$LANGUAGE" = "ALL" ]; then
+    for BASE_URL in $(python3 src/main.py --languages | python3 scripts/parse_language_list.py); do
+        LANGUAGE_DIRS="$LANGUAGE_DIRS $OUT_DIR/$BASE_URL"
+    done
+fi
+
+# Parse all canteens, every canteen also gets an OpenMensa feed "<canteen>/feed.xml":
 for canteen in ${CANTEEN_LIST};
 do
  ( parse $canteen $LANGUAGE ) &
 done
 wait # Wait for all processes to finish
 
-# Combine all combined.json files to one all.json file:
-python3 scripts/combine.py
-# Remove all dishes which are older than one day
-# and reorganize them in a more efficient format:
-python3 scripts/reformat.py
+# Combine the status, duration and request latency of every canteen to "run_report.json" and flag canteens that got
+# slower or worse since the previous run:
+python3 ./src/run_report.py "$CANTEEN_REPORTS" "$OUT_DIR" "$REPORT_STATE"
+
+for LANGUAGE_DIR in ${LANGUAGE_DIRS}; do
+    # Combine all combined.json files to one all.json file:
+    python3 scripts/combine.py "$LANGUAGE_DIR"
+    # Compare the menus with the previous run and write the changes to "changes/<timestamp>.json":
+    python3 ./src/changes.py "$LANGUAGE_DIR" "$CHANGES_STATE/$LANGUAGE_DIR"
+    # Remove all dishes which are older than one day
+    # and reorganize them in a more efficient format:
+    python3 scripts/reformat.py "$LANGUAGE_DIR"
+    # Collect all unique dishes in a catalog and reference them by id in the compact menus:
+    python3 ./src/dish_catalog.py "$LANGUAGE_DIR"
+    # Add the dish names to the full-text index of the previous runs:
+    python3 ./src/search.py "$LANGUAGE_DIR" "$SEARCH_STATE/$LANGUAGE_DIR"
+done
 
-openmensa_list=( "ipp-bistro" "fmi-bistro" )
+# Aggregate prices, labels and repetitions over all archived menus:
+python3 ./src/analytics.py "$ARCHIVE" "$OUT_DIR"
 
-for CANTEEN in "${openmensa_list[@]}"; do
-    echo "Parsing openmensa menus for: " "$CANTEEN"
-    python3 src/main.py -p "$CANTEEN" --openmensa "$OUT_DIR/$CANTEEN"
+for LANGUAGE_DIR in ${LANGUAGE_DIRS}; do
+    ENUM_JSON_PATH="$LANGUAGE_DIR/enums"
+    mkdir -p "$ENUM_JSON_PATH"
+    echo "Creating Canteen-, Language- and Label-Enum in $LANGUAGE_DIR"
+    python3 ./src/enum_json_creator.py "$ENUM_JSON_PATH"
+
+    # Copy canteens.json in the output directory (for backwards compatibility):
+    echo "Copying canteens..."
+    cp "$ENUM_JSON_PATH/canteens.json" "$LANGUAGE_DIR"
 done
 
-ENUM_JSON_PATH="$OUT_DIR/enums"
-mkdir -p "$ENUM_JSON_PATH"
-echo "Creating Canteen-, Language- and Label-Enum"
-python3 ./src/enum_json_creator.py "$ENUM_JSON_PATH"
+# Optionally add a MessagePack twin for every JSON file:
+if [ "$BINARY_OUTPUT" = "true" ]; then
+    echo "Converting JSON files to MessagePack..."
+    python3 ./src/binary_converter.py "$OUT_DIR"
+fi
 
-# Copy canteens.json in the output directory (for backwards compatibility):
-echo "Copying canteens..."
-cp "$ENUM_JSON_PATH/canteens.json" $OUT_DIR
+# List all files with their size and hash in manifest.json and optionally add immutable fingerprinted copies:
+if [ "$FINGERPRINT" = "true" ]; then
+    python3 ./src/manifest.py "$OUT_DIR" --fingerprint
+else
+    python3 ./src/manifest.py "$OUT_DIR"
+fi
 echo "Done"
 
 tree "$OUT_DIR"
@@ -0,0 +1,9 @@
+# script to show the base urls of all languages from json output line by line
+
+import json
+import sys
+
+if __name__ == "__main__":
+    languages = json.load(sys.stdin)
+    for language in languages:
+        print(language["base_url"])
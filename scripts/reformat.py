@@ -2,7 +2,9 @@
 import json
 import os
 import re
+import sys
 from datetime import datetime, timedelta
+from typing import Any, Dict, List
 
 
 class Dish:
@@ -45,9 +47,19 @@ class Canteen:
                             )
 
 
+def get_all_ref(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Converts the content of "all.json" into the content of "all_ref.json": the upcoming dishes of every canteen.
+    """
+    canteens = [Canteen(c) for c in data.get("canteens", [])]
+    return [{"canteen_id": c.canteen_id, "dishes": [vars(dish) for dish in c.dishes]} for c in canteens]
+
+
 def main():
-    if os.path.isdir("dist"):
-        os.chdir("dist")
+    # the output directory of a language, e.g. "dist/en"
+    directory = sys.argv[1] if len(sys.argv) > 1 else "dist"
+    if os.path.isdir(directory):
+        os.chdir(directory)
 
         canteens = []
         print('Loading "all.json"')
@@ -56,12 +68,11 @@ def main():
             with open("all.json", "r", encoding="utf-8") as input_file:
                 data = json.load(input_file)
                 print('Parsing "all.json"')
-                for c in data.get("canteens"):
-                    canteens.append(Canteen(c))
+                canteens = get_all_ref(data)
 
         print('Saving result to "all_ref.json"')
         with open("all_ref.json", "w", encoding="utf-8") as outfile:
-            json.dump(canteens, outfile, default=lambda o: o.__dict__, separators=(",", ":"), ensure_ascii=False)
+            json.dump(canteens, outfile, separators=(",", ":"), ensure_ascii=False)
         print("Done")
 
 
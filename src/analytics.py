@@ -0,0 +1,361 @@
+import datetime
+import json
+import os.path
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from archive import MenuArchive
+from entities import Label, Menu
+from query import LABEL_BITS, PRICE_ROLES, to_label_mask
+from utils import json_util
+
+ANALYTICS_DIRECTORY: str = "analytics"
+
+# date.toordinal() of numpy's epoch, 1970-01-01
+EPOCH_ORDINAL: int = datetime.date(1970, 1, 1).toordinal()
+
+VEGAN_BIT: int = LABEL_BITS[Label.VEGAN.name]
+VEGETARIAN_BIT: int = LABEL_BITS[Label.VEGETARIAN.name]
+
+
+def _parse_dish_ids(dish_ids: Sequence[str]) -> np.ndarray:
+    """
+    Dish ids are 16 hex digits (see json_util.content_hash), so the concatenated dish ids are parsed into unsigned
+    64-bit integers at once.
+    """
+    return np.frombuffer(bytes.fromhex("".join(dish_ids)), dtype=">u8").astype(np.uint64)
+
+
+def _columns(rows: List[Tuple[Any, ...]], count: int) -> List[Tuple[Any, ...]]:
+    """
+    :return: The values of every one of the count columns of the rows
+    """
+    return list(zip(*rows)) or [()] * count
+
+
+def _factorize(values: np.ndarray) -> Tuple[List[Any], np.ndarray]:
+    """
+    :return: The sorted unique values and the index of every value in them
+    """
+    uniques, codes = np.unique(values, return_inverse=True)
+    return uniques.tolist(), codes.reshape(-1).astype(np.int32)
+
+
+def _factorize_rows(*columns: np.ndarray) -> np.ndarray:
+    """
+    Same as np.unique(np.column_stack(columns), axis=0, return_inverse=True), but factorizes one column after the
+    other, which is a lot faster than comparing whole rows.
+
+    :return: The index of every row in the sorted unique rows
+    """
+    codes = np.zeros(len(columns[0]), dtype=np.int64)
+    for column in columns:
+        if column.dtype.kind == "f":
+            # before numpy 1.24, np.unique() keeps every NaN as a value of its own, while there are no infinite prices
+            column = np.where(np.isnan(column), np.inf, column)
+        uniques, column_codes = np.unique(column, return_inverse=True)
+        _, codes = np.unique(codes * len(uniques) + column_codes.reshape(-1), return_inverse=True)
+    return codes.reshape(-1).astype(np.int32)
+
+
+def _find(sorted_ids: np.ndarray, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :return: The index in sorted_ids of every id found in there and whether every id got found
+    """
+    positions = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+    found = sorted_ids[positions] == ids
+    return positions[found], found
+
+
+class MenuArrays:  # pylint: disable=too-many-instance-attributes
+    """
+    Column-wise representation of many menus: every served dish is one row in every array.
+    Canteens, dishes and dish types are encoded as indexes into canteen_ids, dish_names and dish_types.
+    Missing prices are NaN.
+    """
+
+    def __init__(self):
+        self.canteen_ids: List[str] = []
+        self.dish_names: List[str] = []
+        self.dish_types: List[str] = []
+        self.canteen_codes = np.zeros(0, dtype=np.int32)
+        self.dish_codes = np.zeros(0, dtype=np.int32)
+        self.dish_type_codes = np.zeros(0, dtype=np.int32)
+        self.dates = np.zeros(0, dtype=np.int64)
+        self.label_masks = np.zeros(0, dtype=np.int64)
+        self.base_prices: Dict[str, np.ndarray] = {role: np.zeros(0) for role in PRICE_ROLES}
+        self.prices_per_unit: Dict[str, np.ndarray] = {role: np.zeros(0) for role in PRICE_ROLES}
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @staticmethod
+    def from_menus(canteen_menus: Dict[str, Dict[datetime.date, Menu]]) -> "MenuArrays":
+        """
+        Dishes with the same name, dish type, labels and prices are counted as the same dish.
+
+        :param canteen_menus: The parsed menus for every canteen id
+        """
+        arrays = MenuArrays()
+        menus = [
+            (canteen_id, menu_date, menu)
+            for canteen_id, dated_menus in canteen_menus.items()
+            for menu_date, menu in dated_menus.items()
+        ]
+        dishes = [dish for _, _, menu in menus for dish in menu.dishes]
+        if not dishes:
+            return arrays
+        # canteen and date are the same for all dishes of a menu
+        dish_counts = np.fromiter((len(menu.dishes) for _, _, menu in menus), np.int64, len(menus))
+        arrays.canteen_ids, canteen_codes = _factorize(np.array([canteen_id for canteen_id, _, _ in menus]))
+        arrays.canteen_codes = np.repeat(canteen_codes, dish_counts)
+        ordinals = np.fromiter((menu_date.toordinal() for _, menu_date, _ in menus), np.int64, len(menus))
+        arrays.dates = np.repeat(ordinals, dish_counts)
+
+        arrays.dish_types, arrays.dish_type_codes = _factorize(np.array([dish.dish_type for dish in dishes]))
+        arrays.label_masks = np.fromiter(map(to_label_mask, (dish.labels for dish in dishes)), np.int64, len(dishes))
+        for role in PRICE_ROLES:
+            prices = [getattr(dish.prices, role) for dish in dishes]
+            # None becomes NaN
+            arrays.base_prices[role] = np.array(
+                [None if price is None else price.base_price for price in prices],
+                dtype=np.float64,
+            )
+            arrays.prices_per_unit[role] = np.array(
+                [None if price is None else price.price_per_unit for price in prices],
+                dtype=np.float64,
+            )
+
+        names, name_codes = _factorize(np.array([dish.name for dish in dishes]))
+        arrays.dish_codes = _factorize_rows(
+            name_codes,
+            arrays.dish_type_codes,
+            arrays.label_masks,
+            *arrays.base_prices.values(),
+            *arrays.prices_per_unit.values(),
+        )
+        dish_name_codes = np.zeros(arrays.dish_codes.max() + 1, dtype=np.int32)
+        dish_name_codes[arrays.dish_codes] = name_codes
+        arrays.dish_names = [names[code] for code in dish_name_codes]
+        return arrays
+
+    @staticmethod
+    def from_archive(
+        archive: MenuArchive,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+    ) -> "MenuArrays":
+        """
+        Loads the menus of all canteens, as they got parsed most recently.
+        """
+        arrays = MenuArrays()
+        rows = archive.connection.execute(
+            "SELECT menu_entries.canteen_id, menu_entries.date, menu_entries.dish_id "
+            "FROM menus "
+            "JOIN menu_entries ON menu_entries.canteen_id = menus.canteen_id AND menu_entries.date = menus.date "
+            "AND menu_entries.last_run = menus.last_run "
+            "WHERE menus.date >= ? AND menus.date <= ? "
+            "ORDER BY menu_entries.canteen_id, menu_entries.date, menu_entries.position",
+            ((start or datetime.date.min).isoformat(), (end or datetime.date.max).isoformat()),
+        ).fetchall()
+        if not rows:
+            return arrays
+        canteen_ids, dates, dish_ids = _columns(rows, 3)
+        arrays.canteen_ids, arrays.canteen_codes = _factorize(np.array(canteen_ids))
+        arrays.dates = np.array(dates, dtype="datetime64[D]").astype(np.int64) + EPOCH_ORDINAL
+        served_dish_ids, dish_codes = np.unique(_parse_dish_ids(dish_ids), return_inverse=True)
+        arrays.dish_codes = dish_codes.reshape(-1).astype(np.int32)
+
+        # all dishes of the archive, of which only the served ones are kept
+        dish_ids, names, dish_types, prices = _columns(
+            archive.connection.execute(
+                "SELECT dish_id, name, dish_type, prices FROM dishes ORDER BY dish_id",
+            ).fetchall(),
+            4,
+        )
+        positions, found = _find(served_dish_ids, _parse_dish_ids(dish_ids))
+        dish_names = np.empty(len(served_dish_ids), dtype=object)
+        dish_names[positions] = np.array(names, dtype=object)[found]
+        arrays.dish_names = dish_names.tolist()
+        arrays.dish_types, type_codes = _factorize(np.array(dish_types)[found])
+        dish_type_codes = np.zeros(len(served_dish_ids), dtype=np.int32)
+        dish_type_codes[positions] = type_codes
+        arrays.dish_type_codes = dish_type_codes[arrays.dish_codes]
+        # there are far less different prices than dishes, so every one of them is only parsed once
+        price_indexes: Dict[str, int] = {}
+        dish_price_codes = np.fromiter(
+            (price_indexes.setdefault(price, len(price_indexes)) for price in prices),
+            np.int64,
+            len(prices),
+        )
+        price_codes = np.zeros(len(served_dish_ids), dtype=np.int64)
+        price_codes[positions] = dish_price_codes[found]
+        price_codes = price_codes[arrays.dish_codes]
+        price_objs = [json.loads(price) for price in price_indexes]
+        for role in PRICE_ROLES:
+            # None becomes NaN
+            base_prices = np.array(
+                [(price.get(role) or {}).get("base_price") for price in price_objs],
+                dtype=np.float64,
+            )
+            arrays.base_prices[role] = base_prices[price_codes]
+            prices_per_unit = np.array(
+                [(price.get(role) or {}).get("price_per_unit") for price in price_objs],
+                dtype=np.float64,
+            )
+            arrays.prices_per_unit[role] = prices_per_unit[price_codes]
+
+        dish_ids, labels = _columns(
+            archive.connection.execute("SELECT dish_id, label FROM dish_labels ORDER BY dish_id, label").fetchall(),
+            2,
+        )
+        positions, found = _find(served_dish_ids, _parse_dish_ids(dish_ids))
+        label_bits = np.fromiter(map(LABEL_BITS.__getitem__, labels), np.int64, len(labels))
+        label_masks = np.zeros(len(served_dish_ids), dtype=np.int64)
+        np.bitwise_or.at(label_masks, positions, label_bits[found])
+        arrays.label_masks = label_masks[arrays.dish_codes]
+        return arrays
+
+    def months(self) -> np.ndarray:
+        """
+        :return: Number of months since January 1970 for every row
+        """
+        return (self.dates - EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def _month_name(month: int) -> str:
+    return str(np.datetime64(int(month), "M"))
+
+
+def _round(value: float, digits: int = 2) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def group_means(keys: np.ndarray, values: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized group-by, which ignores NaN values.
+
+    :param keys: Group of every value, between 0 and size - 1
+    :return: Mean (NaN for empty groups) and number of values of every group
+    """
+    valid = ~np.isnan(values)
+    counts = np.bincount(keys[valid], minlength=size)
+    sums = np.bincount(keys[valid], weights=values[valid], minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts, counts
+
+
+def price_trends(arrays: MenuArrays, group_codes: np.ndarray, group_names: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    :return: Mean base price per role for every group and month, e.g. {"mensa-garching": {"2022-05": {"students": 3.1}}}
+    """
+    if not arrays:
+        return {}
+    months = arrays.months()
+    first_month = int(months.min())
+    month_count = int(months.max()) - first_month + 1
+    keys = group_codes.astype(np.int64) * month_count + (months - first_month)
+    size = len(group_names) * month_count
+    means = {role: group_means(keys, arrays.base_prices[role], size) for role in PRICE_ROLES}
+    dish_counts = np.bincount(keys, minlength=size)
+
+    trends: Dict[str, Dict[str, Any]] = {}
+    for key in np.flatnonzero(dish_counts):
+        group, month = divmod(int(key), month_count)
+        trend = {role: _round(means[role][0][key]) for role in PRICE_ROLES}
+        trend["dishes"] = int(dish_counts[key])
+        trends.setdefault(group_names[group], {})[_month_name(first_month + month)] = trend
+    return trends
+
+
+def label_shares(arrays: MenuArrays) -> Dict[str, Dict[str, Any]]:
+    """
+    :return: Share of vegan and vegetarian dishes for every canteen
+    """
+    size = len(arrays.canteen_ids)
+    dish_counts = np.bincount(arrays.canteen_codes, minlength=size)
+    vegan = np.bincount(arrays.canteen_codes, weights=(arrays.label_masks & VEGAN_BIT) != 0, minlength=size)
+    # vegan dishes are labeled as vegetarian, too
+    vegetarian_mask = (arrays.label_masks & (VEGETARIAN_BIT | VEGAN_BIT)) != 0
+    vegetarian = np.bincount(arrays.canteen_codes, weights=vegetarian_mask, minlength=size)
+    return {
+        canteen_id: {
+            "dishes": int(dish_counts[code]),
+            "vegan": _round(vegan[code] / dish_counts[code], 4),
+            "vegetarian": _round(vegetarian[code] / dish_counts[code], 4),
+        }
+        for code, canteen_id in enumerate(arrays.canteen_ids)
+        if dish_counts[code]
+    }
+
+
+def repetitions(arrays: MenuArrays, top: int = 20) -> Dict[str, Any]:
+    """
+    :return: How many dishes are served how often, the gaps between two servings of the same dish and the dishes
+             served most often
+    """
+    servings = np.bincount(arrays.dish_codes, minlength=len(arrays.dish_names))
+    distribution = np.bincount(servings)
+    # sort by dish and date, so consecutive servings of the same dish are next to each other
+    order = np.lexsort((arrays.dates, arrays.dish_codes))
+    dish_codes, dates = arrays.dish_codes[order], arrays.dates[order]
+    same_dish = dish_codes[1:] == dish_codes[:-1]
+    gaps = (dates[1:] - dates[:-1])[same_dish]
+    # a dish served in several canteens on the same day is not a repetition
+    gaps = gaps[gaps > 0]
+    most_served = np.argsort(-servings, kind="stable")[:top]
+    return {
+        "dishes": len(arrays.dish_names),
+        "servings": len(arrays),
+        "servings_per_dish": {str(count): int(dishes) for count, dishes in enumerate(distribution) if dishes},
+        "days_between_servings": {
+            "mean": _round(gaps.mean()) if len(gaps) else None,
+            "median": _round(float(np.median(gaps))) if len(gaps) else None,
+        },
+        "most_served": [
+            {"name": arrays.dish_names[code], "servings": int(servings[code])} for code in most_served if servings[code]
+        ],
+    }
+
+
+def compute_analytics(arrays: MenuArrays) -> Dict[str, Any]:
+    """
+    :return: Content of every analytics file by its filename
+    """
+    return {
+        "price_trends.json": price_trends(arrays, arrays.canteen_codes, arrays.canteen_ids),
+        "dish_type_price_trends.json": price_trends(arrays, arrays.dish_type_codes, arrays.dish_types),
+        "label_shares.json": label_shares(arrays),
+        "repetitions.json": repetitions(arrays),
+    }
+
+
+def write_analytics(arrays: MenuArrays, base_dir: str) -> List[str]:
+    """
+    Writes the analytics files to "<base_dir>/analytics".
+
+    :return: Paths of the written files
+    """
+    directory = os.path.join(base_dir, ANALYTICS_DIRECTORY)
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    paths = []
+    for filename, content in compute_analytics(arrays).items():
+        path = os.path.join(directory, filename)
+        with open(path, "wb") as outfile:
+            outfile.write(json_util.to_json_bytes(content))
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: analytics.py ARCHIVE_PATH OUTPUT_DIRECTORY")
+        sys.exit(1)
+    if not os.path.exists(sys.argv[1]):
+        raise FileNotFoundError(f"There is no such archive '{sys.argv[1]}'.")
+    with MenuArchive(sys.argv[1]) as menu_archive:
+        menu_arrays = MenuArrays.from_archive(menu_archive)
+    print(f"Wrote {len(write_analytics(menu_arrays, sys.argv[2]))} analytics files for {len(menu_arrays)} servings")
@@ -0,0 +1,251 @@
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from entities import Canteen, Dish, Label, Menu, Price, Prices, Week
+
+SCHEMA: Tuple[str, ...] = (
+    "CREATE TABLE IF NOT EXISTS runs ("
+    "run_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+    "canteen_id TEXT NOT NULL, "
+    "parsed_at INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS dishes ("
+    "dish_id TEXT PRIMARY KEY, "
+    "name TEXT NOT NULL, "
+    "dish_type TEXT NOT NULL, "
+    "prices TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS dish_labels ("
+    "dish_id TEXT NOT NULL REFERENCES dishes (dish_id), "
+    "label TEXT NOT NULL, "
+    "PRIMARY KEY (dish_id, label))",
+    "CREATE INDEX IF NOT EXISTS dish_labels_label ON dish_labels (label)",
+    # the run that parsed the menu of a canteen and day most recently
+    "CREATE TABLE IF NOT EXISTS menus ("
+    "canteen_id TEXT NOT NULL, "
+    "date TEXT NOT NULL, "
+    "last_run INTEGER NOT NULL REFERENCES runs (run_id), "
+    "PRIMARY KEY (canteen_id, date))",
+    "CREATE INDEX IF NOT EXISTS menus_date ON menus (date)",
+    "CREATE TABLE IF NOT EXISTS menu_entries ("
+    "canteen_id TEXT NOT NULL, "
+    "date TEXT NOT NULL, "
+    "dish_id TEXT NOT NULL REFERENCES dishes (dish_id), "
+    # a menu can list the same dish more than once, e.g. at two counters: 0 for the first time, 1 for the second one
+    "occurrence INTEGER NOT NULL, "
+    "position INTEGER NOT NULL, "
+    "first_run INTEGER NOT NULL REFERENCES runs (run_id), "
+    "last_run INTEGER NOT NULL REFERENCES runs (run_id), "
+    "PRIMARY KEY (canteen_id, date, dish_id, occurrence))",
+    "CREATE INDEX IF NOT EXISTS menu_entries_date ON menu_entries (date)",
+    "CREATE INDEX IF NOT EXISTS menu_entries_dish_id ON menu_entries (dish_id)",
+)
+
+
+def _price_from_json_obj(price: Optional[Dict[str, Any]]) -> Optional[Price]:
+    if price is None:
+        return None
+    return Price(price.get("base_price"), price.get("price_per_unit"), price.get("unit"))
+
+
+def dish_from_json_obj(dish: Dict[str, Any]) -> Dish:
+    """
+    Inverse of Dish.to_json_obj.
+    """
+    prices = dish.get("prices", {})
+    return Dish(
+        dish["name"],
+        Prices(
+            _price_from_json_obj(prices.get("students")),
+            _price_from_json_obj(prices.get("staff")),
+            _price_from_json_obj(prices.get("guests")),
+        ),
+        {Label[label] for label in dish.get("labels", [])},
+        dish["dish_type"],
+    )
+
+
+class MenuArchive:
+    """
+    Keeps the menus of every run in a single SQLite file, so past weeks stay available after they left the website.
+    Nothing is ever deleted: dishes are stored once per content id, and every dish on a menu remembers the first and
+    the last run it has been seen in. A day's menu is the one of the last run that parsed the day.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        # several canteens are parsed in parallel processes, so wait for locks instead of failing
+        self.connection = sqlite3.connect(path, timeout=60.0)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+
+    def add_menus(self, canteen: Canteen, menus: Dict[datetime.date, Menu]) -> int:
+        """
+        Appends the menus of one run.
+
+        :return: Id of the run
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (canteen_id, parsed_at) VALUES (?, ?)",
+                (canteen.canteen_id, time.time_ns()),
+            )
+            run_id = cursor.lastrowid
+            assert run_id is not None  # nosec: lastrowid is always set after an INSERT
+            for menu_date, menu in menus.items():
+                date = menu_date.isoformat()
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO menus (canteen_id, date, last_run) VALUES (?, ?, ?)",
+                    (canteen.canteen_id, date, run_id),
+                )
+                occurrences: Dict[str, int] = {}
+                for position, dish in enumerate(menu.dishes):
+                    dish_id = self.__add_dish(dish)
+                    occurrence = occurrences[dish_id] = occurrences.get(dish_id, -1) + 1
+                    self.connection.execute(
+                        "INSERT INTO menu_entries "
+                        "(canteen_id, date, dish_id, occurrence, position, first_run, last_run) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (canteen_id, date, dish_id, occurrence) "
+                        "DO UPDATE SET position = excluded.position, last_run = excluded.last_run",
+                        (canteen.canteen_id, date, dish_id, occurrence, position, run_id, run_id),
+                    )
+        return run_id
+
+    def __add_dish(self, dish: Dish) -> str:
+        dish_id: str = dish.content_id()
+        json_obj = dish.to_json_obj()
+        cursor = self.connection.execute(
+            "INSERT OR IGNORE INTO dishes (dish_id, name, dish_type, prices) VALUES (?, ?, ?, ?)",
+            (dish_id, dish.name, dish.dish_type, json.dumps(json_obj["prices"], ensure_ascii=False)),
+        )
+        if cursor.rowcount:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO dish_labels (dish_id, label) VALUES (?, ?)",
+                ((dish_id, label) for label in json_obj["labels"]),
+            )
+        return dish_id
+
+    def __get_dish(self, dish_id: str) -> Dish:
+        name, dish_type, prices = self.connection.execute(
+            "SELECT name, dish_type, prices FROM dishes WHERE dish_id = ?",
+            (dish_id,),
+        ).fetchone()
+        labels = [
+            label for (label,) in self.connection.execute("SELECT label FROM dish_labels WHERE dish_id = ?", (dish_id,))
+        ]
+        return dish_from_json_obj(
+            {"name": name, "prices": json.loads(prices), "labels": labels, "dish_type": dish_type},
+        )
+
+    def get_menus(
+        self,
+        canteen_id: str,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+    ) -> Dict[datetime.date, Menu]:
+        """
+        :param start: First date to include, None for no lower bound
+        :param end: Last date to include, None for no upper bound
+        :return: The menus as parsed most recently
+        """
+        rows = self.connection.execute(
+            "SELECT menu_entries.date, menu_entries.dish_id FROM menus "
+            "JOIN menu_entries ON menu_entries.canteen_id = menus.canteen_id AND menu_entries.date = menus.date "
+            "AND menu_entries.last_run = menus.last_run "
+            "WHERE menus.canteen_id = ? AND menus.date >= ? AND menus.date <= ? "
+            "ORDER BY menu_entries.date, menu_entries.position",
+            (canteen_id, (start or datetime.date.min).isoformat(), (end or datetime.date.max).isoformat()),
+        ).fetchall()
+        dishes: Dict[str, Dish] = {}
+        menus: Dict[datetime.date, Menu] = {}
+        for date, dish_id in rows:
+            menu_date = datetime.date.fromisoformat(date)
+            if menu_date not in menus:
+                menus[menu_date] = Menu(menu_date, [])
+            # dishes that are served on several days are only loaded once
+            if dish_id not in dishes:
+                dishes[dish_id] = self.__get_dish(dish_id)
+            menus[menu_date].dishes.append(dishes[dish_id])
+        return menus
+
+    def get_week(self, canteen_id: str, year: int, calendar_week: int) -> Optional[Week]:
+        monday = datetime.date.fromisocalendar(year, calendar_week, 1)
+        menus = self.get_menus(canteen_id, monday, monday + datetime.timedelta(days=6))
+        return Week.to_weeks(menus).get(calendar_week)
+
+    def get_weeks(self, canteen_id: str) -> List[Week]:
+        # Week.to_weeks groups by calendar week only, so every year gets grouped separately
+        menus = self.get_menus(canteen_id)
+        weeks: List[Week] = []
+        for year in sorted({menu_date.isocalendar()[0] for menu_date in menus}):
+            year_menus = {menu_date: menu for menu_date, menu in menus.items() if menu_date.isocalendar()[0] == year}
+            weeks += Week.to_weeks(year_menus).values()
+        return weeks
+
+    def find_dishes(
+        self,
+        label: Label,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+    ) -> List[Tuple[str, datetime.date, str]]:
+        """
+        :return: Canteen id, date and name of all dishes ever seen with the given label
+        """
+        rows = self.connection.execute(
+            "SELECT menu_entries.canteen_id, menu_entries.date, dishes.name FROM dish_labels "
+            "JOIN menu_entries ON menu_entries.dish_id = dish_labels.dish_id "
+            "JOIN dishes ON dishes.dish_id = dish_labels.dish_id "
+            "WHERE dish_labels.label = ? AND menu_entries.date >= ? AND menu_entries.date <= ? "
+            "ORDER BY menu_entries.date, menu_entries.canteen_id, menu_entries.position",
+            (label.name, (start or datetime.date.min).isoformat(), (end or datetime.date.max).isoformat()),
+        )
+        return [(canteen_id, datetime.date.fromisoformat(date), name) for canteen_id, date, name in rows]
+
+    def canteen_ids(self) -> List[str]:
+        return [canteen_id for (canteen_id,) in self.connection.execute("SELECT DISTINCT canteen_id FROM menus")]
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "MenuArchive":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+def regenerate(archive: MenuArchive, out_dir: str) -> int:
+    """
+    Writes "<canteen>/<year>/<week>.json" for every week in the archive, the same way "main.py --jsonify" does.
+
+    :return: Number of written weeks
+    """
+    # imported here, as main imports this module
+    import main  # pylint: disable=import-outside-toplevel
+
+    count = 0
+    for canteen_id in archive.canteen_ids():
+        canteen = Canteen.get_canteen_by_str(canteen_id)
+        weeks = archive.get_weeks(canteen_id)
+        for week in weeks:
+            main.jsonify({week.calendar_week: week}, os.path.join(out_dir, canteen_id), canteen, False)
+        count += len(weeks)
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: archive.py ARCHIVE_PATH OUTPUT_DIRECTORY")
+        sys.exit(1)
+    if not os.path.exists(sys.argv[1]):
+        raise FileNotFoundError(f"There is no such archive '{sys.argv[1]}'.")
+    with MenuArchive(sys.argv[1]) as menu_archive:
+        print(f"Regenerated {regenerate(menu_archive, sys.argv[2])} weeks")
@@ -0,0 +1,79 @@
+import os.path
+from typing import Any, Dict, Optional
+
+import msgpack
+
+from entities import Label
+from utils import file_util
+
+BINARY_EXTENSION: str = ".msgpack"
+
+LABEL_INDEXES: Dict[str, int] = {label.name: index for index, label in enumerate(Label)}
+"""
+Labels are encoded by their position in the Label enum, which is the position in "enums/labels.json".
+"""
+
+
+def to_fixed_point(price: Optional[float]) -> Optional[int]:
+    # prices are stored in cents
+    if isinstance(price, (int, float)):
+        return round(price * 100)
+    return price
+
+
+def price_to_binary_obj(price: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if price is None:
+        return None
+    return {
+        "base_price": to_fixed_point(price.get("base_price")),
+        "price_per_unit": to_fixed_point(price.get("price_per_unit")),
+        "unit": price.get("unit"),
+    }
+
+
+def to_binary_obj(obj: Any) -> Any:
+    """
+    Recursively converts a JSON object of the API into its binary representation.
+    Labels get replaced by their index and prices by fixed-point integers, everything else stays the same.
+    """
+    if isinstance(obj, list):
+        return [to_binary_obj(item) for item in obj]
+    if not isinstance(obj, dict):
+        return obj
+    binary_obj: Dict[str, Any] = {}
+    for key, value in obj.items():
+        if key == "labels" and isinstance(value, list):
+            binary_value: Any = [LABEL_INDEXES[label] for label in value]
+        elif key == "prices" and isinstance(value, dict):
+            binary_value = {role: price_to_binary_obj(price) for role, price in value.items()}
+        else:
+            binary_value = to_binary_obj(value)
+        binary_obj[key] = binary_value
+    return binary_obj
+
+
+def convert_file(json_path: str) -> str:
+    binary_path = os.path.splitext(json_path)[0] + BINARY_EXTENSION
+    with open(binary_path, "wb") as outfile:
+        outfile.write(msgpack.packb(to_binary_obj(file_util.load_json(json_path))))
+    return binary_path
+
+
+def convert_directory(base_dir: str) -> int:
+    """
+    Writes a binary twin next to every JSON file found in the given directory tree.
+
+    :return: Number of converted files
+    """
+    count = 0
+    for directory, _, filenames in os.walk(base_dir):
+        for filename in filenames:
+            if filename.endswith(".json"):
+                convert_file(os.path.join(directory, filename))
+                count += 1
+    return count
+
+
+if __name__ == "__main__":
+    base_directory = file_util.get_base_directory()
+    print(f"Converted {convert_directory(base_directory)} JSON files to MessagePack")
@@ -0,0 +1,151 @@
+import datetime
+import os.path
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import file_util, json_util
+
+CHANGES_DIRECTORY: str = "changes"
+INDEX_FILENAME: str = "latest.json"
+MAX_INDEX_ENTRIES: int = 100
+"""
+Number of runs listed in "changes/latest.json". Clients that have been offline for longer need to fetch "all.json".
+"""
+
+DayChanges = Dict[str, List[Any]]
+
+
+def _days(all_json: Dict[str, Any]) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+    days: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for canteen in all_json.get("canteens", []):
+        for week in canteen.get("weeks", []):
+            for day in week.get("days", []):
+                days[(canteen["canteen_id"], day["date"])] = day.get("dishes", [])
+    return days
+
+
+def diff_day(previous: List[Dict[str, Any]], current: List[Dict[str, Any]]) -> DayChanges:
+    """
+    Dishes are matched by their name. A matched dish with other prices, labels or dish type is modified.
+    """
+    unmatched: Dict[str, List[Dict[str, Any]]] = {}
+    for dish in previous:
+        unmatched.setdefault(dish["name"], []).append(dish)
+    added = []
+    modified = []
+    for dish in current:
+        candidates = unmatched.get(dish["name"])
+        if not candidates:
+            added.append(dish)
+            continue
+        # an unchanged candidate is preferred, if the same name is on the menu several times
+        before = dish if dish in candidates else candidates[0]
+        candidates.remove(before)
+        if before != dish:
+            modified.append({"before": before, "after": dish})
+    removed = [dish for dishes in unmatched.values() for dish in dishes]
+    return {"added": added, "removed": removed, "modified": modified}
+
+
+def diff_all(
+    previous_all: Dict[str, Any],
+    current_all: Dict[str, Any],
+    today: datetime.date,
+) -> Dict[str, Dict[str, DayChanges]]:
+    """
+    Canteens missing in current_all, e.g. because they failed to parse, are not compared, see carry_forward.
+
+    :param today: Days before today that are missing in current_all have just expired and are not reported
+    :return: The changes per canteen and date, days without changes are left out
+    """
+    previous_days = _days(previous_all)
+    current_days = _days(current_all)
+    current_canteens = {canteen["canteen_id"] for canteen in current_all.get("canteens", [])}
+    changes: Dict[str, Dict[str, DayChanges]] = {}
+    for canteen_id, date in sorted(set(previous_days) | set(current_days)):
+        if canteen_id not in current_canteens:
+            continue
+        if (canteen_id, date) not in current_days and date < today.isoformat():
+            continue
+        day_changes = diff_day(previous_days.get((canteen_id, date), []), current_days.get((canteen_id, date), []))
+        if any(day_changes.values()):
+            changes.setdefault(canteen_id, {})[date] = day_changes
+    return changes
+
+
+def carry_forward(previous_all: Dict[str, Any], current_all: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    :return: current_all with the canteens of previous_all that are missing in it, so the next run compares them with
+             their last successfully parsed menus instead of reporting all of their dishes as added
+    """
+    current_canteens = {canteen["canteen_id"] for canteen in current_all.get("canteens", [])}
+    missing = [canteen for canteen in previous_all.get("canteens", []) if canteen["canteen_id"] not in current_canteens]
+    return {**current_all, "canteens": current_all.get("canteens", []) + missing}
+
+
+def count_changes(changes: Dict[str, Dict[str, DayChanges]]) -> int:
+    return sum(len(items) for days in changes.values() for day in days.values() for items in day.values())
+
+
+def write_changes(base_dir: str, state_dir: str, now: Optional[datetime.datetime] = None) -> Optional[str]:
+    """
+    Compares "all.json" in base_dir with the one of the previous run, which is kept in state_dir.
+    Writes "changes/<timestamp>.json" if anything changed and always "changes/latest.json", the index of the most recent
+    change files. Every change file points to the change file written before it.
+
+    :return: Path of the written change file
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    timestamp = now.strftime("%Y%m%dT%H%M%SZ")
+    all_path = os.path.join(base_dir, "all.json")
+    previous_path = os.path.join(state_dir, "all.json")
+    index_state_path = os.path.join(state_dir, INDEX_FILENAME)
+    current_all: Dict[str, Any] = file_util.load_json(all_path)  # type: ignore
+    index: Dict[str, Any] = {"changes": []}
+    if os.path.exists(index_state_path):
+        index = file_util.load_json(index_state_path)  # type: ignore
+
+    changes_dir = os.path.join(base_dir, CHANGES_DIRECTORY)
+    if not os.path.exists(changes_dir):
+        os.makedirs(changes_dir)
+    change_path = None
+    state_all = current_all
+    # there is nothing to compare with in the first run
+    if os.path.exists(previous_path):
+        previous_all: Dict[str, Any] = file_util.load_json(previous_path)  # type: ignore
+        changes = diff_all(previous_all, current_all, now.date())
+        state_all = carry_forward(previous_all, current_all)
+        if changes:
+            change_path = os.path.join(changes_dir, f"{timestamp}.json")
+            previous_change = index["changes"][0]["timestamp"] if index["changes"] else None
+            _write(change_path, {"timestamp": timestamp, "previous": previous_change, "canteens": changes})
+            index["changes"] = [
+                {
+                    "timestamp": timestamp,
+                    "file": f"{CHANGES_DIRECTORY}/{timestamp}.json",
+                    "dishes": count_changes(changes),
+                },
+            ] + index["changes"][: MAX_INDEX_ENTRIES - 1]
+    index["latest"] = timestamp
+    _write(os.path.join(changes_dir, INDEX_FILENAME), index)
+
+    if not os.path.exists(state_dir):
+        os.makedirs(state_dir)
+    _write(index_state_path, index)
+    _write(previous_path, state_all)
+    return change_path
+
+
+def _write(path: str, obj: object) -> None:
+    with open(path, "wb") as outfile:
+        outfile.write(json_util.to_json_bytes(obj))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: changes.py OUTPUT_DIRECTORY STATE_DIRECTORY")
+        sys.exit(1)
+    if not os.path.exists(sys.argv[1]):
+        raise FileNotFoundError(f"There is no such directory '{sys.argv[1]}'.")
+    written = write_changes(sys.argv[1], sys.argv[2])
+    print(f"Wrote {written}" if written else "No changes since the previous run")
@@ -36,9 +36,41 @@ def parse_cli_args():
         action="store_true",
         help='creates a "combined.json" file containing all dishes for the canteen specified',
     )
+    parseGroup.add_argument(
+        "--all-languages",
+        action="store_true",
+        help="creates the JSON output for every supported language from a single parse. The output for a language "
+        "is placed in the language's subfolder next to the jsonify PATH, e.g. 'dist/en/mensa-garching' for "
+        "'dist/mensa-garching'. Needs a DeepL API-Key in the environment variable DEEPL_API_KEY_EAT_API",
+    )
+    parseGroup.add_argument(
+        "--archive",
+        help="appends the parsed menus to the SQLite archive at PATH, which keeps all menus ever parsed",
+        metavar="PATH",
+    )
+    parseGroup.add_argument(
+        "--metrics",
+        help="writes the time spent in every stage of the run and counters like the fetched bytes to "
+        "'<canteen>.json' and the Prometheus textfile '<canteen>.prom' in the directory PATH",
+        metavar="PATH",
+    )
+    parseGroup.add_argument(
+        "--report",
+        help="writes the status of the run, its duration, the latency of the requests, the number of parsed days and "
+        "dishes, skipped dates and errors to '<canteen>.json' in the directory PATH, see 'src/run_report.py'",
+        metavar="PATH",
+    )
+    parseGroup.add_argument(
+        "--profile",
+        help="profiles the run and writes the cProfile statistics '<canteen>.pstats', the sampled call stacks "
+        "'<canteen>.collapsed' for flame graphs and the top allocation sites of every stage "
+        "'<canteen>.allocations.json' to the directory PATH",
+        metavar="PATH",
+    )
     parseGroup.add_argument(
         "--openmensa",
-        help="directory for OpenMensa XML output (date parameter will be ignored if this argument is used)",
+        help="directory for OpenMensa XML output, can be combined with --jsonify to create both from the same parse "
+        "(date parameter will be ignored if this argument is used)",
         metavar="PATH",
     )
     group.add_argument(
@@ -46,9 +78,50 @@ def parse_cli_args():
         action="store_true",
         help="prints all available canteens formated as JSON",
     )
+    group.add_argument(
+        "--languages",
+        action="store_true",
+        help="prints all supported languages formated as JSON",
+    )
+    group.add_argument(
+        "--serve",
+        action="store_true",
+        help="parses all canteens and serves the API from memory. The data gets refreshed periodically. "
+        "Combined with --all-languages, the translated output is served below the language's base_url, e.g. '/en'",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="the address to serve the API on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8080, help="the port to serve the API on (default: %(default)s)")
+    parser.add_argument(
+        "--registry",
+        metavar="PATH",
+        help="JSON file in the format of 'enums/canteens.json' with the canteens '/nearest' searches in when serving "
+        "(default: all canteens of the API)",
+    )
+    parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=3600.0,
+        metavar="SECONDS",
+        help="how often the served data gets refreshed (default: %(default)s)",
+    )
+    transport = parser.add_mutually_exclusive_group()
+    transport.add_argument(
+        "--record",
+        metavar="DIR",
+        help="stores every response the parsers fetch in DIR, so the run can be replayed with --replay",
+    )
+    transport.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="answers every request of the parsers with the responses recorded in DIR instead of fetching them. DIR "
+        "can also be the URL of 'src/replay_server.py', e.g. 'http://127.0.0.1:8081'",
+    )
     parser.add_argument(
         "--language",
         help="The language to translate the dish titles to, "
         "needs an DeepL API-Key in the environment variable DEEPL_API_KEY_EAT_API",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.all_languages and args.language is not None:
+        parser.error("argument --language: not allowed with argument --all-languages")
+    return args
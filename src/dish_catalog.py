@@ -0,0 +1,72 @@
+import os.path
+from typing import Any, Dict, List, Tuple
+
+from utils import file_util, json_util
+
+CATALOG_FILENAME: str = "dishes.json"
+COMPACT_FILENAME: str = "all_compact.json"
+CANTEEN_COMPACT_FILENAME: str = "compact.json"
+
+
+def dish_id(dish_json: Dict[str, Any]) -> str:
+    # equal to Dish.content_id() of the dish the JSON object got created from
+    id_: str = json_util.content_hash(dish_json)
+    return id_
+
+
+def compact_canteen(canteen_json: Dict[str, Any], catalog: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Replaces the dishes of a "combined.json" object by their ids and collects the dishes in the catalog.
+    """
+    weeks = []
+    for week in canteen_json.get("weeks", []):
+        days = []
+        for day in week.get("days", []):
+            dish_ids: List[str] = []
+            for dish in day.get("dishes", []):
+                id_ = dish_id(dish)
+                catalog.setdefault(id_, dish)
+                dish_ids.append(id_)
+            days.append({"date": day.get("date"), "dishes": dish_ids})
+        weeks.append({"number": week.get("number"), "year": week.get("year"), "days": days})
+    return {"version": canteen_json.get("version"), "canteen_id": canteen_json.get("canteen_id"), "weeks": weeks}
+
+
+def build_catalog(all_json: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    :param all_json: Content of "all.json"
+    :return: The deduplicated dish catalog and the compact menus of all canteens
+    """
+    catalog: Dict[str, Dict[str, Any]] = {}
+    compact_canteens = [compact_canteen(canteen_json, catalog) for canteen_json in all_json.get("canteens", [])]
+    return catalog, compact_canteens
+
+
+def write_catalog(base_dir: str) -> int:
+    """
+    Writes the dish catalog, "all_compact.json" and a "combined/compact.json" for every canteen.
+
+    :return: Number of unique dishes
+    """
+    all_json = file_util.load_json(os.path.join(base_dir, "all.json"))
+    if not isinstance(all_json, dict):
+        raise ValueError(f"Unexpected content of 'all.json' in '{base_dir}'.")
+    catalog, compact_canteens = build_catalog(all_json)
+
+    _write(os.path.join(base_dir, CATALOG_FILENAME), catalog)
+    _write(os.path.join(base_dir, COMPACT_FILENAME), {"canteens": compact_canteens})
+    for compact in compact_canteens:
+        combined_dir = os.path.join(base_dir, str(compact["canteen_id"]), "combined")
+        if os.path.isdir(combined_dir):
+            _write(os.path.join(combined_dir, CANTEEN_COMPACT_FILENAME), compact)
+    return len(catalog)
+
+
+def _write(path: str, obj: object) -> None:
+    with open(path, "wb") as outfile:
+        outfile.write(json_util.to_json_bytes(obj))
+
+
+if __name__ == "__main__":
+    base_directory = file_util.get_base_directory()
+    print(f"Wrote catalog with {write_catalog(base_directory)} unique dishes")
@@ -4,8 +4,9 @@
 from __future__ import annotations
 
 import datetime
+from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 from utils import json_util
 
@@ -139,6 +140,18 @@ class OpenHours:
             }
         return None
 
+    def is_open(self, at: datetime.datetime) -> bool:
+        # only weekdays have opening hours, the end is exclusive
+        day = (self.mon, self.tue, self.wed, self.thu, self.fri, None, None)[at.weekday()]
+        if not day:
+            return False
+        return day[0] <= at.strftime("%H:%M") < day[1]
+
+    @staticmethod
+    def from_json_obj(json_obj: Dict[str, Optional[Dict[str, str]]]) -> OpenHours:
+        days = [json_obj.get(day) for day in ("mon", "tue", "wed", "thu", "fri")]
+        return OpenHours(*((day["start"], day["end"]) if day else None for day in days))
+
     def to_json_obj(self):
         return {
             "mon": self.day_to_obj(self.mon),
@@ -392,13 +405,15 @@ class Canteen(ApiRepresentable, Enum):
 
 
 class Language(ApiRepresentable, Enum):
-    def __init__(self, base_url: str, label: str, flag: str):
+    def __init__(self, base_url: str, label: str, flag: str, deepl_code: str):
         self.base_url = base_url
         self.label = label
         self.flag = flag
+        # target language for translating the (german) dish titles with DeepL
+        self.deepl_code = deepl_code
 
-    DE = "", "Deutsch", "🇩🇪"
-    EN = "en/", "English", "🏴󠁧󠁢󠁥󠁮󠁧󠁿"
+    DE = "", "Deutsch", "🇩🇪", "DE"
+    EN = "en/", "English", "🏴󠁧󠁢󠁥󠁮󠁧󠁿", "EN-US"
 
     def to_api_representation(self) -> Dict[str, object]:
         return {
@@ -521,7 +536,58 @@ class Label(ApiRepresentable, Enum):
         }
 
 
-class Dish:
+class JsonFragmentCache(ABC):
+    """
+    Caches the serialized JSON representation (UTF-8 encoded bytes) of an entity.
+    Documents that contain the same entity several times (e.g. the week files and "combined.json") splice the cached
+    fragment instead of encoding the entity again.
+    Entities are treated as immutable once they got serialized: reassigning a public attribute drops the cached
+    fragment, in-place modifications of nested prices or labels are not tracked.
+    """
+
+    _json_fragment: Optional[bytes] = None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            super().__setattr__("_json_fragment", None)
+
+    def to_json_fragment(self) -> bytes:
+        if self._json_fragment is None or not self._is_json_fragment_valid():
+            self._json_fragment = self._build_json_fragment()
+        return self._json_fragment
+
+    def invalidate_json_fragment(self) -> None:
+        """
+        Drops the cached fragment, e.g. after modifying nested prices or labels in place.
+        Containing menus and weeks build their fragments again as well, as they check the fragments of their children.
+        """
+        self._json_fragment = None
+
+    def _is_json_fragment_valid(self) -> bool:
+        return True
+
+    @abstractmethod
+    def _build_json_fragment(self) -> bytes:
+        pass
+
+
+def _fragment_snapshot(items: Sequence[JsonFragmentCache]) -> Tuple[Tuple[JsonFragmentCache, bytes], ...]:
+    return tuple((item, item.to_json_fragment()) for item in items)
+
+
+def _is_fragment_snapshot_valid(
+    items: Sequence[JsonFragmentCache],
+    snapshot: Tuple[Tuple[JsonFragmentCache, bytes], ...],
+) -> bool:
+    # compare identities only: a child that got modified has built a new fragment in the meantime
+    return len(items) == len(snapshot) and all(
+        item is snapshot_item and item.to_json_fragment() is snapshot_fragment
+        for item, (snapshot_item, snapshot_fragment) in zip(items, snapshot)
+    )
+
+
+class Dish(JsonFragmentCache):
     name: str
     prices: Prices
     labels: Set[Label]
@@ -560,18 +626,28 @@ class Dish:
             "dish_type": self.dish_type,
         }
 
+    def _build_json_fragment(self) -> bytes:
+        fragment: bytes = json_util.to_json_bytes(self.to_json_obj())
+        return fragment
+
+    def content_id(self) -> str:
+        # stable across canteens, weeks and runs, as it is derived from name, prices, labels and dish type only
+        content_hash: str = json_util.content_hash(self.to_json_obj())
+        return content_hash
+
     def __hash__(self) -> int:
         # http://stackoverflow.com/questions/4005318/how-to-implement-a-good-hash-function-in-python
         return (hash(self.name) << 1) ^ hash(self.prices) ^ hash(frozenset(self.labels)) ^ hash(self.dish_type)
 
 
-class Menu:
+class Menu(JsonFragmentCache):
     menu_date: datetime.date
     dishes: List[Dish]
 
     def __init__(self, menu_date: datetime.date, dishes: List[Dish]):
         self.menu_date = menu_date
         self.dishes = dishes
+        self._fragment_dishes: Tuple[Tuple[JsonFragmentCache, bytes], ...] = ()
 
     def __repr__(self):
         return str(self.menu_date) + ": " + str(self.dishes)
@@ -594,8 +670,25 @@ class Menu:
 
         self.dishes = unique
 
+    def to_json_obj(self):
+        return {"date": str(self.menu_date), "dishes": [dish.to_json_obj() for dish in self.dishes]}
+
+    def _is_json_fragment_valid(self) -> bool:
+        # dishes might have been modified or appended in place
+        return _is_fragment_snapshot_valid(self.dishes, self._fragment_dishes)
+
+    def _build_json_fragment(self) -> bytes:
+        self._fragment_dishes = _fragment_snapshot(self.dishes)
+        json_fragment: bytes = json_util.splice_json_object(
+            {
+                "date": json_util.to_json_bytes(str(self.menu_date)),
+                "dishes": json_util.splice_json_array(fragment for _, fragment in self._fragment_dishes),
+            },
+        )
+        return json_fragment
 
-class Week:
+
+class Week(JsonFragmentCache):
     calendar_week: int
     year: int
     days: List[Menu]
@@ -604,6 +697,7 @@ class Week:
         self.calendar_week = calendar_week
         self.year = year
         self.days = days
+        self._fragment_days: Tuple[Tuple[JsonFragmentCache, bytes], ...] = ()
 
     def __repr__(self):
         week_str = f"Week {self.year}-{self.calendar_week}"
@@ -615,12 +709,24 @@ class Week:
         return {
             "number": self.calendar_week,
             "year": self.year,
-            "days": [
-                {"date": str(menu.menu_date), "dishes": [dish.to_json_obj() for dish in menu.dishes]}
-                for menu in self.days
-            ],
+            "days": [menu.to_json_obj() for menu in self.days],
         }
 
+    def _is_json_fragment_valid(self) -> bool:
+        # days get appended in place while converting menus to weeks
+        return _is_fragment_snapshot_valid(self.days, self._fragment_days)
+
+    def _build_json_fragment(self) -> bytes:
+        self._fragment_days = _fragment_snapshot(self.days)
+        json_fragment: bytes = json_util.splice_json_object(
+            {
+                "number": json_util.to_json_bytes(self.calendar_week),
+                "year": json_util.to_json_bytes(self.year),
+                "days": json_util.splice_json_array(fragment for _, fragment in self._fragment_days),
+            },
+        )
+        return json_fragment
+
     @staticmethod
     def to_weeks(menus: Dict[datetime.date, Menu]) -> Dict[int, Week]:
         weeks: Dict[int, Week] = {}
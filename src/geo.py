@@ -0,0 +1,183 @@
+import datetime
+import heapq
+import math
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from entities import Canteen, Label, OpenHours
+from query import MenuIndex
+
+EARTH_RADIUS_KM: float = 6371.0088
+
+Point = Tuple[float, float, float]
+
+
+class CanteenSite(NamedTuple):
+    canteen_id: str
+    name: str
+    address: str
+    latitude: float
+    longitude: float
+    open_hours: OpenHours
+
+    def to_json_obj(self):
+        return {
+            "canteen_id": self.canteen_id,
+            "name": self.name,
+            "location": {"address": self.address, "latitude": self.latitude, "longitude": self.longitude},
+            "open_hours": self.open_hours.to_json_obj(),
+        }
+
+
+def load_registry(canteens_json: Iterable[Dict[str, Any]]) -> List[CanteenSite]:
+    """
+    :param canteens_json: Canteens in the format of "enums/canteens.json", which may list any number of canteens
+    """
+    return [
+        CanteenSite(
+            canteen["canteen_id"],
+            canteen["name"],
+            canteen["location"]["address"],
+            float(canteen["location"]["latitude"]),
+            float(canteen["location"]["longitude"]),
+            OpenHours.from_json_obj(canteen.get("open_hours") or {}),
+        )
+        for canteen in canteens_json
+    ]
+
+
+def get_default_registry() -> List[CanteenSite]:
+    return load_registry(canteen.to_api_representation() for canteen in Canteen)
+
+
+def to_point(latitude: float, longitude: float) -> Point:
+    """
+    Position on the unit sphere. The straight-line distance between two points grows with their great-circle distance,
+    so the nearest points in space are the nearest on earth.
+    """
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)
+
+
+def chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class _Node(NamedTuple):
+    site: int
+    axis: int
+    left: Optional["_Node"]
+    right: Optional["_Node"]
+    # bounding box of all points in the subtree
+    lower: Point
+    upper: Point
+
+
+class KdTree:
+    """
+    3-dimensional k-d tree over the canteen positions on the unit sphere.
+    """
+
+    def __init__(self, points: List[Point]):
+        self.points = points
+        self.root = self.__build(list(range(len(points))), 0)
+
+    def __build(self, numbers: List[int], depth: int) -> Optional[_Node]:
+        if not numbers:
+            return None
+        axis = depth % 3
+        numbers.sort(key=lambda number: self.points[number][axis])
+        median = len(numbers) // 2
+        above_median = median + 1
+        lower = tuple(min(self.points[number][i] for number in numbers) for i in range(3))
+        upper = tuple(max(self.points[number][i] for number in numbers) for i in range(3))
+        return _Node(
+            numbers[median],
+            axis,
+            self.__build(numbers[:median], depth + 1),
+            self.__build(numbers[above_median:], depth + 1),
+            lower,  # type: ignore
+            upper,  # type: ignore
+        )
+
+    @staticmethod
+    def __box_distance(point: Point, node: _Node) -> float:
+        return math.sqrt(
+            sum(max(low - value, 0.0, value - high) ** 2 for value, low, high in zip(point, node.lower, node.upper)),
+        )
+
+    def nearest(self, point: Point) -> Iterator[Tuple[float, int]]:
+        """
+        Yields the numbers of all points by increasing distance, so a search can stop as soon as it has found enough.
+        Subtrees are only visited once they might contain the next nearest point.
+        """
+        # entries are (distance, tie breaker, is point, node or point number)
+        queue: List[Tuple[float, int, bool, Any]] = []
+        counter = 0
+        if self.root is not None:
+            queue.append((0.0, counter, False, self.root))
+        while queue:
+            distance, _, is_point, item = heapq.heappop(queue)
+            if is_point:
+                yield distance, item
+                continue
+            node: _Node = item
+            counter += 1
+            heapq.heappush(queue, (math.dist(point, self.points[node.site]), counter, True, node.site))
+            for child in (node.left, node.right):
+                if child is not None:
+                    counter += 1
+                    heapq.heappush(queue, (self.__box_distance(point, child), counter, False, child))
+
+
+class CanteenLocator:
+    """
+    Finds the nearest canteens that fulfill a condition, e.g. being open at a certain time.
+    """
+
+    def __init__(self, sites: List[CanteenSite]):
+        self.sites = sites
+        self.tree = KdTree([to_point(site.latitude, site.longitude) for site in sites])
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int = 1,
+        condition: Optional[Callable[[CanteenSite], bool]] = None,
+    ) -> List[Tuple[CanteenSite, float]]:
+        """
+        :return: Up to k canteens that fulfill the condition and their distance in km, nearest first
+        """
+        results: List[Tuple[CanteenSite, float]] = []
+        if k <= 0:
+            return results
+        for chord, number in self.tree.nearest(to_point(latitude, longitude)):
+            site = self.sites[number]
+            if condition is None or condition(site):
+                results.append((site, chord_to_km(chord)))
+                if len(results) == k:
+                    break
+        return results
+
+    def nearest_open(
+        self,
+        latitude: float,
+        longitude: float,
+        at: datetime.datetime,
+        k: int = 1,
+        index: Optional[MenuIndex] = None,
+        labels: Iterable[Label] = (),
+    ) -> List[Tuple[CanteenSite, float]]:
+        """
+        :param index: If given, only canteens that serve a dish with all the labels on the day of at are returned
+        :return: Up to k canteens that are open at the given time and their distance in km, nearest first
+        """
+        serving: Optional[Set[str]] = None
+        if index is not None:
+            day = at.date()
+            serving = {entry.canteen_id for entry in index.query(start=day, end=day, include_labels=labels)}
+
+        def condition(site: CanteenSite) -> bool:
+            return site.open_hours.is_open(at) and (serving is None or site.canteen_id in serving)
+
+        return self.nearest(latitude, longitude, k, condition)
@@ -1,14 +1,20 @@
 # -*- coding: utf-8 -*-
-import json
+from __future__ import annotations
+
+import argparse
+import copy
+import datetime
 import os
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import cli
-import enum_json_creator
-import menu_parser
-from entities import Canteen, Week
-from openmensa import openmensa
-from utils import util
+from entities import Canteen, Language, Menu, Week
+from utils import json_util, metrics
+
+# every command imports only the modules it needs, e.g. "--canteens" neither needs the parsers nor DeepL
+if TYPE_CHECKING:
+    import menu_parser
+    import query
 
 JSON_VERSION: str = "2.1"
 """
@@ -18,6 +24,8 @@ Should be incremented as soon as the JSON output format changed in any way, shap
 
 
 def get_menu_parsing_strategy(canteen: Canteen) -> Optional[menu_parser.MenuParser]:
+    import menu_parser  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
     parsers = {
         menu_parser.StudentenwerkMenuParser,
         menu_parser.FMIBistroMenuParser,
@@ -32,62 +40,211 @@ def get_menu_parsing_strategy(canteen: Canteen) -> Optional[menu_parser.MenuPars
     return None
 
 
-def jsonify(weeks: Dict[int, Week], directory: str, canteen: Canteen, combine_dishes: bool) -> None:
+def get_json_outputs(weeks: Dict[int, Week], canteen: Canteen, combine_dishes: bool) -> Dict[str, bytes]:
+    """
+    Serializes the weeks of a canteen.
+
+    :return: Mapping from paths relative to the canteen's directory to the serialized JSON, e.g. "2021/37.json" or
+             "days/2021-09-13.json"
+    """
+    outputs: Dict[str, bytes] = {}
+    # the serialized version is the same for every file
+    version_json = json_util.to_json_bytes(JSON_VERSION)
+    canteen_id_json = json_util.to_json_bytes(canteen.canteen_id)
     # iterate through weeks
     for calendar_week in weeks:
         # get Week object
         week = weeks[calendar_week]
-        # get year of calendar week
-        year = week.year
-
-        # create dir: <year>/
-        json_dir = f"{str(directory)}/{str(year)}"
-        if not os.path.exists(json_dir):
-            os.makedirs(json_dir)
-
-        # convert Week object to JSON
-        week_json = week.to_json_obj()
-        if week_json is not None:
-            week_json["version"] = JSON_VERSION
-        # write JSON to file: <year>/<calendar_week>.json
-        with open(f"{str(json_dir)}/{str(calendar_week).zfill(2)}.json", "w", encoding="utf-8") as outfile:
-            json.dump(week_json, outfile, separators=(",", ":"), ensure_ascii=False)
+        # convert Week object to JSON; the fragment is cached and spliced into "combined.json" again later on
+        week_json = json_util.extend_json_object(week.to_json_fragment(), {"version": version_json})
+        # <year>/<calendar_week>.json
+        outputs[f"{str(week.year)}/{str(calendar_week).zfill(2)}.json"] = week_json
+        # days/<date>.json, the cached fragments of the days are spliced as well
+        for menu in week.days:
+            outputs[f"days/{menu.menu_date.isoformat()}.json"] = json_util.extend_json_object(
+                menu.to_json_fragment(),
+                {"canteen_id": canteen_id_json, "version": version_json},
+            )
 
     # check if combine parameter got set
     if not combine_dishes:
-        return
+        return outputs
     # the name of the output directory and file
     combined_df_name = "combined"
 
-    # create directory for combined output
-    json_dir = f"{str(directory)}/{combined_df_name}"
-    if not os.path.exists(json_dir):
-        os.makedirs(f"{str(directory)}/{combined_df_name}")
-
-    # convert all weeks to one JSON object
-    weeks_json_all = json.dumps(
+    # splice all weeks into one JSON object
+    outputs[f"{combined_df_name}/{combined_df_name}.json"] = json_util.splice_json_object(
         {
-            "version": JSON_VERSION,
-            "canteen_id": canteen.canteen_id,
-            "weeks": [weeks[calendar_week].to_json_obj() for calendar_week in weeks],
+            "version": version_json,
+            "canteen_id": canteen_id_json,
+            "weeks": json_util.splice_json_array(weeks[calendar_week].to_json_fragment() for calendar_week in weeks),
         },
-        ensure_ascii=False,
-        separators=(",", ":"),
     )
+    return outputs
 
-    # write JSON object to file
-    with open(f"{str(json_dir)}/{combined_df_name}.json", "w", encoding="utf-8") as outfile:
-        json.dump(json.loads(weeks_json_all), outfile, separators=(",", ":"), ensure_ascii=False)
+
+def jsonify(weeks: Dict[int, Week], directory: str, canteen: Canteen, combine_dishes: bool) -> None:
+    for path, content in get_json_outputs(weeks, canteen, combine_dishes).items():
+        # create dir, e.g. <year>/
+        json_dir = os.path.dirname(os.path.join(str(directory), path))
+        if not os.path.exists(json_dir):
+            os.makedirs(json_dir)
+        # write JSON to file, e.g. <year>/<calendar_week>.json
+        with open(os.path.join(str(directory), path), "wb") as outfile:
+            outfile.write(content)
+
+
+def get_language_directory(directory: str, language: Language) -> str:
+    """
+    Places the output of a language next to the given directory according to the base_url of the language,
+    e.g. "dist/en/mensa-garching" for "dist/mensa-garching".
+    """
+    if not language.base_url:
+        return directory
+    parent, name = os.path.split(os.path.normpath(directory))
+    return os.path.join(parent, language.base_url, name)
+
+
+def translate_to_all_languages(
+    menus: Dict[datetime.date, Menu],
+    languages: Iterable[Language] = Language,
+) -> Iterator[Tuple[Language, Dict[datetime.date, Menu]]]:
+    """
+    Yields the menus for every supported language. Translations work on copies, so the parsed menus stay untouched.
+    """
+    from utils import util  # pylint: disable=import-outside-toplevel
+
+    for language in languages:
+        if language == Language.DE:
+            # dish titles are always parsed in german
+            yield language, menus
+            continue
+        with metrics.stage("translate"):
+            translated_menus = copy.deepcopy(menus)
+            if not util.translate_dishes(translated_menus, language.deepl_code):
+                print(f"Error. The translation to {language.name} was not successful")
+        yield language, translated_menus
+
+
+def scrape_all_canteens(languages: List[Language]) -> Dict[str, Tuple[Dict[str, Dict[str, bytes]], query.MenuIndex]]:
+    """
+    Parses every canteen once and creates the combined output for the given languages.
+    Every call is a new run with new circuit breakers, in which every canteen gets a deadline of its own.
+
+    :return: For every language's base_url, the outputs of get_json_outputs per canteen id and an index of the dishes
+    """
+    import query  # pylint: disable=import-outside-toplevel,redefined-outer-name
+    from utils import fetch  # pylint: disable=import-outside-toplevel
+
+    outputs: Dict[str, Dict[str, Dict[str, bytes]]] = {language.base_url: {} for language in languages}
+    indexes: Dict[str, query.MenuIndex] = {language.base_url: query.MenuIndex() for language in languages}
+    parsers = [(canteen, parser) for canteen in Canteen if (parser := get_menu_parsing_strategy(canteen)) is not None]
+    # every scrape is a run of its own, in which the canteens are parsed one after another
+    fetch.start_run()
+    for canteen, parser in parsers:
+        # like a single canteen's run, so a slow canteen cannot use up the time of the ones after it
+        fetch.start_deadline()
+        try:
+            menus = parser.parse(canteen)
+        except Exception as e:  # pylint: disable=broad-except
+            # the other canteens are served nevertheless
+            print(f"Error. Parsing the menu(s) of '{canteen.canteen_id}' failed: {e}")
+            continue
+        if menus is None:
+            print(f"Error. Could not retrieve menu(s) of '{canteen.canteen_id}'")
+            continue
+        for language, language_menus in translate_to_all_languages(menus, languages):
+            weeks = Week.to_weeks(language_menus)
+            outputs[language.base_url][canteen.canteen_id] = get_json_outputs(weeks, canteen, True)
+            indexes[language.base_url].add_menus(canteen.canteen_id, language_menus)
+    return {base_url: (outputs[base_url], indexes[base_url]) for base_url in outputs}
 
 
 def main():
     # get command line args
     args = cli.parse_cli_args()
+    if args.record is not None or args.replay is not None:
+        from utils import fetch  # pylint: disable=import-outside-toplevel
+
+        if args.record is not None:
+            fetch.record(args.record)
+        else:
+            fetch.replay(args.replay)
 
-    # print canteens
-    if args.canteens:
-        print(enum_json_creator.enum_to_api_representation_dict(list(Canteen)))
+    if args.canteen is None or (args.metrics is None and args.profile is None and args.report is None):
+        run(args)
         return
+    canteen_id = Canteen.get_canteen_by_str(args.canteen).canteen_id
+    # the profiler and the report are based on the metrics, so they are recorded in any case
+    metrics.metrics.enable()
+    run_profiler = None
+    if args.profile is not None:
+        from utils import profiler  # pylint: disable=import-outside-toplevel
+
+        run_profiler = profiler.Profiler(metrics.metrics)
+        run_profiler.start()
+    error = None
+    try:
+        run(args)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        if run_profiler is not None:
+            run_profiler.stop()
+            run_profiler.write(args.profile, canteen_id)
+        if args.metrics is not None:
+            metrics.metrics.write(args.metrics, canteen_id)
+        if args.report is not None:
+            import run_report  # pylint: disable=import-outside-toplevel
+
+            run_report.write_canteen_report(args.report, canteen_id, metrics.metrics, error)
+
+
+def serve(args: argparse.Namespace) -> None:
+    """
+    Serves all canteens from memory, which get parsed again every refresh_interval.
+    """
+    import geo  # pylint: disable=import-outside-toplevel
+    import server  # pylint: disable=import-outside-toplevel
+    from utils import file_util  # pylint: disable=import-outside-toplevel
+
+    languages = list(Language) if args.all_languages else [Language.DE]
+    locator = None
+    if args.registry is not None:
+        locator = geo.CanteenLocator(geo.load_registry(file_util.load_json(args.registry)))
+    server.serve(lambda: scrape_all_canteens(languages), args.host, args.port, args.refresh_interval, locator)
+
+
+def jsonify_all_languages(args: argparse.Namespace, canteen: Canteen, menus: Dict[datetime.date, Menu]) -> None:
+    """
+    Creates the output of every language from the same parsed menus, next to the jsonify directory.
+    """
+    if args.jsonify is None:
+        print("Error. --all-languages requires --jsonify")
+        return
+    for language, language_menus in translate_to_all_languages(menus):
+        directory = get_language_directory(args.jsonify, language)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        with metrics.stage("jsonify"):
+            jsonify(Week.to_weeks(language_menus), directory, canteen, args.combine)
+
+
+def run(args: argparse.Namespace) -> None:
+    # print canteens or languages
+    if args.canteens or args.languages:
+        import enum_json_creator  # pylint: disable=import-outside-toplevel
+
+        print(enum_json_creator.enum_to_api_representation_dict(list(Canteen if args.canteens else Language)))
+        return
+
+    # serve all canteens from memory
+    if args.serve:
+        serve(args)
+        return
+
+    from utils import util  # pylint: disable=import-outside-toplevel
 
     canteen = Canteen.get_canteen_by_str(args.canteen)
     # get required parser
@@ -97,7 +254,11 @@ def main():
         return
 
     # parse menu
-    menus = parser.parse(canteen)
+    with metrics.stage("parse"):
+        menus = parser.parse(canteen)
+    if menus is not None:
+        metrics.count("dishes", sum(len(menu.dishes) for menu in menus.values()))
+        metrics.count("days", len(menus))
 
     # if date has been explicitly specified, try to parse it
     menu_date = None
@@ -113,9 +274,32 @@ def main():
     if menus is None:
         print("Error. Could not retrieve menu(s)")
 
+    # keep the parsed menus before they get translated
+    if args.archive is not None and menus is not None:
+        import archive  # pylint: disable=import-outside-toplevel
+
+        with metrics.stage("archive"), archive.MenuArchive(args.archive) as menu_archive:
+            menu_archive.add_menus(canteen, menus)
+
+    # the feed is written from the same parse as the JSON output and always contains the german dish titles
+    if args.openmensa is not None and menus is not None:
+        from openmensa import openmensa  # pylint: disable=import-outside-toplevel
+
+        if not os.path.exists(args.openmensa):
+            os.makedirs(args.openmensa)
+        with metrics.stage("openmensa"):
+            openmensa(Week.to_weeks(menus), args.openmensa)
+
+    # parse once, but create the output for all languages
+    if args.all_languages:
+        if menus is not None:
+            jsonify_all_languages(args, canteen, menus)
+        return
+
     # optionally translate the dish titles
     if args.language is not None and args.language.upper() != "DE":
-        translated = util.translate_dishes(menus, args.language)
+        with metrics.stage("translate"):
+            translated = util.translate_dishes(menus, args.language)
         if not translated:
             print("Error. The translation was not successful")
 
@@ -124,19 +308,17 @@ def main():
         weeks = Week.to_weeks(menus)
         if not os.path.exists(args.jsonify):
             os.makedirs(args.jsonify)
-        jsonify(weeks, args.jsonify, canteen, args.combine)
+        with metrics.stage("jsonify"):
+            jsonify(weeks, args.jsonify, canteen, args.combine)
     elif args.openmensa is not None:
-        weeks = Week.to_weeks(menus)
-        if not os.path.exists(args.openmensa):
-            os.makedirs(args.openmensa)
-        openmensa(weeks, args.openmensa)
+        # the feed has already been written
+        pass
     # date argument is set
     elif args.date is not None:
-        if menu_date not in menus:
+        if menu_date in menus:
+            print(menus[menu_date])
+        else:
             print(f"There is no menu for '{canteen}' on {menu_date}!")
-            return
-        menu = menus[menu_date]
-        print(menu)
     # else, print weeks
     elif menus is not None:
         weeks = Week.to_weeks(menus)
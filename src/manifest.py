@@ -0,0 +1,96 @@
+import hashlib
+import os
+import re
+import shutil
+import sys
+from typing import Any, Dict, Set
+
+from binary_converter import BINARY_EXTENSION
+from dish_catalog import CANTEEN_COMPACT_FILENAME, CATALOG_FILENAME, COMPACT_FILENAME
+from search import INDEX_FILENAME
+from utils import file_util, json_util
+
+MANIFEST_FILENAME: str = "manifest.json"
+FINGERPRINT_LENGTH: int = 16
+FINGERPRINTED_FILENAME = re.compile(rf".+\.[0-9a-f]{{{FINGERPRINT_LENGTH}}}(\.[^.]+)?$")
+CHUNK_SIZE: int = 1 << 16
+
+ENTRY_POINTS: Set[str] = {
+    "all.json",
+    "combined.json",
+    CATALOG_FILENAME,
+    COMPACT_FILENAME,
+    CANTEEN_COMPACT_FILENAME,
+    INDEX_FILENAME,
+}
+"""
+Filenames of the files clients start from. Only they get fingerprinted copies, as the deployment keeps every file that
+has ever been published and a copy of every file of every run would pile up.
+"""
+
+
+def hash_file(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as infile:
+        for chunk in iter(lambda: infile.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def fingerprinted_path(path: str, sha256: str) -> str:
+    """
+    E.g. "combined/combined.json" -> "combined/combined.<first 16 digits of the hash>.json"
+    """
+    root, extension = os.path.splitext(path)
+    return f"{root}.{sha256[:FINGERPRINT_LENGTH]}{extension}"
+
+
+def is_entry_point(filename: str) -> bool:
+    """
+    :return: Whether the file is one of the ENTRY_POINTS or its MessagePack twin
+    """
+    root, extension = os.path.splitext(filename)
+    return filename in ENTRY_POINTS or (extension == BINARY_EXTENSION and f"{root}.json" in ENTRY_POINTS)
+
+
+def build_manifest(base_dir: str, fingerprint: bool = False) -> Dict[str, Any]:
+    """
+    Lists every file in the directory tree with its size and SHA-256. Fingerprinted copies are not listed on their own.
+
+    :param fingerprint: Also copy every entry point to its fingerprinted path, which never changes its content
+    :return: The manifest, its paths are relative to base_dir and use "/" as separator
+    """
+    files: Dict[str, Dict[str, Any]] = {}
+    for directory, _, filenames in os.walk(base_dir):
+        for filename in filenames:
+            if FINGERPRINTED_FILENAME.match(filename) or filename == MANIFEST_FILENAME:
+                continue
+            path = os.path.join(directory, filename)
+            sha256 = hash_file(path)
+            entry: Dict[str, Any] = {"size": os.path.getsize(path), "sha256": sha256}
+            if fingerprint and is_entry_point(filename):
+                copy = fingerprinted_path(path, sha256)
+                # the content of a fingerprinted path is always the same, so it only gets written once
+                if not os.path.exists(copy):
+                    shutil.copyfile(path, copy)
+                entry["fingerprinted"] = os.path.relpath(copy, base_dir).replace(os.sep, "/")
+            files[os.path.relpath(path, base_dir).replace(os.sep, "/")] = entry
+    return {"files": dict(sorted(files.items()))}
+
+
+def write_manifest(base_dir: str, fingerprint: bool = False) -> int:
+    """
+    Writes "manifest.json" to the directory, see build_manifest.
+
+    :return: Number of listed files
+    """
+    manifest = build_manifest(base_dir, fingerprint)
+    with open(os.path.join(base_dir, MANIFEST_FILENAME), "wb") as outfile:
+        outfile.write(json_util.to_json_bytes(manifest))
+    return len(manifest["files"])
+
+
+if __name__ == "__main__":
+    base_directory = file_util.get_base_directory()
+    # e.g. "python src/manifest.py dist --fingerprint"
+    print(f"Listed {write_manifest(base_directory, '--fingerprint' in sys.argv[2:])} files in the manifest")
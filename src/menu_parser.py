@@ -16,7 +16,7 @@ import requests  # type: ignore
 from lxml import html  # nosec: https://github.com/TUM-Dev/eat-api/issues/19
 
 from entities import Canteen, Dish, Label, Menu, Price, Prices, Week
-from utils import util
+from utils import fetch, metrics, util
 
 
 class ParsingError(Exception):
@@ -43,6 +43,15 @@ class MenuParser(ABC):
 
         return datetime.datetime.strptime(date_str % (year, week_number, day), date_format).date()
 
+    @classmethod
+    def get_week_dates(cls, year: Optional[int], week_number: Optional[int]) -> List[datetime.date]:
+        """
+        :return: The weekdays of the week, e.g. to record them as skipped, or none if the week is unknown
+        """
+        if year is None or week_number is None:
+            return []
+        return [cls.get_date(year, week_number, day) for day in range(1, 6)]
+
     @abstractmethod
     def parse(self, canteen: Canteen) -> Optional[Dict[datetime.date, Menu]]:
         pass
@@ -250,17 +259,28 @@ class StudentenwerkMenuParser(MenuParser):
         menus = {}
         for date in self.__get_available_dates(canteen):
             page_link: str = self.base_url_with_date.format(url_id=canteen.url_id, date=date.strftime("%Y-%m-%d"))
-            page: requests.Response = requests.get(page_link, timeout=10.0)
+            try:
+                page: requests.Response = fetch.get(page_link, timeout=10.0)
+            except requests.RequestException as e:
+                # e.g. the deadline of the run has passed or the host is down, the dates parsed so far are kept
+                print(f"Exception while fetching menu from {date}. Skipping current date. Exception args: {e.args}")
+                metrics.error(e, date)
+                continue
             if page.ok:
                 try:
-                    tree: html.Element = html.fromstring(page.content)
+                    with metrics.stage("html"):
+                        tree: html.Element = html.fromstring(page.content)
+                    metrics.count("pages")
                     menu = self.get_menu(tree, canteen, date)
                     if menu:
                         menus[date] = menu
                 # pylint: disable=broad-except
                 except Exception as e:
                     print(f"Exception while parsing menu from {date}. Skipping current date. Exception args: {e.args}")
+                    metrics.error(e, date)
                 # pylint: enable=broad-except
+            else:
+                metrics.error(requests.HTTPError(f"{page.status_code} for {page_link}", response=page), date)
         return menus
 
     def get_menu(self, page: html.Element, canteen: Canteen, date: datetime.date) -> Optional[Menu]:
@@ -277,8 +297,10 @@ class StudentenwerkMenuParser(MenuParser):
 
     def __get_available_dates(self, canteen: Canteen) -> List[datetime.date]:
         page_link: str = self.base_url.format(url_id=canteen.url_id)
-        page: requests.Response = requests.get(page_link, timeout=10.0)
-        tree: html.Element = html.fromstring(page.content)
+        page: requests.Response = fetch.get(page_link, timeout=10.0)
+        with metrics.stage("html"):
+            tree: html.Element = html.fromstring(page.content)
+        metrics.count("pages")
         return self.get_available_dates_for_html(tree)
 
     # public for testing
@@ -289,8 +311,9 @@ class StudentenwerkMenuParser(MenuParser):
             # parse date
             try:
                 date: datetime.date = util.parse_date(date_str)
-            except ValueError:
+            except ValueError as e:
                 print(f"Warning: Error during parsing date from html page. Problematic date: {date_str}")
+                metrics.error(e)
                 # continue and parse subsequent menus
                 continue
             dates += [date]
@@ -446,22 +469,36 @@ class FMIBistroMenuParser(MenuParser):
         menus = {}
         for year, calendar_week, _ in years_and_calendar_weeks:
             # get pdf
-            page = requests.get(self.url.format(calendar_week=calendar_week, year=year), timeout=10.0)
-            if page.status_code == 200:
+            pdf_url = self.url.format(calendar_week=calendar_week, year=year)
+            page = fetch.get(pdf_url, timeout=10.0)
+            if page.status_code != 200:
+                metrics.error(
+                    requests.HTTPError(f"{page.status_code} for {pdf_url}", response=page),
+                    *self.get_week_dates(year, calendar_week),
+                )
+            else:
                 with tempfile.NamedTemporaryFile() as temp_pdf:
                     # download pdf
                     temp_pdf.write(page.content)
                     with tempfile.NamedTemporaryFile() as temp_txt:
                         # convert pdf to text by calling pdftotext
-                        call(
-                            ["pdftotext", "-layout", temp_pdf.name, temp_txt.name],
-                        )  # nosec: all input is fully defined
+                        with metrics.stage("pdftotext"):
+                            call(
+                                ["pdftotext", "-layout", temp_pdf.name, temp_txt.name],
+                            )  # nosec: all input is fully defined
+                        metrics.count("pdfs")
                         with open(temp_txt.name, "r", encoding="utf-8") as myfile:
                             # read generated text file
                             data = myfile.read()
-                            parsed_menus = self.get_menus(data, year, calendar_week)
-                            if parsed_menus is not None:
+                            with metrics.stage("regex"):
+                                parsed_menus = self.get_menus(data, year, calendar_week)
+                            if parsed_menus:
                                 menus.update(parsed_menus)
+                            else:
+                                metrics.error(
+                                    ParsingError(f"No menus found in {pdf_url}"),
+                                    *self.get_week_dates(year, calendar_week),
+                                )
         return menus
 
     def get_menus(self, text: str, year: int, calendar_week: int) -> Dict[datetime.date, Menu]:
@@ -589,9 +626,11 @@ class IPPBistroMenuParser(MenuParser):
     dish_regex: Pattern[str] = re.compile(r"(.+?)(\d+,\d+|\?€)\s€[^)]")
 
     def parse(self, canteen: Canteen) -> Optional[Dict[datetime.date, Menu]]:
-        page = requests.get(self.url, timeout=10.0)
+        page = fetch.get(self.url, timeout=10.0)
         # get html tree
-        tree = html.fromstring(page.content)
+        with metrics.stage("html"):
+            tree = html.fromstring(page.content)
+        metrics.count("pages")
         # get url of current pdf menu
         xpath_query = tree.xpath("//a[contains(@title, 'KW_')]/@href")
 
@@ -609,21 +648,35 @@ class IPPBistroMenuParser(MenuParser):
             # convert 2-digit year into 4-digit year
             year = 2000 + year if year is not None and len(str(year)) == 2 else year
 
+            # download pdf
+            response = fetch.get(pdf_url, timeout=10.0)
+            if not response.ok:
+                metrics.error(
+                    requests.HTTPError(f"{response.status_code} for {pdf_url}", response=response),
+                    *self.get_week_dates(year, week_number),
+                )
+                continue
             with tempfile.NamedTemporaryFile() as temp_pdf:
-                # download pdf
-                response = requests.get(pdf_url, timeout=10.0)
                 temp_pdf.write(response.content)
                 with tempfile.NamedTemporaryFile() as temp_txt:
                     # convert pdf to text by calling pdftotext; only convert first page to txt (-l 1)
-                    call(
-                        ["pdftotext", "-l", "1", "-layout", temp_pdf.name, temp_txt.name],
-                    )  # nosec: all input is fully defined
+                    with metrics.stage("pdftotext"):
+                        call(
+                            ["pdftotext", "-l", "1", "-layout", temp_pdf.name, temp_txt.name],
+                        )  # nosec: all input is fully defined
+                    metrics.count("pdfs")
                     with open(temp_txt.name, "r", encoding="utf-8") as myfile:
                         # read generated text file
                         data = myfile.read()
-                        parsed_menus = self.get_menus(data, year, week_number)
-                        if parsed_menus is not None:
+                        with metrics.stage("regex"):
+                            parsed_menus = self.get_menus(data, year, week_number)
+                        if parsed_menus:
                             menus.update(parsed_menus)
+                        else:
+                            metrics.error(
+                                ParsingError(f"No menus found in {pdf_url}"),
+                                *self.get_week_dates(year, week_number),
+                            )
 
         return menus
 
@@ -758,8 +811,9 @@ class IPPBistroMenuParser(MenuParser):
                 price_obj: Optional[Price] = None
                 try:
                     price_obj = Price(float(price_str))
-                except ValueError:
+                except ValueError as e:
                     print(f"Warning: Error during parsing price: {price_str}")
+                    metrics.error(e)
                 dishes.append(
                     Dish(
                         dish_name.strip(),
@@ -842,9 +896,11 @@ class MedizinerMensaMenuParser(MenuParser):
         return Dish(dish_str, dish_price, labels, "Tagesgericht")
 
     def parse(self, canteen: Canteen) -> Optional[Dict[datetime.date, Menu]]:
-        page = requests.get(self.startPageurl, timeout=10.0)
+        page = fetch.get(self.startPageurl, timeout=10.0)
         # get html tree
-        tree = html.fromstring(page.content)
+        with metrics.stage("html"):
+            tree = html.fromstring(page.content)
+        metrics.count("pages")
         # get url of current pdf menu
         xpath_query = tree.xpath("//a[contains(@href, 'Mensaplan/KW_')]/@href")
 
@@ -868,19 +924,34 @@ class MedizinerMensaMenuParser(MenuParser):
         else:
             year = year_2d
 
+        # download pdf
+        response = fetch.get(pdf_url, timeout=10.0)
+        if not response.ok:
+            metrics.error(
+                requests.HTTPError(f"{response.status_code} for {pdf_url}", response=response),
+                *self.get_week_dates(year, week_number),
+            )
+            return None
         with tempfile.NamedTemporaryFile() as temp_pdf:
-            # download pdf
-            response = requests.get(pdf_url, timeout=10.0)
             temp_pdf.write(response.content)
             with tempfile.NamedTemporaryFile() as temp_txt:
                 # convert pdf to text by calling pdftotext; only convert first page to txt (-l 1)
-                call(
-                    ["pdftotext", "-l", "1", "-layout", temp_pdf.name, temp_txt.name],
-                )  # nosec: all input is fully defined
+                with metrics.stage("pdftotext"):
+                    call(
+                        ["pdftotext", "-l", "1", "-layout", temp_pdf.name, temp_txt.name],
+                    )  # nosec: all input is fully defined
+                metrics.count("pdfs")
                 with open(temp_txt.name, "r", encoding="utf-8") as myfile:
                     # read generated text file
                     data = myfile.read()
-                    return self.get_menus(data, year, week_number)
+                    with metrics.stage("regex"):
+                        parsed_menus = self.get_menus(data, year, week_number)
+                    if not parsed_menus:
+                        metrics.error(
+                            ParsingError(f"No menus found in {pdf_url}"),
+                            *self.get_week_dates(year, week_number),
+                        )
+                    return parsed_menus
 
     def get_menus(self, text: str, year: int, week_number: int) -> Optional[Dict[datetime.date, Menu]]:
         lines = text.splitlines()
@@ -1031,11 +1102,13 @@ class StraubingMensaMenuParser(MenuParser):
 
         today = datetime.date.today()
         _, calendar_week, _ = today.isocalendar()
+        monday = today - datetime.timedelta(days=today.weekday())
 
         # As we don't know how many weeks we can fetch,
         # repeat until there are non-valid dates in the downloaded csv file
         while True:
-            page = requests.get(self.url.format(calendar_week=calendar_week), timeout=10.0)
+            csv_url = self.url.format(calendar_week=calendar_week)
+            page = fetch.get(csv_url, timeout=10.0)
             if page.ok:
                 decoded_content = page.content.decode("cp1252")
                 rows = self.parse_csv(decoded_content)
@@ -1047,13 +1120,21 @@ class StraubingMensaMenuParser(MenuParser):
                 if date < (today - datetime.timedelta(days=7)):
                     break
 
-                menus.update(self.parse_menu(rows))
+                with metrics.stage("regex"):
+                    menus.update(self.parse_menu(rows))
 
             else:
                 # also abort loop, when there can't be a menu fetched
+                # a missing file is the regular end of the published weeks, anything else loses the week
+                if page.status_code != 404:
+                    metrics.error(
+                        requests.HTTPError(f"{page.status_code} for {csv_url}", response=page),
+                        *(monday + datetime.timedelta(days=day) for day in range(5)),
+                    )
                 break
 
             calendar_week += 1
+            monday += datetime.timedelta(weeks=1)
 
         return menus
 
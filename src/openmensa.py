@@ -1,42 +1,72 @@
-from pyopenmensa.feed import LazyBuilder
+import operator
+import os.path
+from typing import Any, Dict, Optional
 
+from lxml import etree  # nosec: the feed is only written, never parsed
 
-def openmensa(weeks, directory):
-    canteen = weeksToCanteenFeed(weeks)
+from entities import Dish, Week
 
-    writeFeedToFile(canteen, directory)
+NAMESPACE: str = "http://openmensa.org/open-mensa-v2"
+XSI_NAMESPACE: str = "http://www.w3.org/2001/XMLSchema-instance"
+CATEGORY: str = "Speiseplan"
+MAX_NAME_LENGTH: int = 250
+FEED_FILENAME: str = "feed.xml"
 
 
-def weeksToCanteenFeed(weeks):
-    canteen = LazyBuilder()  # canteen container
-    # iterate through weeks
-    for calendar_week in weeks:
-        # get Week object
-        week = weeks[calendar_week]
-        # get year of calendar week
-        days = week.days
+def openmensa(weeks, directory):
+    write_feed(weeks, os.path.join(str(directory), FEED_FILENAME))
 
-        # iterate through days
-        for menu in days:
 
-            # iterate through dishes
-            for dish in menu.dishes:
-                addDishToCanteen(dish, menu.menu_date, canteen)
+def _get_price(dish: Dish) -> Optional[int]:
+    # the students' price in cents, which is the one of the role "other"
+    if dish.prices.students is not None and isinstance(dish.prices.students.base_price, float):
+        return round(dish.prices.students.base_price * 100)
+    return None
 
-    return canteen
 
+def write_feed(weeks: Dict[int, Week], path: str) -> int:
+    """
+    Writes the weeks as OpenMensa v2 feed with the same content as pyopenmensa's LazyBuilder, but streams it day by
+    day instead of building the whole document in memory first.
 
-def addDishToCanteen(dish, date, canteen):
-    if isinstance(dish.prices.students.base_price, float):
-        prices = {"other": dish.prices.students.base_price}
-    else:
-        prices = {}
-    if dish.name:
-        canteen.addMeal(date, "Speiseplan", dish.name, prices=prices)
-    else:
-        print("[WARNING] Empty dish name found: " + str(dish))
+    :return: Number of written days
+    """
+    menus = sorted((menu for week in weeks.values() for menu in week.days), key=operator.attrgetter("menu_date"))
+    count = 0
+    with etree.xmlfile(path, encoding="utf-8") as xf:
+        xf.write_declaration()
+        attributes = {
+            "version": "2.1",
+            f"{{{XSI_NAMESPACE}}}schemaLocation": f"{NAMESPACE} http://openmensa.org/open-mensa-v2.xsd",
+        }
+        with xf.element(f"{{{NAMESPACE}}}openmensa", attributes, nsmap={None: NAMESPACE, "xsi": XSI_NAMESPACE}):
+            with xf.element(f"{{{NAMESPACE}}}canteen"):
+                for menu in menus:
+                    dishes = []
+                    for dish in menu.dishes:
+                        if dish.name:
+                            dishes.append(dish)
+                        else:
+                            print("[WARNING] Empty dish name found: " + str(dish))
+                    # days without dishes are left out, like LazyBuilder does
+                    if not dishes:
+                        continue
+                    with xf.element(f"{{{NAMESPACE}}}day", date=str(menu.menu_date)):
+                        with xf.element(f"{{{NAMESPACE}}}category", name=CATEGORY):
+                            for dish in dishes:
+                                _write_meal(xf, dish)
+                    xf.flush()
+                    count += 1
+    return count
 
 
-def writeFeedToFile(canteen, directory):
-    with open(f"{str(directory)}/feed.xml", "w", encoding="utf-8") as outfile:
-        outfile.write(canteen.toXMLFeed())
+# the writer of etree.xmlfile() has no public type
+def _write_meal(xf: Any, dish: Dish) -> None:
+    name = dish.name if len(dish.name) <= MAX_NAME_LENGTH else dish.name[: MAX_NAME_LENGTH - 3] + "..."
+    with xf.element(f"{{{NAMESPACE}}}meal"):
+        with xf.element(f"{{{NAMESPACE}}}name"):
+            xf.write(name)
+        price = _get_price(dish)
+        if price is not None:
+            with xf.element(f"{{{NAMESPACE}}}price", role="other"):
+                xf.write(f"{price // 100}.{price % 100:0>2}")
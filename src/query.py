@@ -0,0 +1,167 @@
+import bisect
+import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from entities import Dish, Label, Menu
+
+LABEL_BITS: Dict[str, int] = {label.name: 1 << index for index, label in enumerate(Label)}
+"""
+Every label is represented by one bit, at the position of the label in the Label enum.
+"""
+
+PRICE_ROLES: Tuple[str, ...] = ("students", "staff", "guests")
+
+
+def to_label_mask(labels: Iterable[Label]) -> int:
+    mask = 0
+    for label in labels:
+        mask |= LABEL_BITS[label.name]
+    return mask
+
+
+class DishEntry(NamedTuple):
+    canteen_id: str
+    date: datetime.date
+    dish: Dish
+
+    def to_json_obj(self):
+        return {"canteen_id": self.canteen_id, "date": self.date.isoformat(), **self.dish.to_json_obj()}
+
+
+class MenuIndex:  # pylint: disable=too-many-instance-attributes
+    """
+    Index over the dishes of several canteens, which answers queries by canteen, date range, labels and price range.
+    Dishes are numbered in the order they got added. Every index maps to the numbers of its dishes,
+    so a query starts with the most selective index and only checks the remaining filters for those dishes.
+    """
+
+    def __init__(self):
+        self.entries: List[DishEntry] = []
+        self.label_masks: List[int] = []
+        self.prices: Dict[str, List[Optional[float]]] = {role: [] for role in PRICE_ROLES}
+        self.canteen_index: Dict[str, List[int]] = {}
+        self.date_index: Dict[datetime.date, List[int]] = {}
+        self.label_index: Dict[str, List[int]] = {}
+        # sorted once before the next query instead of on every added dish
+        self.__is_sorted = True
+        self.__sorted_dates: List[datetime.date] = []
+        # numbers of the dishes sorted by their price per price role, dishes without a price are missing
+        self.__sorted_prices: Dict[str, List[float]] = {role: [] for role in PRICE_ROLES}
+        self.__price_index: Dict[str, List[int]] = {role: [] for role in PRICE_ROLES}
+
+    def add(self, canteen_id: str, menu_date: datetime.date, dish: Dish) -> None:
+        number = len(self.entries)
+        self.entries.append(DishEntry(canteen_id, menu_date, dish))
+        self.label_masks.append(to_label_mask(dish.labels))
+        self.canteen_index.setdefault(canteen_id, []).append(number)
+        self.date_index.setdefault(menu_date, []).append(number)
+        for label in dish.labels:
+            self.label_index.setdefault(label.name, []).append(number)
+        for role in PRICE_ROLES:
+            price = getattr(dish.prices, role)
+            self.prices[role].append(price.base_price if price is not None else None)
+        self.__is_sorted = False
+
+    def add_menus(self, canteen_id: str, menus: Dict[datetime.date, Menu]) -> None:
+        for menu_date, menu in sorted(menus.items()):
+            for dish in menu.dishes:
+                self.add(canteen_id, menu_date, dish)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __sort(self) -> None:
+        if self.__is_sorted:
+            return
+        self.__sorted_dates = sorted(self.date_index)
+        for role, prices in self.prices.items():
+            # dishes without a price are left out of the price index
+            priced = sorted((price, number) for number, price in enumerate(prices) if price is not None)
+            self.__price_index[role] = [number for _, number in priced]
+            self.__sorted_prices[role] = [price for price, _ in priced]
+        self.__is_sorted = True
+
+    def __dates_between(self, start: Optional[datetime.date], end: Optional[datetime.date]) -> List[datetime.date]:
+        low = 0 if start is None else bisect.bisect_left(self.__sorted_dates, start)
+        high = len(self.__sorted_dates) if end is None else bisect.bisect_right(self.__sorted_dates, end)
+        return self.__sorted_dates[low:high]
+
+    def __prices_between(self, role: str, min_price: Optional[float], max_price: Optional[float]) -> List[int]:
+        sorted_prices = self.__sorted_prices[role]
+        low = 0 if min_price is None else bisect.bisect_left(sorted_prices, min_price)
+        high = len(sorted_prices) if max_price is None else bisect.bisect_right(sorted_prices, max_price)
+        return self.__price_index[role][low:high]
+
+    def query(
+        self,
+        canteen_ids: Optional[Iterable[str]] = None,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+        include_labels: Iterable[Label] = (),
+        exclude_labels: Iterable[Label] = (),
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        price_role: str = "students",
+    ) -> List[DishEntry]:
+        """
+        :param start: First date to include, None for no lower bound
+        :param end: Last date to include, None for no upper bound
+        :param include_labels: Labels a dish needs to have all of
+        :param exclude_labels: Labels a dish must not have any of
+        :param min_price: Minimal base price of the price role, dishes without a price never match price filters
+        :return: Matching dishes ordered by the time they got added
+        """
+        if price_role not in PRICE_ROLES:
+            raise ValueError(f"Unknown price role '{price_role}'. Valid roles are: {', '.join(PRICE_ROLES)}")
+        canteen_id_set = set(canteen_ids) if canteen_ids is not None else None
+        include_labels = list(include_labels)
+        include_mask = to_label_mask(include_labels)
+        exclude_mask = to_label_mask(exclude_labels)
+
+        self.__sort()
+
+        # the lists of dish numbers of every index that restricts the query
+        candidates: List[List[List[int]]] = []
+        if canteen_id_set is not None:
+            candidates.append([self.canteen_index.get(canteen_id, []) for canteen_id in canteen_id_set])
+        if start is not None or end is not None:
+            candidates.append([self.date_index[menu_date] for menu_date in self.__dates_between(start, end)])
+        for label in include_labels:
+            candidates.append([self.label_index.get(label.name, [])])
+        if min_price is not None or max_price is not None:
+            candidates.append([self.__prices_between(price_role, min_price, max_price)])
+
+        # start with the most selective index, the other restrictions get checked per dish
+        numbers: Iterable[int] = range(len(self))
+        if candidates:
+            most_selective = min(candidates, key=lambda lists: sum(len(numbers_) for numbers_ in lists))
+            numbers = sorted(number for numbers_ in most_selective for number in numbers_)
+        prices = self.prices[price_role]
+        results = []
+        for number in numbers:
+            entry = self.entries[number]
+            mask = self.label_masks[number]
+            if mask & include_mask != include_mask or mask & exclude_mask:
+                continue
+            if canteen_id_set is not None and entry.canteen_id not in canteen_id_set:
+                continue
+            if (start is not None and entry.date < start) or (end is not None and entry.date > end):
+                continue
+            if min_price is not None or max_price is not None:
+                price = prices[number]
+                if price is None or (min_price is not None and price < min_price):
+                    continue
+                if max_price is not None and price > max_price:
+                    continue
+            results.append(entry)
+        return results
+
+
+def build_index(canteen_menus: Dict[str, Dict[datetime.date, Menu]]) -> MenuIndex:
+    """
+    :param canteen_menus: The parsed menus for every canteen id
+    """
+    index = MenuIndex()
+    for canteen_id, menus in canteen_menus.items():
+        index.add_menus(canteen_id, menus)
+    return index
@@ -0,0 +1,71 @@
+"""
+Local stand-in for the canteens' websites, which answers with the responses recorded by "main.py --record DIR".
+The original URL is the path of a request, e.g. "http://127.0.0.1:8081/http://www.studentenwerk-muenchen.de/...",
+which is what "main.py --replay http://127.0.0.1:8081" requests.
+
+Usage: python src/replay_server.py DIR [PORT]
+"""
+import contextlib
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Tuple
+
+from utils.fetch import REPLAY_MISS_HEADER, Recordings
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], recordings: Recordings):
+        super().__init__(address, ReplayRequestHandler)
+        self.recordings = recordings
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+    server: ReplayServer
+
+    def do_GET(self) -> None:  # noqa: N802
+        self.__respond(send_body=True)
+
+    def do_HEAD(self) -> None:  # noqa: N802
+        self.__respond(send_body=False)
+
+    def __respond(self, send_body: bool) -> None:
+        # recordings are keyed by the method of the original request
+        response = self.server.recordings.load("GET", self.path[1:])
+        if response is None:
+            self.send_response(502)
+            self.send_header(REPLAY_MISS_HEADER, "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(response.status_code, response.reason)
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(response.content)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(response.content)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+def serve(directory: str, host: str = "127.0.0.1", port: int = 8081) -> None:
+    server = ReplayServer((host, port), Recordings(directory))
+    print(f"Replaying {directory} on {server.url}")
+    with contextlib.suppress(KeyboardInterrupt):
+        server.serve_forever()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python src/replay_server.py DIR [PORT]")
+        sys.exit(1)
+    serve(sys.argv[1], port=int(sys.argv[2]) if len(sys.argv) > 2 else 8081)
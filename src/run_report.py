@@ -0,0 +1,201 @@
+import datetime
+import math
+import os.path
+import shutil
+import sys
+from typing import Any, Dict, List, Optional
+
+from utils import file_util, json_util
+from utils.metrics import Metrics
+
+REPORT_FILENAME: str = "run_report.json"
+STATUSES: List[str] = ["ok", "empty", "degraded", "failed"]
+"""
+The statuses of a canteen from best to worst:
+- ok: menus have been parsed without any errors
+- empty: the parser did not find any menus
+- degraded: menus have been parsed, but some dates had to be skipped or other errors have been recovered from
+- failed: the run crashed or the parser could not retrieve any menus
+"""
+SLOWDOWN: float = 2.0
+"""
+A canteen is flagged as slow, if its run or its requests took more than SLOWDOWN times as long as in the previous run.
+"""
+MIN_SECONDS: float = 1.0
+"""
+Slowdowns below this duration are not flagged, as short runs vary a lot.
+"""
+MAX_DISH_DROP: float = 0.5
+"""
+A canteen is flagged, if it has less than half the dishes of the previous run.
+"""
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """
+    :return: The nearest-rank percentile, e.g. the median for 0.5
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def _round(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds, 6)
+
+
+def get_canteen_report(metrics: Metrics, canteen_id: str, error: Optional[BaseException] = None) -> Dict[str, Any]:
+    """
+    Builds the report of a canteen's run from the metrics of the run.
+
+    :param error: The exception the run crashed with
+    """
+    metrics_json = metrics.to_json_obj(canteen_id)
+    counters = metrics_json["counters"]
+    latencies = metrics.samples.get("fetch", [])
+    errors = dict(metrics.errors)
+    if error is not None:
+        errors[type(error).__name__] = errors.get(type(error).__name__, 0) + 1
+    # "days" is only counted, if the parser retrieved menus at all
+    if error is not None or "days" not in counters:
+        status = "failed"
+    elif counters["days"] == 0:
+        status = "empty"
+    elif errors:
+        status = "degraded"
+    else:
+        status = "ok"
+    return {
+        "canteen_id": canteen_id,
+        "status": status,
+        "started": metrics_json["started"],
+        "seconds": metrics_json["seconds"],
+        "fetch": {
+            "requests": len(latencies),
+            "bytes": counters.get("bytes_fetched", 0),
+            "seconds": _round(sum(latencies)),
+            "p50": _round(percentile(latencies, 0.5)),
+            "p90": _round(percentile(latencies, 0.9)),
+            "p99": _round(percentile(latencies, 0.99)),
+            "max": _round(max(latencies, default=None)),
+        },
+        "days": counters.get("days", 0),
+        "dishes": counters.get("dishes", 0),
+        "skipped_dates": dict(sorted(metrics.skipped_dates.items())),
+        "errors": errors,
+    }
+
+
+def write_canteen_report(
+    directory: str,
+    canteen_id: str,
+    metrics: Metrics,
+    error: Optional[BaseException] = None,
+) -> None:
+    """
+    Writes "<canteen_id>.json" to the directory.
+    """
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    _write(os.path.join(directory, f"{canteen_id}.json"), get_canteen_report(metrics, canteen_id, error))
+
+
+def _is_slower(current: Optional[float], previous: Optional[float]) -> bool:
+    if current is None or previous is None:
+        return False
+    return current >= MIN_SECONDS and current > SLOWDOWN * previous
+
+
+def compare_canteen(current: Dict[str, Any], previous: Dict[str, Any]) -> List[str]:
+    """
+    :return: The reasons why the canteen got worse since the previous run, if any
+    """
+    reasons = []
+    if STATUSES.index(current["status"]) > STATUSES.index(previous["status"]):
+        reasons.append(f"status changed from {previous['status']} to {current['status']}")
+    if _is_slower(current["seconds"], previous["seconds"]):
+        reasons.append(f"run took {current['seconds']:.1f} s instead of {previous['seconds']:.1f} s")
+    if _is_slower(current["fetch"]["p90"], previous["fetch"]["p90"]):
+        reasons.append(
+            f"90 % of the requests took up to {current['fetch']['p90']:.1f} s instead of "
+            f"{previous['fetch']['p90']:.1f} s",
+        )
+    if current["dishes"] < (1 - MAX_DISH_DROP) * previous["dishes"]:
+        reasons.append(f"{current['dishes']} dishes instead of {previous['dishes']}")
+    new_errors = sorted(set(current["errors"]) - set(previous["errors"]))
+    if new_errors:
+        reasons.append(f"new errors: {', '.join(new_errors)}")
+    return reasons
+
+
+def build_run_report(
+    canteen_reports: Dict[str, Dict[str, Any]],
+    previous: Optional[Dict[str, Any]] = None,
+    now: Optional[datetime.datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Combines the reports of all canteens and flags every canteen that got worse since the previous run report.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    flagged: Dict[str, List[str]] = {}
+    if previous is not None:
+        for canteen_id, previous_report in previous["canteens"].items():
+            if canteen_id not in canteen_reports:
+                flagged[canteen_id] = ["no report, the run did not finish"]
+                continue
+            reasons = compare_canteen(canteen_reports[canteen_id], previous_report)
+            if reasons:
+                flagged[canteen_id] = reasons
+    for canteen_id, report in canteen_reports.items():
+        # a canteen failing right from the start is flagged as well
+        if report["status"] == "failed" and canteen_id not in flagged:
+            flagged[canteen_id] = ["status is failed"]
+    return {
+        "created": now.isoformat(timespec="seconds"),
+        "previous": previous["created"] if previous is not None else None,
+        "summary": {
+            status: sum(report["status"] == status for report in canteen_reports.values()) for status in STATUSES
+        },
+        "flagged": dict(sorted(flagged.items())),
+        "canteens": dict(sorted(canteen_reports.items())),
+    }
+
+
+def write_run_report(reports_dir: str, base_dir: str, state_dir: str) -> Dict[str, Any]:
+    """
+    Combines the canteen reports in reports_dir to "run_report.json" in base_dir and compares it with the report of the
+    previous run, which is kept in state_dir.
+    """
+    canteen_reports = {
+        filename[: -len(".json")]: file_util.load_json(os.path.join(reports_dir, filename))
+        for filename in sorted(os.listdir(reports_dir))
+        if filename.endswith(".json")
+    }
+    previous_path = os.path.join(state_dir, REPORT_FILENAME)
+    previous = file_util.load_json(previous_path) if os.path.exists(previous_path) else None
+    run_report = build_run_report(canteen_reports, previous)  # type: ignore
+    report_path = os.path.join(base_dir, REPORT_FILENAME)
+    _write(report_path, run_report)
+
+    if not os.path.exists(state_dir):
+        os.makedirs(state_dir)
+    shutil.copyfile(report_path, previous_path)
+    return run_report
+
+
+def _write(path: str, obj: object) -> None:
+    with open(path, "wb") as outfile:
+        outfile.write(json_util.to_json_bytes(obj))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("Usage: run_report.py REPORTS_DIRECTORY OUTPUT_DIRECTORY STATE_DIRECTORY")
+        sys.exit(1)
+    if not os.path.exists(sys.argv[1]):
+        raise FileNotFoundError(f"There is no such directory '{sys.argv[1]}'.")
+    written_report = write_run_report(sys.argv[1], sys.argv[2], sys.argv[3])
+    print(", ".join(f"{count} {status}" for status, count in written_report["summary"].items()))
+    for flagged_id, flagged_reasons in written_report["flagged"].items():
+        print(f"Warning: {flagged_id}: {'; '.join(flagged_reasons)}")
@@ -0,0 +1,364 @@
+import bisect
+import mmap
+import os.path
+import re
+import shutil
+import struct
+import sys
+import unicodedata
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple, cast
+
+from utils import file_util
+
+INDEX_FILENAME: str = "search_index.bin"
+
+UMLAUTS: Dict[int, str] = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+
+COMPOUND_PARTS: Set[str] = {
+    "auflauf",
+    "apfel",
+    "blumenkohl",
+    "bohnen",
+    "braten",
+    "brokkoli",
+    "burger",
+    "curry",
+    "eintopf",
+    "ente",
+    "fisch",
+    "fleisch",
+    "gemuese",
+    "gulasch",
+    "haehnchen",
+    "hackfleisch",
+    "kaese",
+    "kartoffel",
+    "kloesse",
+    "knoedel",
+    "kohl",
+    "kuchen",
+    "lachs",
+    "linsen",
+    "mais",
+    "nudel",
+    "nudeln",
+    "pfanne",
+    "pilz",
+    "pilze",
+    "pudding",
+    "puten",
+    "reis",
+    "rind",
+    "rinder",
+    "salat",
+    "sauce",
+    "schnitzel",
+    "schwein",
+    "schweine",
+    "sosse",
+    "spaetzle",
+    "spinat",
+    "suppe",
+    "tomaten",
+    "wurst",
+    "zwiebel",
+}
+"""
+Common parts of german dish names, which get split off compound words, e.g. "kaesespaetzle" -> "kaese", "spaetzle".
+"""
+
+LINKING_ELEMENTS: Tuple[str, ...] = ("es", "en", "s", "n")
+
+MIN_PART_LENGTH: int = 3
+
+MAGIC: bytes = b"EATSRCH1"
+
+
+def fold(text: str) -> str:
+    # NFKC first, so umlauts consisting of two code points become a single one before they get folded
+    return unicodedata.normalize("NFKC", text).casefold().translate(UMLAUTS)
+
+
+def split_compound(word: str) -> List[str]:
+    """
+    Splits a folded word into known parts from its end, e.g. "kartoffelsuppe" -> ["kartoffel", "suppe"].
+    Words that do not end with a known part are returned as they are.
+    """
+    for end in range(MIN_PART_LENGTH, len(word) - MIN_PART_LENGTH + 1):
+        head, tail = word[:end], word[end:]
+        if tail not in COMPOUND_PARTS:
+            continue
+        for linking_element in LINKING_ELEMENTS:
+            # e.g. "schweinsbraten" -> "schwein", "braten"
+            if (
+                head not in COMPOUND_PARTS
+                and head.endswith(linking_element)
+                and head[: -len(linking_element)] in COMPOUND_PARTS
+            ):
+                head = head[: -len(linking_element)]
+                break
+        # the head may be a compound itself
+        return split_compound(head) + [tail]
+    return [word]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    :return: The folded words of the text followed by the parts of compound words
+    """
+    words = re.findall(r"\w+", fold(text))
+    parts = [part for word in words for part in split_compound(word) if part != word]
+    return words + parts
+
+
+class SearchResult(NamedTuple):
+    canteen_id: str
+    date: str
+    name: str
+
+    def to_json_obj(self):
+        return {"canteen_id": self.canteen_id, "date": self.date, "name": self.name}
+
+
+class SearchIndex:
+    """
+    Inverted index from the tokens of dish names to the dishes, which can be extended as new menus get parsed.
+    Every dish is identified by its canteen, date and name and only indexed once.
+    """
+
+    def __init__(self):
+        self.documents: List[SearchResult] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.__document_numbers: Dict[SearchResult, int] = {}
+        # sorted once before the next prefix query instead of on every added dish
+        self.__sorted_terms: List[str] = []
+
+    def add(self, canteen_id: str, date: str, name: str) -> bool:
+        """
+        :return: Whether the dish has not been indexed before
+        """
+        document = SearchResult(canteen_id, date, name)
+        if document in self.__document_numbers:
+            return False
+        number = self.add_document(document)
+        for term in set(tokenize(name)):
+            self.postings.setdefault(term, []).append(number)
+        return True
+
+    def add_document(self, document: SearchResult) -> int:
+        """
+        Adds the dish without indexing its name, e.g. as the postings of a saved index are loaded as they are.
+
+        :return: The number of the document
+        """
+        number = len(self.documents)
+        self.documents.append(document)
+        self.__document_numbers[document] = number
+        return number
+
+    def add_all_json(self, all_json: Dict[str, Any]) -> int:
+        """
+        :param all_json: Content of "all.json"
+        :return: Number of dishes that have not been indexed before
+        """
+        added = 0
+        for canteen in all_json.get("canteens", []):
+            for week in canteen.get("weeks", []):
+                for day in week.get("days", []):
+                    for dish in day.get("dishes", []):
+                        added += self.add(canteen.get("canteen_id"), day.get("date"), dish.get("name"))
+        return added
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def __terms(self) -> List[str]:
+        # terms never get removed, so the sorted terms are outdated if their number differs
+        if len(self.__sorted_terms) != len(self.postings):
+            self.__sorted_terms = sorted(self.postings)
+        return self.__sorted_terms
+
+    def search(self, query: str, prefix: bool = True) -> List[SearchResult]:
+        terms = self.__terms()
+        return [
+            self.documents[number]
+            for number in _search(terms, lambda term_number: self.postings[terms[term_number]], query, prefix)
+        ]
+
+    def save(self, path: str) -> None:
+        """
+        Writes the index in a binary format, which can be searched without reading it completely, see MappedSearchIndex.
+        All numbers are little-endian unsigned 32 bit integers:
+        magic, number of documents, number of terms, document offsets, term offsets, posting offsets,
+        documents (UTF-8, fields separated by "\\x1f"), terms (UTF-8), postings (document numbers)
+        """
+        documents = [("\x1f".join(document)).encode("utf-8") for document in self.documents]
+        terms = self.__terms()
+        encoded_terms = [term.encode("utf-8") for term in terms]
+        postings = [self.postings[term] for term in terms]
+        with open(path, "wb") as outfile:
+            outfile.write(MAGIC + struct.pack("<II", len(documents), len(terms)))
+            for items in (documents, encoded_terms):
+                outfile.write(_pack_offsets(len(item) for item in items))
+            outfile.write(_pack_offsets(len(posting) for posting in postings))
+            for items in (documents, encoded_terms):
+                outfile.write(b"".join(items))
+            for posting in postings:
+                outfile.write(struct.pack(f"<{len(posting)}I", *posting))
+
+    @staticmethod
+    def load(path: str) -> "SearchIndex":
+        """
+        Reads a saved index completely, e.g. to extend it.
+        """
+        index = SearchIndex()
+        with MappedSearchIndex(path) as mapped:
+            for number in range(len(mapped)):
+                index.add_document(mapped.document(number))
+            for number in range(mapped.term_count):
+                index.postings[mapped.term(number)] = mapped.posting(number)
+        return index
+
+
+class MappedSearchIndex:  # pylint: disable=too-many-instance-attributes
+    """
+    Read-only view of a saved SearchIndex, which is memory mapped instead of read, so searches can start right away.
+    Only the terms and postings that are needed to answer a query get touched.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as infile:
+            self.buffer = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buffer[: len(MAGIC)] != MAGIC:
+            self.buffer.close()
+            raise ValueError(f"'{path}' is not a search index.")
+        self.document_count, self.term_count = struct.unpack_from("<II", self.buffer, len(MAGIC))
+        self.__document_offsets = len(MAGIC) + 8
+        self.__term_offsets = self.__document_offsets + 4 * (self.document_count + 1)
+        self.__posting_offsets = self.__term_offsets + 4 * (self.term_count + 1)
+        self.__documents = self.__posting_offsets + 4 * (self.term_count + 1)
+        self.__terms = self.__documents + self.__offset(self.__document_offsets, self.document_count)
+        self.__postings = self.__terms + self.__offset(self.__term_offsets, self.term_count)
+
+    def __offset(self, table: int, number: int) -> int:
+        return int(struct.unpack_from("<I", self.buffer, table + 4 * number)[0])
+
+    def __len__(self) -> int:
+        return int(self.document_count)
+
+    def document(self, number: int) -> SearchResult:
+        start = self.__documents + self.__offset(self.__document_offsets, number)
+        end = self.__documents + self.__offset(self.__document_offsets, number + 1)
+        canteen_id, date, name = self.buffer[start:end].decode("utf-8").split("\x1f")
+        return SearchResult(canteen_id, date, name)
+
+    def term(self, number: int) -> str:
+        start = self.__terms + self.__offset(self.__term_offsets, number)
+        end = self.__terms + self.__offset(self.__term_offsets, number + 1)
+        return self.buffer[start:end].decode("utf-8")
+
+    def posting(self, number: int) -> List[int]:
+        start = self.__offset(self.__posting_offsets, number)
+        end = self.__offset(self.__posting_offsets, number + 1)
+        return list(struct.unpack_from(f"<{end - start}I", self.buffer, self.__postings + 4 * start))
+
+    def search(self, query: str, prefix: bool = True) -> List[SearchResult]:
+        # bisect only needs the length and the terms at single positions
+        terms = cast(Sequence[str], _LazyTerms(self))
+        return [self.document(number) for number in _search(terms, self.posting, query, prefix)]
+
+    def close(self) -> None:
+        self.buffer.close()
+
+    def __enter__(self) -> "MappedSearchIndex":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+class _LazyTerms:
+    """
+    Sorted sequence of the terms of a MappedSearchIndex, which decodes only the terms bisect looks at.
+    """
+
+    def __init__(self, index: MappedSearchIndex):
+        self.index = index
+
+    def __len__(self) -> int:
+        return int(self.index.term_count)
+
+    def __getitem__(self, number: int) -> str:
+        return self.index.term(number)
+
+
+def _pack_offsets(lengths: Iterable[int]) -> bytes:
+    offsets = [0]
+    for length in lengths:
+        offsets.append(offsets[-1] + length)
+    return struct.pack(f"<{len(offsets)}I", *offsets)
+
+
+def _search(
+    terms: Sequence[str],
+    get_posting: Callable[[int], List[int]],
+    query: str,
+    prefix: bool,
+) -> List[int]:
+    """
+    Intersects the postings of the query's words. With prefix set, the last word matches all terms starting with it.
+
+    :param terms: Sorted terms of the index
+    :param get_posting: Returns the document numbers of the term at the given position in terms
+    :return: Sorted numbers of the matching documents
+    """
+    words = re.findall(r"\w+", fold(query))
+    if not words:
+        return []
+    matches: Optional[Set[int]] = None
+    for position, word in enumerate(words):
+        start = bisect.bisect_left(terms, word)
+        if prefix and position == len(words) - 1:
+            end = bisect.bisect_left(terms, word + "\U0010ffff")
+        else:
+            end = start + 1 if start < len(terms) and terms[start] == word else start
+        numbers = {number for term_number in range(start, end) for number in get_posting(term_number)}
+        matches = numbers if matches is None else matches & numbers
+        if not matches:
+            return []
+    return sorted(matches or set())
+
+
+def write_index(base_dir: str, state_dir: str) -> int:
+    """
+    Adds the dishes of "all.json" in base_dir to the search index of the previous runs, which is kept in state_dir, and
+    copies the index to base_dir. Dishes stay searchable after they dropped out of "all.json".
+
+    :return: Number of newly indexed dishes
+    """
+    state_path = os.path.join(state_dir, INDEX_FILENAME)
+    index = SearchIndex.load(state_path) if os.path.exists(state_path) else SearchIndex()
+    added = index.add_all_json(file_util.load_json(os.path.join(base_dir, "all.json")))
+    if not os.path.exists(state_dir):
+        os.makedirs(state_dir)
+    index.save(state_path)
+    shutil.copyfile(state_path, os.path.join(base_dir, INDEX_FILENAME))
+    # suppress flake8 warning about "unnecessary variable assignment before return statement".
+    # reason: the index has to be saved after adding the dishes
+    return added  # noqa: R504
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: search.py OUTPUT_DIRECTORY STATE_DIRECTORY")
+        print("       search.py OUTPUT_DIRECTORY --query QUERY")
+        sys.exit(1)
+    if not os.path.exists(sys.argv[1]):
+        raise FileNotFoundError(f"There is no such directory '{sys.argv[1]}'.")
+    if sys.argv[2] == "--query":
+        # search the existing index, e.g. "python src/search.py dist --query käsesp"
+        with MappedSearchIndex(os.path.join(sys.argv[1], INDEX_FILENAME)) as search_index:
+            for result in search_index.search(" ".join(sys.argv[3:])):
+                print(f"{result.date} {result.canteen_id}: {result.name}")
+    else:
+        print(f"Indexed {write_index(sys.argv[1], sys.argv[2])} new dishes")
@@ -0,0 +1,332 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+from zoneinfo import ZoneInfo
+
+import entities
+import enum_json_creator
+from geo import CanteenLocator, get_default_registry
+from query import MenuIndex
+from utils import json_util
+
+# "all_ref.json" is served with the same content as "scripts/reformat.py" creates
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+import reformat  # noqa: E402 # pylint: disable=wrong-import-position,wrong-import-order
+
+JSON_CONTENT_TYPE: str = "application/json; charset=utf-8"
+# the opening hours of all canteens are given in their local time
+CANTEEN_TIMEZONE: ZoneInfo = ZoneInfo("Europe/Berlin")
+
+
+class Response:
+    """
+    Pre-encoded response body. It only gets compressed and hashed once it is needed the first time, which is when the
+    data is refreshed for the responses of a ResponseCache instead of per request.
+    """
+
+    def __init__(self, body: bytes, content_type: str = JSON_CONTENT_TYPE):
+        self.body = body
+        self.content_type = content_type
+        self.__gzip_body: Optional[bytes] = None
+        self.__digest: Optional[str] = None
+
+    def get_body(self, use_gzip: bool) -> bytes:
+        if not use_gzip:
+            return self.body
+        if self.__gzip_body is None:
+            self.__gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        return self.__gzip_body
+
+    def get_etag(self, use_gzip: bool) -> str:
+        if self.__digest is None:
+            self.__digest = hashlib.sha256(self.body).hexdigest()
+        # strong ETags have to differ between the encodings of a representation
+        return f'"{self.__digest}-gzip"' if use_gzip else f'"{self.__digest}"'
+
+
+class ResponseCache:
+    """
+    Immutable mapping from request paths to responses, together with the index for "/query" requests.
+    Refreshed data gets served by replacing the whole cache.
+    """
+
+    def __init__(self, bodies: Dict[str, bytes], index: Optional[MenuIndex] = None):
+        self.responses: Dict[str, Response] = {path: Response(body) for path, body in bodies.items()}
+        for response in self.responses.values():
+            response.get_body(use_gzip=True)
+            response.get_etag(use_gzip=True)
+        self.index = index
+
+    def get(self, path: str) -> Optional[Response]:
+        return self.responses.get(path)
+
+    def __len__(self) -> int:
+        return len(self.responses)
+
+
+def parse_query(query_string: str) -> Dict[str, Any]:
+    """
+    Converts the query string of a "/query" request into the arguments of MenuIndex.query, e.g.
+    "canteen=mensa-garching&from=2022-05-02&to=2022-05-02&labels=VEGAN&exclude=FISH&max_price=3".
+
+    :raises ValueError: If a parameter is unknown or cannot be parsed
+    """
+    arguments: Dict[str, Any] = {}
+    for key, values in parse_qs(query_string, strict_parsing=bool(query_string)).items():
+        items = [item for value in values for item in value.split(",") if item]
+        if key == "canteen":
+            arguments["canteen_ids"] = items
+        elif key in ("from", "to"):
+            arguments["start" if key == "from" else "end"] = date.fromisoformat(values[-1])
+        elif key in ("labels", "exclude"):
+            try:
+                labels = [entities.Label[item.upper()] for item in items]
+            except KeyError as e:
+                raise ValueError(f"Unknown label {e}") from e
+            arguments["include_labels" if key == "labels" else "exclude_labels"] = labels
+        elif key in ("min_price", "max_price"):
+            arguments[key] = float(values[-1])
+        elif key == "price_role":
+            arguments[key] = values[-1]
+        else:
+            raise ValueError(f"Unknown parameter '{key}'")
+    return arguments
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    :param accept_encoding: The Accept-Encoding header of a request, e.g. "gzip, deflate" or "gzip;q=0, identity"
+    :return: Whether the client accepts a gzip compressed response, that is with a quality above 0
+    """
+    qualities: Dict[str, float] = {}
+    for coding in accept_encoding.split(","):
+        name, _, parameters = coding.partition(";")
+        quality = 1.0
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def parse_time(value: str) -> datetime:
+    """
+    :param value: An ISO 8601 date and time, e.g. "2022-05-02T12:00", which is local time of the canteens without an
+                  offset
+    :return: The time in the timezone of the canteens
+    """
+    at = datetime.fromisoformat(value)
+    if at.tzinfo is None:
+        return at.replace(tzinfo=CANTEEN_TIMEZONE)
+    return at.astimezone(CANTEEN_TIMEZONE)
+
+
+def parse_nearest(query_string: str) -> Dict[str, Any]:
+    """
+    Converts the query string of a "/nearest" request into the arguments of CanteenLocator.nearest_open, e.g.
+    "lat=48.26&lon=11.67&k=3&labels=VEGETARIAN&at=2022-05-02T12:00". Without at, the current time is used.
+
+    :raises ValueError: If a parameter is unknown, missing or cannot be parsed
+    """
+    parameters = {key: values[-1] for key, values in parse_qs(query_string, strict_parsing=bool(query_string)).items()}
+    unknown = set(parameters) - {"lat", "lon", "k", "at", "labels"}
+    if unknown:
+        raise ValueError(f"Unknown parameter '{unknown.pop()}'")
+    if "lat" not in parameters or "lon" not in parameters:
+        raise ValueError("The parameters 'lat' and 'lon' are required")
+    try:
+        labels = [entities.Label[label.upper()] for label in parameters.get("labels", "").split(",") if label]
+    except KeyError as e:
+        raise ValueError(f"Unknown label {e}") from e
+    return {
+        "latitude": float(parameters["lat"]),
+        "longitude": float(parameters["lon"]),
+        "k": int(parameters.get("k", "3")),
+        "at": parse_time(parameters["at"]) if "at" in parameters else datetime.now(CANTEEN_TIMEZONE),
+        "labels": labels,
+    }
+
+
+def build_bodies(canteen_outputs: Dict[str, Dict[str, bytes]]) -> Dict[str, bytes]:
+    """
+    Assembles the files of a language's output directory in memory.
+
+    :param canteen_outputs: For every canteen id, the outputs of main.get_json_outputs with combine_dishes set
+    :return: Mapping from request paths to response bodies
+    """
+    bodies: Dict[str, bytes] = {}
+    combined_jsons: List[bytes] = []
+    for canteen_id, outputs in canteen_outputs.items():
+        for path, content in outputs.items():
+            bodies[f"/{canteen_id}/{path}"] = content
+        if "combined/combined.json" in outputs:
+            combined_jsons.append(outputs["combined/combined.json"])
+    bodies["/all.json"] = b'{"canteens":' + json_util.splice_json_array(combined_jsons) + b"}"
+    bodies["/all_ref.json"] = json_util.to_json_bytes(reformat.get_all_ref(json.loads(bodies["/all.json"])))
+    today = date.today()
+    for filename, day in (("today.json", today), ("tomorrow.json", today + timedelta(days=1))):
+        day_path = f"days/{day.isoformat()}.json"
+        day_jsons = [outputs[day_path] for outputs in canteen_outputs.values() if day_path in outputs]
+        bodies[f"/{filename}"] = json_util.splice_json_object(
+            {"date": json_util.to_json_bytes(day.isoformat()), "canteens": json_util.splice_json_array(day_jsons)},
+        )
+    enum_types = {entities.Canteen: "canteens.json", entities.Label: "labels.json", entities.Language: "languages.json"}
+    for enum_type, filename in enum_types.items():
+        bodies[f"/enums/{filename}"] = enum_json_creator.enum_to_api_representation_dict(list(enum_type)).encode()
+    return bodies
+
+
+class ApiServer(ThreadingHTTPServer):
+    """
+    Serves the API from memory. Every language has its own cache, which is addressed by the language's base_url as
+    path prefix, e.g. "/en/all.json". The german output is served without a prefix.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], locator: Optional[CanteenLocator] = None):
+        super().__init__(address, ApiRequestHandler)
+        self.caches: Dict[str, ResponseCache] = {}
+        self.locator = locator or CanteenLocator(get_default_registry())
+
+    def update(self, language_prefix: str, cache: ResponseCache) -> None:
+        """
+        :param language_prefix: The language's base_url, e.g. "en/", or "" for the german output
+        """
+        # requests that are in flight keep the cache they already got, new requests get the new one
+        caches = dict(self.caches)
+        caches[language_prefix.strip("/")] = cache
+        self.caches = caches
+
+    def refresh(self, scrape: Callable[[], Dict[str, Tuple[Dict[str, Dict[str, bytes]], MenuIndex]]]) -> None:
+        """
+        :param scrape: Parses all canteens and returns their outputs per canteen id and the index of their dishes for
+                       every language's base_url, like main.scrape_all_canteens
+        """
+        for language_prefix, (canteen_outputs, index) in scrape().items():
+            self.update(language_prefix, ResponseCache(build_bodies(canteen_outputs), index))
+
+    def resolve(self, path: str) -> Tuple[Optional[ResponseCache], str]:
+        """
+        :return: The cache of the language the path belongs to and the path within the language's output
+        """
+        caches = self.caches
+        prefix, _, rest = path.lstrip("/").partition("/")
+        if prefix and prefix in caches:
+            return caches[prefix], f"/{rest}"
+        return caches.get(""), path
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    server: ApiServer
+
+    def do_GET(self) -> None:  # noqa: N802
+        self.__respond(send_body=True)
+
+    def do_HEAD(self) -> None:  # noqa: N802
+        self.__respond(send_body=False)
+
+    def __respond(self, send_body: bool) -> None:
+        path, _, query_string = self.path.partition("?")
+        cache, path = self.server.resolve(path)
+        response = None
+        if cache is not None and path == "/query" and cache.index is not None:
+            try:
+                entries = cache.index.query(**parse_query(query_string))
+            except ValueError as e:
+                self.send_error(400, explain=str(e))
+                return
+            response = Response(json_util.to_json_bytes([entry.to_json_obj() for entry in entries]))
+        elif cache is not None and path == "/nearest":
+            try:
+                nearest = self.server.locator.nearest_open(index=cache.index, **parse_nearest(query_string))
+            except ValueError as e:
+                self.send_error(400, explain=str(e))
+                return
+            response = Response(
+                json_util.to_json_bytes(
+                    [{**site.to_json_obj(), "distance_km": round(distance, 3)} for site, distance in nearest],
+                ),
+            )
+        elif cache is not None:
+            response = cache.get(path)
+        if response is None:
+            self.send_error(404)
+            return
+        use_gzip = accepts_gzip(self.headers.get("Accept-Encoding", ""))
+        etag = response.get_etag(use_gzip)
+        if self.__is_not_modified(etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+        body = response.get_body(use_gzip)
+        self.send_response(200)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def __is_not_modified(self, etag: str) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is None:
+            return False
+        # If-None-Match uses the weak comparison
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+def serve(
+    scrape: Callable[[], Dict[str, Tuple[Dict[str, Dict[str, bytes]], MenuIndex]]],
+    host: str,
+    port: int,
+    refresh_interval: float,
+    locator: Optional[CanteenLocator] = None,
+) -> None:
+    """
+    Serves the API until interrupted and refreshes the data periodically.
+
+    :param locator: Answers "/nearest" requests, by default for the canteens of the Canteen enum
+    :param scrape: See ApiServer.refresh
+    """
+    server = ApiServer((host, port), locator)
+
+    def refresh_periodically() -> None:
+        while not stopped.wait(refresh_interval):
+            try:
+                server.refresh(scrape)
+            except Exception as e:  # pylint: disable=broad-except
+                # keep serving the previous data
+                print(f"Warning: Refreshing the data failed: {e}")
+
+    server.refresh(scrape)
+    stopped = threading.Event()
+    threading.Thread(target=refresh_periodically, daemon=True).start()
+    print(f"Serving the API on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stopped.set()
+        server.server_close()
@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+from datetime import date
+from unittest import TestCase
+
+import numpy as np
+
+from src.analytics import MenuArrays, _factorize_rows, compute_analytics, write_analytics
+from src.archive import MenuArchive
+from src.entities import Canteen, Dish, Label, Menu, Price, Prices
+
+
+class AnalyticsTest(TestCase):
+    def setUp(self):
+        curry = Dish(
+            "Gemüsecurry",
+            Prices(Price(2.0), Price(3.0), Price(4.0)),
+            {Label.VEGAN, Label.VEGETARIAN},
+            "Tagesgericht",
+        )
+        schnitzel = Dish("Schnitzel", Prices(Price(4.0)), {Label.PORK}, "Tagesgericht")
+        salad = Dish("Salatbuffet", Prices(Price(None, 0.9, "100g")), {Label.VEGETARIAN}, "Salat")
+        self.menus = {
+            "mensa-garching": {
+                date(2022, 4, 29): Menu(date(2022, 4, 29), [curry, schnitzel]),
+                date(2022, 5, 2): Menu(date(2022, 5, 2), [curry, salad]),
+                date(2022, 5, 9): Menu(date(2022, 5, 9), [curry]),
+            },
+            "mensa-arcisstr": {date(2022, 5, 2): Menu(date(2022, 5, 2), [schnitzel, curry])},
+        }
+
+    def test_should_aggregate_prices_labels_and_repetitions(self):
+        analytics = compute_analytics(MenuArrays.from_menus(self.menus))
+
+        garching = analytics["price_trends.json"]["mensa-garching"]
+        self.assertEqual(garching["2022-04"], {"students": 3.0, "staff": 3.5, "guests": 4.0, "dishes": 2})
+        # the salad has no base price
+        self.assertEqual(garching["2022-05"], {"students": 2.0, "staff": 3.0, "guests": 4.0, "dishes": 3})
+        self.assertEqual(analytics["dish_type_price_trends.json"]["Salat"]["2022-05"]["students"], None)
+
+        self.assertEqual(
+            analytics["label_shares.json"]["mensa-garching"],
+            {"dishes": 5, "vegan": 0.6, "vegetarian": 0.8},
+        )
+        self.assertEqual(analytics["label_shares.json"]["mensa-arcisstr"]["vegetarian"], 0.5)
+
+        repetitions = analytics["repetitions.json"]
+        self.assertEqual(repetitions["dishes"], 3)
+        self.assertEqual(repetitions["servings_per_dish"], {"1": 1, "2": 1, "4": 1})
+        # curry: 3 and 7 days, schnitzel: 3 days, the same day in another canteen does not count
+        self.assertEqual(repetitions["days_between_servings"], {"mean": 4.33, "median": 3.0})
+        self.assertEqual(repetitions["most_served"][0], {"name": "Gemüsecurry", "servings": 4})
+
+    def test_should_load_archive(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with MenuArchive(os.path.join(directory, "archive.sqlite3")) as archive:
+                archive.add_menus(Canteen.MENSA_GARCHING, self.menus["mensa-garching"])
+                archive.add_menus(Canteen.MENSA_ARCISSTR, self.menus["mensa-arcisstr"])
+                arrays = MenuArrays.from_archive(archive)
+            self.assertEqual(compute_analytics(arrays), compute_analytics(MenuArrays.from_menus(self.menus)))
+
+            write_analytics(arrays, directory)
+            with open(os.path.join(directory, "analytics", "label_shares.json"), encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["mensa-garching"]["vegan"], 0.6)
+
+    def test_should_only_load_dishes_served_in_period(self):
+        april = {"mensa-garching": {date(2022, 4, 29): self.menus["mensa-garching"][date(2022, 4, 29)]}}
+        with tempfile.TemporaryDirectory() as directory:
+            with MenuArchive(os.path.join(directory, "archive.sqlite3")) as archive:
+                archive.add_menus(Canteen.MENSA_GARCHING, self.menus["mensa-garching"])
+                arrays = MenuArrays.from_archive(archive, end=date(2022, 4, 30))
+        # the salad is in the archive, but not served in April
+        self.assertEqual(sorted(arrays.dish_names), ["Gemüsecurry", "Schnitzel"])
+        self.assertEqual(arrays.dish_types, ["Tagesgericht"])
+        self.assertEqual(compute_analytics(arrays), compute_analytics(MenuArrays.from_menus(april)))
+
+    def test_should_factorize_rows_with_missing_prices_as_equal(self):
+        codes = _factorize_rows(np.array([0, 0, 1]), np.array([np.nan, np.nan, np.nan]), np.array([1.0, 1.0, 1.0]))
+        self.assertEqual(codes.tolist(), [0, 0, 1])
@@ -0,0 +1,85 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import TestCase
+
+from src.archive import MenuArchive, regenerate
+from src.entities import Canteen, Dish, Label, Menu, Price, Prices, Week
+
+
+class MenuArchiveTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.archive = MenuArchive(os.path.join(self.directory, "archive.sqlite3"))
+        self.curry = Dish("Gemüsecurry", Prices(Price(2.5), Price(3.5), Price(4.5)), {Label.VEGAN}, "Tagesgericht")
+        self.schnitzel = Dish("Schnitzel", Prices(Price(3.2, 1.0, "100g")), {Label.PORK, Label.GLUTEN}, "Aktion")
+        self.menus = {
+            date(2021, 12, 27): Menu(date(2021, 12, 27), [self.curry, self.schnitzel]),
+            date(2022, 1, 3): Menu(date(2022, 1, 3), [self.schnitzel]),
+        }
+        self.archive.add_menus(Canteen.MENSA_GARCHING, self.menus)
+
+    def tearDown(self):
+        self.archive.close()
+
+    def test_should_return_archived_menus(self):
+        menus = self.archive.get_menus("mensa-garching")
+        self.assertEqual(
+            {str(menu_date): menu.to_json_obj() for menu_date, menu in menus.items()},
+            {str(menu_date): menu.to_json_obj() for menu_date, menu in self.menus.items()},
+        )
+        self.assertEqual(list(self.archive.get_menus("mensa-garching", start=date(2022, 1, 1))), [date(2022, 1, 3)])
+        self.assertEqual(self.archive.get_menus("mensa-leopoldstr"), {})
+
+    def test_should_keep_latest_menu_and_deduplicate_dishes(self):
+        # the menu of a day changed between two runs
+        self.archive.add_menus(Canteen.MENSA_GARCHING, {date(2022, 1, 3): Menu(date(2022, 1, 3), [self.curry])})
+        self.archive.add_menus(Canteen.MENSA_ARCISSTR, {date(2022, 1, 3): Menu(date(2022, 1, 3), [self.curry])})
+
+        menus = self.archive.get_menus("mensa-garching")
+        self.assertEqual([dish.name for dish in menus[date(2022, 1, 3)].dishes], ["Gemüsecurry"])
+        self.assertEqual([dish.name for dish in menus[date(2021, 12, 27)].dishes], ["Gemüsecurry", "Schnitzel"])
+        (dish_count,) = self.archive.connection.execute("SELECT COUNT(*) FROM dishes").fetchone()
+        self.assertEqual(dish_count, 2)
+        # the schnitzel has been seen on January 3rd nevertheless
+        self.assertIn(
+            ("mensa-garching", date(2022, 1, 3), "Schnitzel"),
+            self.archive.find_dishes(Label.PORK),
+        )
+        self.assertEqual(
+            self.archive.find_dishes(Label.VEGAN, start=date(2022, 1, 1)),
+            [
+                ("mensa-arcisstr", date(2022, 1, 3), "Gemüsecurry"),
+                ("mensa-garching", date(2022, 1, 3), "Gemüsecurry"),
+            ],
+        )
+
+    def test_should_keep_dish_served_twice_on_a_menu(self):
+        menu = Menu(date(2022, 1, 4), [self.curry, self.schnitzel, self.curry])
+        self.archive.add_menus(Canteen.MENSA_GARCHING, {date(2022, 1, 4): menu})
+        self.archive.add_menus(Canteen.MENSA_GARCHING, {date(2022, 1, 4): menu})
+
+        menus = self.archive.get_menus("mensa-garching", start=date(2022, 1, 4))
+        self.assertEqual(
+            [dish.name for dish in menus[date(2022, 1, 4)].dishes],
+            ["Gemüsecurry", "Schnitzel", "Gemüsecurry"],
+        )
+
+    def test_should_regenerate_weeks(self):
+        week = self.archive.get_week("mensa-garching", 2021, 52)
+        assert week is not None
+        self.assertEqual(
+            week.to_json_obj(),
+            Week.to_weeks({date(2021, 12, 27): self.menus[date(2021, 12, 27)]})[52].to_json_obj(),
+        )
+        self.assertIsNone(self.archive.get_week("mensa-garching", 2022, 2))
+
+        out_dir = os.path.join(self.directory, "dist")
+        self.assertEqual(regenerate(self.archive, out_dir), 2)
+        with open(os.path.join(out_dir, "mensa-garching", "2022", "01.json"), encoding="utf-8") as f:
+            week_json = json.load(f)
+        self.assertEqual(week_json["days"][0]["dishes"][0]["name"], "Schnitzel")
+        self.assertTrue(os.path.exists(os.path.join(out_dir, "mensa-garching", "2021", "52.json")))
@@ -0,0 +1,38 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import msgpack
+
+from src import binary_converter
+from src.entities import Label
+from src.utils import file_util
+
+
+class BinaryConverterTest(TestCase):
+    dish_json = {
+        "name": "Gulasch vom Schwein",
+        "prices": {
+            "students": {"base_price": 1.9, "price_per_unit": 0.85, "unit": "100g"},
+            "staff": None,
+            "guests": {"base_price": None, "price_per_unit": None, "unit": None},
+        },
+        "labels": ["PORK", "GLUTEN"],
+        "dish_type": "Tagesgericht",
+    }
+
+    def test_should_encode_labels_and_prices(self):
+        binary_obj = binary_converter.to_binary_obj({"weeks": [{"days": [{"dishes": [self.dish_json]}]}]})
+        dish = binary_obj["weeks"][0]["days"][0]["dishes"][0]
+        self.assertEqual(dish["labels"], [list(Label).index(Label.PORK), list(Label).index(Label.GLUTEN)])
+        self.assertEqual(dish["prices"]["students"], {"base_price": 190, "price_per_unit": 85, "unit": "100g"})
+        self.assertIsNone(dish["prices"]["staff"])
+        self.assertEqual(dish["prices"]["guests"], {"base_price": None, "price_per_unit": None, "unit": None})
+        self.assertEqual(dish["name"], "Gulasch vom Schwein")
+
+    def test_should_write_binary_twin(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_util.write_json(os.path.join(temp_dir, "combined.json"), {"dishes": [self.dish_json]})
+            self.assertEqual(binary_converter.convert_directory(temp_dir), 1)
+            with open(os.path.join(temp_dir, "combined.msgpack"), "rb") as f:
+                self.assertEqual(msgpack.unpackb(f.read())["dishes"][0]["prices"]["students"]["base_price"], 190)
@@ -0,0 +1,124 @@
+import datetime
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional
+from unittest import TestCase
+
+from src.changes import diff_all, diff_day, write_changes
+
+
+def _dish(name, price=2.5, labels=("VEGETARIAN",)):
+    return {
+        "name": name,
+        "prices": {"students": {"base_price": price, "price_per_unit": None, "unit": None}},
+        "labels": list(labels),
+        "dish_type": "Tagesgericht",
+    }
+
+
+def _canteen(days, canteen_id="mensa-garching"):
+    return {
+        "canteen_id": canteen_id,
+        "weeks": [{"number": 18, "year": 2022, "days": [{"date": date, "dishes": dishes} for date, dishes in days]}],
+    }
+
+
+def _all_json(days):
+    return {"canteens": [_canteen(days)]}
+
+
+def _write_all_json(base_dir, all_json):
+    with open(os.path.join(base_dir, "all.json"), "w", encoding="utf-8") as outfile:
+        json.dump(all_json, outfile)
+
+
+class ChangesTest(TestCase):
+    def test_should_diff_day(self):
+        previous = [_dish("Käsespätzle"), _dish("Pizza"), _dish("Suppe")]
+        current = [_dish("Käsespätzle"), _dish("Pizza", price=3.0), _dish("Salat")]
+        self.assertEqual(
+            diff_day(previous, current),
+            {
+                "added": [_dish("Salat")],
+                "removed": [_dish("Suppe")],
+                "modified": [{"before": _dish("Pizza"), "after": _dish("Pizza", price=3.0)}],
+            },
+        )
+
+    def test_should_match_unchanged_dish_with_same_name(self):
+        previous = [_dish("Pizza", labels=("VEGAN",)), _dish("Pizza")]
+        current = [_dish("Pizza")]
+        self.assertEqual(diff_day(previous, current)["modified"], [])
+        self.assertEqual(diff_day(previous, current)["removed"], [_dish("Pizza", labels=("VEGAN",))])
+
+    def test_should_skip_expired_days(self):
+        previous = _all_json([("2022-05-02", [_dish("Pizza")]), ("2022-05-04", [_dish("Suppe")])])
+        current = _all_json([("2022-05-04", [_dish("Suppe")]), ("2022-05-05", [_dish("Salat")])])
+        changes = diff_all(previous, current, datetime.date(2022, 5, 3))
+        self.assertEqual(list(changes["mensa-garching"]), ["2022-05-05"])
+        self.assertEqual(changes["mensa-garching"]["2022-05-05"]["added"], [_dish("Salat")])
+        # a day that vanished before it was over is reported
+        changes = diff_all(previous, current, datetime.date(2022, 5, 2))
+        self.assertEqual(changes["mensa-garching"]["2022-05-02"]["removed"], [_dish("Pizza")])
+
+    def test_should_skip_canteens_missing_in_current_run(self):
+        previous = {"canteens": [_canteen([("2022-05-04", [_dish("Pizza")])], "mensa-arcisstr"), _canteen([])]}
+        current = {"canteens": [_canteen([("2022-05-04", [_dish("Suppe")])])]}
+        changes = diff_all(previous, current, datetime.date(2022, 5, 3))
+        self.assertEqual(list(changes), ["mensa-garching"])
+
+    def test_should_write_changes_and_index(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base_dir = os.path.join(temp_dir, "dist")
+            state_dir = os.path.join(temp_dir, "state")
+            os.makedirs(base_dir)
+            first = datetime.datetime(2022, 5, 2, 9, tzinfo=datetime.timezone.utc)
+
+            _write_all_json(base_dir, _all_json([("2022-05-02", [_dish("Pizza")])]))
+            self.assertIsNone(write_changes(base_dir, state_dir, first))
+            # nothing changed
+            self.assertIsNone(write_changes(base_dir, state_dir, first + datetime.timedelta(hours=1)))
+
+            _write_all_json(base_dir, _all_json([("2022-05-02", [_dish("Pizza"), _dish("Salat")])]))
+            path = write_changes(base_dir, state_dir, first + datetime.timedelta(hours=12))
+            self.assertEqual(path, os.path.join(base_dir, "changes", "20220502T210000Z.json"))
+            changes = self.__load(path)
+            # the previous runs did not write a change file
+            self.assertIsNone(changes["previous"])
+            self.assertEqual(changes["canteens"]["mensa-garching"]["2022-05-02"]["added"], [_dish("Salat")])
+
+            index = self.__load(os.path.join(base_dir, "changes", "latest.json"))
+            self.assertEqual(index["latest"], "20220502T210000Z")
+            self.assertEqual(
+                index["changes"],
+                [{"timestamp": "20220502T210000Z", "file": "changes/20220502T210000Z.json", "dishes": 1}],
+            )
+
+            self.assertIsNone(write_changes(base_dir, state_dir, first + datetime.timedelta(hours=13)))
+            _write_all_json(base_dir, _all_json([("2022-05-02", [_dish("Salat")])]))
+            changes = self.__load(write_changes(base_dir, state_dir, first + datetime.timedelta(hours=14)))
+            self.assertEqual(changes["previous"], "20220502T210000Z")
+
+    def test_should_keep_state_of_canteens_missing_in_current_run(self):
+        garching = _canteen([("2022-05-04", [_dish("Pizza")])])
+        arcisstr = _canteen([("2022-05-04", [_dish("Suppe")])], "mensa-arcisstr")
+        now = datetime.datetime(2022, 5, 2, 9, tzinfo=datetime.timezone.utc)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base_dir = os.path.join(temp_dir, "dist")
+            state_dir = os.path.join(temp_dir, "state")
+            os.makedirs(base_dir)
+            _write_all_json(base_dir, {"canteens": [garching, arcisstr]})
+            write_changes(base_dir, state_dir, now)
+            # mensa-arcisstr failed to parse, which is neither a removal now nor an addition later
+            _write_all_json(base_dir, {"canteens": [garching]})
+            self.assertIsNone(write_changes(base_dir, state_dir, now + datetime.timedelta(hours=1)))
+            _write_all_json(base_dir, {"canteens": [garching, arcisstr]})
+            self.assertIsNone(write_changes(base_dir, state_dir, now + datetime.timedelta(hours=2)))
+
+    @staticmethod
+    def __load(path: Optional[str]) -> Dict[str, Any]:
+        assert path is not None
+        with open(path, encoding="utf-8") as infile:
+            content: Dict[str, Any] = json.load(infile)
+        return content
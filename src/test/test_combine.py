@@ -0,0 +1,72 @@
+import datetime
+import json
+import os
+import shutil
+import sys
+import tempfile
+from typing import Any, Dict
+from unittest import TestCase, mock
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "scripts"))
+import combine  # noqa: E402 # pylint: disable=wrong-import-position
+
+
+class CombineTest(TestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        # get_combined_bytes changes the working directory
+        self.addCleanup(os.chdir, os.getcwd())
+        self.directory = os.path.join(tmp, "en")
+        self.today = datetime.date.today()
+        self.tomorrow = self.today + datetime.timedelta(days=1)
+
+        # mensa-arcisstr only serves today, ipp-bistro neither today nor tomorrow
+        self.garching_today = {"canteen_id": "mensa-garching", "dishes": [{"name": "Käsespätzle"}]}
+        self.garching_tomorrow = {"canteen_id": "mensa-garching", "dishes": [{"name": "Gemüsecurry"}]}
+        self.arcisstr_today = {"canteen_id": "mensa-arcisstr", "dishes": []}
+        self.__write("mensa-garching/days", self.today, self.garching_today)
+        self.__write("mensa-garching/days", self.tomorrow, self.garching_tomorrow)
+        self.__write("mensa-arcisstr/days", self.today, self.arcisstr_today)
+        self.__write("ipp-bistro/days", self.today - datetime.timedelta(days=1), {"canteen_id": "ipp-bistro"})
+        for canteen_id in ("mensa-garching", "mensa-arcisstr", "ipp-bistro"):
+            self.__write(f"{canteen_id}/combined", "combined", {"canteen_id": canteen_id})
+
+    def __write(self, directory: str, name: Any, content: Dict[str, Any]) -> None:
+        path = os.path.join(self.directory, directory)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(content, f, ensure_ascii=False)
+
+    def __read(self, name: str) -> Dict[str, Any]:
+        with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+            content: Dict[str, Any] = json.load(f)
+        return content
+
+    def test_should_splice_days_of_canteens_serving_on_date(self):
+        self.assertEqual(
+            json.loads(combine.get_day_bytes(self.directory, self.today)),
+            {"date": self.today.isoformat(), "canteens": [self.arcisstr_today, self.garching_today]},
+        )
+        nobody_serves = self.today + datetime.timedelta(days=2)
+        self.assertEqual(
+            json.loads(combine.get_day_bytes(self.directory, nobody_serves)),
+            {"date": nobody_serves.isoformat(), "canteens": []},
+        )
+
+    def test_should_write_all_today_and_tomorrow(self):
+        with mock.patch.object(sys, "argv", ["combine.py", self.directory]):
+            combine.main()
+
+        self.assertEqual(
+            self.__read("today.json"),
+            {"date": self.today.isoformat(), "canteens": [self.arcisstr_today, self.garching_today]},
+        )
+        self.assertEqual(
+            self.__read("tomorrow.json"),
+            {"date": self.tomorrow.isoformat(), "canteens": [self.garching_tomorrow]},
+        )
+        self.assertEqual(
+            sorted(canteen["canteen_id"] for canteen in self.__read("all.json")["canteens"]),
+            ["ipp-bistro", "mensa-arcisstr", "mensa-garching"],
+        )
@@ -0,0 +1,48 @@
+import json
+from datetime import date
+from unittest import TestCase
+
+from src import dish_catalog
+from src.entities import Dish, Label, Menu, Price, Prices, Week
+
+
+class DishCatalogTest(TestCase):
+    def test_should_deduplicate_dishes_across_canteens(self):
+        fries = Dish("Pommes frites", Prices(Price(1.2)), {Label.VEGAN}, "Beilagen")
+        spaetzle = Dish("Käsespätzle", Prices(Price(2.5)), {Label.VEGETARIAN}, "Tagesgericht")
+        weeks_a = Week.to_weeks({date(2022, 4, 19): Menu(date(2022, 4, 19), [fries, spaetzle])})
+        weeks_b = Week.to_weeks({date(2022, 4, 20): Menu(date(2022, 4, 20), [fries])})
+        all_json = {
+            "canteens": [
+                {
+                    "version": "2.1",
+                    "canteen_id": "a",
+                    "weeks": [json.loads(w.to_json_fragment()) for w in weeks_a.values()],
+                },
+                {
+                    "version": "2.1",
+                    "canteen_id": "b",
+                    "weeks": [json.loads(w.to_json_fragment()) for w in weeks_b.values()],
+                },
+            ],
+        }
+
+        catalog, compact_canteens = dish_catalog.build_catalog(all_json)
+
+        self.assertEqual(set(catalog), {fries.content_id(), spaetzle.content_id()})
+        self.assertEqual(catalog[fries.content_id()], fries.to_json_obj())
+        self.assertEqual(
+            compact_canteens[0]["weeks"][0]["days"][0]["dishes"],
+            [fries.content_id(), spaetzle.content_id()],
+        )
+        self.assertEqual(
+            compact_canteens[1]["weeks"][0]["days"][0],
+            {"date": "2022-04-20", "dishes": [fries.content_id()]},
+        )
+
+    def test_should_derive_id_from_content_only(self):
+        dish = Dish("Pommes frites", Prices(Price(1.2)), {Label.VEGAN, Label.VEGETARIAN}, "Beilagen")
+        same_dish = Dish("Pommes frites", Prices(Price(1.2)), {Label.VEGETARIAN, Label.VEGAN}, "Beilagen")
+        other_dish = Dish("Pommes frites", Prices(Price(1.3)), {Label.VEGAN, Label.VEGETARIAN}, "Beilagen")
+        self.assertEqual(dish.content_id(), same_dish.content_id())
+        self.assertNotEqual(dish.content_id(), other_dish.content_id())
@@ -0,0 +1,48 @@
+import json
+from datetime import date
+from unittest import TestCase
+
+from src.entities import Dish, Label, Menu, Price, Prices, Week
+
+
+class JsonFragmentTest(TestCase):
+    @staticmethod
+    def __get_week() -> Week:
+        dish1 = Dish("Käsespätzle", Prices(Price(2.5)), {Label.VEGETARIAN, Label.MILK}, "Tagesgericht")
+        dish2 = Dish("Pommes frites", Prices(Price(1.2)), {Label.VEGAN}, "Beilagen")
+        menus = {
+            date(2021, 9, 13): Menu(date(2021, 9, 13), [dish1, dish2]),
+            date(2021, 9, 14): Menu(date(2021, 9, 14), [dish2]),
+        }
+        return Week.to_weeks(menus)[37]
+
+    def test_should_serialize_fragment_like_json_obj(self):
+        week = self.__get_week()
+        self.assertEqual(week.to_json_obj(), json.loads(week.to_json_fragment()))
+        for menu in week.days:
+            self.assertEqual(menu.to_json_obj(), json.loads(menu.to_json_fragment()))
+
+    def test_should_reuse_cached_fragment(self):
+        week = self.__get_week()
+        self.assertIs(week.to_json_fragment(), week.to_json_fragment())
+        dish = week.days[0].dishes[0]
+        self.assertIs(dish.to_json_fragment(), dish.to_json_fragment())
+
+    def test_should_invalidate_fragment_when_dish_changes(self):
+        week = self.__get_week()
+        week.to_json_fragment()
+        week.days[0].dishes[0].name = "Cheese spaetzle"
+        week.days[1].dishes.append(Dish("Salat", Prices(), set(), "Salat"))
+        self.assertEqual(week.to_json_obj(), json.loads(week.to_json_fragment()))
+        self.assertIn(b"Cheese spaetzle", week.to_json_fragment())
+        self.assertIn(b"Salat", week.to_json_fragment())
+
+    def test_should_rebuild_fragment_after_invalidation(self):
+        week = self.__get_week()
+        fragment = week.to_json_fragment()
+        dish = week.days[0].dishes[0]
+        dish.prices.set_base_price(2.8)
+        self.assertIs(week.to_json_fragment(), fragment)
+        dish.invalidate_json_fragment()
+        self.assertIsNot(week.to_json_fragment(), fragment)
+        self.assertEqual(week.to_json_obj(), json.loads(week.to_json_fragment()))
@@ -0,0 +1,79 @@
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TypeVar
+from unittest import TestCase
+
+import requests
+
+from src.replay_server import ReplayServer
+from src.utils import fetch
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # noqa: N802
+        if self.path != "/speiseplan.html":
+            self.send_error(404)
+            return
+        body = "<p>Käsespätzle</p>".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+Server = TypeVar("Server", bound=ThreadingHTTPServer)
+
+
+def start(server: Server) -> Server:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class FetchReplayTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        origin = start(ThreadingHTTPServer(("127.0.0.1", 0), OriginHandler))
+        self.origin_url = f"http://127.0.0.1:{origin.server_address[1]}"
+        fetch.record(self.directory)
+        try:
+            fetch.get(f"{self.origin_url}/speiseplan.html")
+            fetch.get(f"{self.origin_url}/KW99.csv")
+        finally:
+            fetch.reset()
+            origin.shutdown()
+            origin.server_close()
+
+    def tearDown(self):
+        fetch.reset()
+
+    def assert_replayed(self):
+        page = fetch.get(f"{self.origin_url}/speiseplan.html")
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(page.text, "<p>Käsespätzle</p>")
+        self.assertEqual(page.url, f"{self.origin_url}/speiseplan.html")
+        # error responses are replayed as well, e.g. the end of the Straubing week loop
+        self.assertEqual(fetch.get(f"{self.origin_url}/KW99.csv").status_code, 404)
+        with self.assertRaises(requests.ConnectionError):
+            fetch.get(f"{self.origin_url}/KW100.csv")
+
+    def test_should_replay_from_directory(self):
+        with self.assertRaises(requests.ConnectionError):
+            fetch.get(f"{self.origin_url}/speiseplan.html")
+        fetch.replay(self.directory)
+        self.assert_replayed()
+
+    def test_should_replay_from_server(self):
+        server = start(ReplayServer(("127.0.0.1", 0), fetch.Recordings(self.directory)))
+        try:
+            fetch.replay(server.url)
+            self.assert_replayed()
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,107 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from unittest import TestCase
+
+import requests
+
+from src.utils.fetch_scheduler import CircuitBreaker, CircuitOpenError, DeadlineExceeded, FetchScheduler
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    # answers "/flaky" with 503 until it has been requested three times
+    requests_per_path: Dict[str, int] = {}
+
+    def do_GET(self):  # noqa: N802
+        count = self.requests_per_path[self.path] = self.requests_per_path.get(self.path, 0) + 1
+        if self.path == "/slow":
+            time.sleep(0.5)
+        if self.path == "/flaky" and count < 3 or self.path == "/down":
+            self.send_error(503)
+            return
+        if self.path == "/missing":
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def send(url, timeout):
+    return requests.get(url, timeout=timeout)
+
+
+class FetchSchedulerTest(TestCase):
+    def setUp(self):
+        FlakyHandler.requests_per_path = {}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_should_retry_transient_errors(self):
+        scheduler = FetchScheduler(deadline=10.0, base_backoff=0.01)
+        response = scheduler.get(f"{self.url}/flaky", 1.0, send)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(scheduler.retries, 2)
+        # client errors are answers, which do not change with another try
+        self.assertEqual(scheduler.get(f"{self.url}/missing", 1.0, send).status_code, 404)
+        self.assertEqual(FlakyHandler.requests_per_path["/missing"], 1)
+
+    def test_should_open_circuit_of_failing_host(self):
+        scheduler = FetchScheduler(deadline=10.0, max_retries=1, base_backoff=0.01, failure_threshold=3)
+        self.assertEqual(scheduler.get(f"{self.url}/down", 1.0, send).status_code, 503)
+        self.assertEqual(scheduler.get(f"{self.url}/down", 1.0, send).status_code, 503)
+        self.assertEqual(FlakyHandler.requests_per_path["/down"], 3)
+        with self.assertRaises(CircuitOpenError):
+            scheduler.get(f"{self.url}/ok", 1.0, send)
+        # other hosts are not affected
+        self.assertTrue(scheduler.get_breaker("http://localhost/").allow())
+
+    def test_should_keep_requests_within_deadline(self):
+        scheduler = FetchScheduler(deadline=0.8, max_retries=0)
+        start = time.monotonic()
+        self.assertEqual(scheduler.get(f"{self.url}/slow", 10.0, send).status_code, 200)
+        with self.assertRaises(requests.Timeout):
+            scheduler.get(f"{self.url}/slow", 10.0, send)
+        self.assertLess(time.monotonic() - start, 1.5)
+        time.sleep(0.4)
+        with self.assertRaises(DeadlineExceeded):
+            scheduler.get(f"{self.url}/ok", 10.0, send)
+
+    def test_should_keep_circuit_breakers_with_new_deadline(self):
+        scheduler = FetchScheduler(deadline=0.0, max_retries=0, failure_threshold=1)
+        scheduler.get_breaker("http://localhost/").failure()
+        scheduler.restart(10.0)
+        self.assertEqual(scheduler.get(f"{self.url}/ok", 1.0, send).status_code, 200)
+        self.assertFalse(scheduler.get_breaker("http://localhost/").allow())
+
+
+class CircuitBreakerTest(TestCase):
+    def test_should_let_single_request_through_after_reset_timeout(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0, clock=lambda: now[0])
+        breaker.failure()
+        self.assertTrue(breaker.allow())
+        breaker.failure()
+        self.assertFalse(breaker.allow())
+
+        now[0] = 30.0
+        self.assertTrue(breaker.allow())
+        breaker.failure()
+        self.assertFalse(breaker.allow())
+
+        now[0] = 60.0
+        self.assertTrue(breaker.allow())
+        breaker.success()
+        breaker.failure()
+        self.assertTrue(breaker.allow())
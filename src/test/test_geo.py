@@ -0,0 +1,66 @@
+import math
+import random
+from datetime import date, datetime
+from unittest import TestCase
+
+from src.entities import Canteen, Dish, Label, Menu, OpenHours, Prices
+from src.geo import CanteenLocator, CanteenSite, get_default_registry, load_registry
+from src.query import MenuIndex
+
+WEEKDAYS = OpenHours(("11:00", "14:00"), ("11:00", "14:00"), ("11:00", "14:00"), ("11:00", "14:00"), ("11:00", "13:30"))
+
+
+def haversine_km(site: CanteenSite, latitude: float, longitude: float) -> float:
+    lat1, lat2 = math.radians(site.latitude), math.radians(latitude)
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin(math.radians(longitude - site.longitude) / 2) ** 2
+    )
+    return 2 * 6371.0088 * math.asin(math.sqrt(a))
+
+
+class OpenHoursTest(TestCase):
+    def test_should_check_opening_hours(self):
+        self.assertTrue(WEEKDAYS.is_open(datetime(2022, 5, 2, 11, 0)))
+        self.assertTrue(WEEKDAYS.is_open(datetime(2022, 5, 2, 13, 59)))
+        self.assertFalse(WEEKDAYS.is_open(datetime(2022, 5, 2, 14, 0)))
+        self.assertFalse(WEEKDAYS.is_open(datetime(2022, 5, 6, 13, 45)))
+        # saturday
+        self.assertFalse(WEEKDAYS.is_open(datetime(2022, 5, 7, 12, 0)))
+        self.assertEqual(OpenHours.from_json_obj(WEEKDAYS.to_json_obj()).to_json_obj(), WEEKDAYS.to_json_obj())
+
+
+class CanteenLocatorTest(TestCase):
+    def test_should_find_nearest_like_brute_force(self):
+        rng = random.Random(7)
+        sites = [
+            CanteenSite(f"canteen-{number}", "", "", rng.uniform(47.0, 55.0), rng.uniform(6.0, 15.0), WEEKDAYS)
+            for number in range(500)
+        ]
+        locator = CanteenLocator(sites)
+        for _ in range(20):
+            latitude, longitude = rng.uniform(47.0, 55.0), rng.uniform(6.0, 15.0)
+            distances = [haversine_km(site, latitude, longitude) for site in sites]
+            expected = [sites[number] for number in sorted(range(len(sites)), key=distances.__getitem__)[:5]]
+            nearest = locator.nearest(latitude, longitude, 5)
+            self.assertEqual([site for site, _ in nearest], expected)
+            self.assertAlmostEqual(nearest[0][1], haversine_km(expected[0], latitude, longitude), places=6)
+
+    def test_should_find_open_canteens_serving_labels(self):
+        locator = CanteenLocator(load_registry(canteen.to_api_representation() for canteen in Canteen))
+        self.assertEqual(len(locator.sites), len(get_default_registry()))
+        garching = (48.2681, 11.6723)
+        monday = datetime(2022, 5, 2, 12, 0)
+
+        self.assertEqual(locator.nearest(*garching)[0][0].canteen_id, "mensa-garching")
+        self.assertEqual(locator.nearest_open(*garching, datetime(2022, 5, 7, 12, 0)), [])
+
+        index = MenuIndex()
+        vegetarian = Dish("Käsespätzle", Prices(), {Label.VEGETARIAN}, "Tagesgericht")
+        meat = Dish("Schnitzel", Prices(), {Label.PORK}, "Tagesgericht")
+        index.add_menus("mensa-garching", {date(2022, 5, 2): Menu(date(2022, 5, 2), [meat])})
+        index.add_menus("mensa-leopoldstr", {date(2022, 5, 2): Menu(date(2022, 5, 2), [vegetarian])})
+        index.add_menus("mensa-arcisstr", {date(2022, 5, 3): Menu(date(2022, 5, 3), [vegetarian])})
+        nearest = locator.nearest_open(*garching, monday, k=3, index=index, labels=[Label.VEGETARIAN])
+        self.assertEqual([site.canteen_id for site, _ in nearest], ["mensa-leopoldstr"])
+        self.assertGreater(nearest[0][1], 10)
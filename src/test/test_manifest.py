@@ -0,0 +1,50 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from src.manifest import build_manifest, is_entry_point, write_manifest
+
+
+class ManifestTest(TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        os.makedirs(os.path.join(self.base_dir, "mensa-garching", "combined"))
+        os.makedirs(os.path.join(self.base_dir, "mensa-garching", "2022"))
+        self.contents = {
+            "all.json": b'{"canteens":[]}',
+            "mensa-garching/combined/combined.json": b'{"weeks":[]}',
+            "mensa-garching/2022/17.json": b'{"days":[]}',
+        }
+        for path, content in self.contents.items():
+            with open(os.path.join(self.base_dir, *path.split("/")), "wb") as outfile:
+                outfile.write(content)
+
+    def test_should_list_size_and_hash(self):
+        files = build_manifest(self.base_dir)["files"]
+        self.assertEqual(list(files), sorted(self.contents))
+        for path, content in self.contents.items():
+            self.assertEqual(files[path], {"size": len(content), "sha256": hashlib.sha256(content).hexdigest()})
+
+    def test_should_write_fingerprinted_copies(self):
+        self.assertEqual(write_manifest(self.base_dir, fingerprint=True), 3)
+        # the manifest and the copies are not listed again
+        self.assertEqual(write_manifest(self.base_dir, fingerprint=True), 3)
+        with open(os.path.join(self.base_dir, "manifest.json"), encoding="utf-8") as infile:
+            files = json.load(infile)["files"]
+        entry = files["mensa-garching/combined/combined.json"]
+        self.assertEqual(entry["fingerprinted"], f"mensa-garching/combined/combined.{entry['sha256'][:16]}.json")
+        with open(os.path.join(self.base_dir, *entry["fingerprinted"].split("/")), "rb") as infile:
+            self.assertEqual(infile.read(), self.contents["mensa-garching/combined/combined.json"])
+        # only entry points get fingerprinted copies, which pile up in the deployment otherwise
+        self.assertIn("fingerprinted", files["all.json"])
+        self.assertNotIn("fingerprinted", files["mensa-garching/2022/17.json"])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.base_dir, "mensa-garching", "2022"))), ["17.json"])
+
+    def test_should_fingerprint_binary_twins_of_entry_points(self):
+        self.assertTrue(is_entry_point("combined.msgpack"))
+        self.assertTrue(is_entry_point("search_index.bin"))
+        self.assertFalse(is_entry_point("17.msgpack"))
@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 import datetime
 import os
+import re
+import shutil
 import tempfile
 import unittest
 from datetime import date
-from typing import Dict, List
+from typing import Dict, List, Union
+from unittest import mock
 
+import requests
 from lxml import html  # nosec: https://github.com/TUM-Dev/eat-api/issues/19
 
 from src import main
@@ -17,7 +21,12 @@ from src.menu_parser import (
     StraubingMensaMenuParser,
     StudentenwerkMenuParser,
 )
+from src.run_report import get_canteen_report
 from src.utils import file_util, json_util
+from src.utils.fetch_scheduler import DeadlineExceeded
+
+# the parsers use the modules as found on the PYTHONPATH, not the ones of the "src" package
+from utils import fetch, metrics
 
 
 class MenuParserTest(unittest.TestCase):
@@ -121,6 +130,42 @@ class StudentenwerkMenuParserTest(unittest.TestCase):
             self.assertEqual(generated_week, reference_week)
 
 
+class StudentenwerkMenuParserRunTest(unittest.TestCase):
+    base_path = "src/test/assets/studentenwerk/mensa-garching/for-generation"
+
+    def setUp(self):
+        self.metrics = metrics.Metrics()
+        self.metrics.enable()
+        patcher = mock.patch.object(metrics, "metrics", self.metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_should_keep_parsed_dates_when_deadline_passes(self):
+        parser = StudentenwerkMenuParser()
+        first_date_link = parser.base_url_with_date.format(url_id=Canteen.MENSA_GARCHING.url_id, date="2021-11-01")
+        pages = {
+            parser.base_url.format(url_id=Canteen.MENSA_GARCHING.url_id): f"{self.base_path}/overview.html",
+            first_date_link: f"{self.base_path}/2021-09-13.html",
+        }
+
+        def get(url: str, timeout: float = 10.0) -> requests.Response:  # pylint: disable=unused-argument
+            if url not in pages:
+                raise DeadlineExceeded(f"{url} is not requested, as the deadline of the run has passed")
+            response = requests.Response()
+            response.status_code = 200
+            with open(pages[url], "rb") as infile:
+                response._content = infile.read()  # pylint: disable=protected-access
+            return response
+
+        with mock.patch.object(fetch, "get", get):
+            menus = parser.parse(Canteen.MENSA_GARCHING)
+
+        assert menus is not None
+        self.assertEqual(list(menus), [date(2021, 11, 1)])
+        self.assertEqual(self.metrics.errors, {"DeadlineExceeded": len(StudentenwerkMenuParserTest.test_dates_nov) - 1})
+        self.assertNotIn("2021-11-01", self.metrics.skipped_dates)
+
+
 class FMIBistroParserTest(unittest.TestCase):
     bistro_parser = FMIBistroMenuParser()
 
@@ -358,3 +403,79 @@ class StraubingMensaMenuParserTest(unittest.TestCase):
                     f"src/test/assets/straubing/reference/{calendar_week}.json",
                 )
                 self.assertEqual(generated, reference)
+
+
+def record_responses(directory: str, responses: Dict[str, Union[bytes, int]]) -> None:
+    """
+    Records a response for every URL for fetch.replay(): the content with status 200 or an empty error response with
+    the given status code.
+    """
+    recordings = fetch.Recordings(directory)
+    for url, content in responses.items():
+        response = requests.Response()
+        if isinstance(content, int):
+            response.status_code = content
+            response._content = b""  # pylint: disable=protected-access
+        else:
+            response.status_code = 200
+            response._content = content  # pylint: disable=protected-access
+        recordings.save("GET", url, response)
+
+
+def get_current_straubing_csv(calendar_week: int) -> bytes:
+    """
+    :return: The CSV asset of the calendar week with all dates moved to the current week
+    """
+    with open(f"src/test/assets/straubing/for-generation/{calendar_week}.csv", "rb") as infile:
+        csv = infile.read()
+    today = date.today()
+    days = (today - datetime.timedelta(days=today.weekday()) - date.fromisocalendar(2022, calendar_week, 1)).days
+
+    def shift(match: "re.Match[bytes]") -> bytes:
+        shifted = date(int(match.group(3)), int(match.group(2)), int(match.group(1))) + datetime.timedelta(days=days)
+        return shifted.strftime("%d.%m.%Y").encode()
+
+    return re.sub(rb"(\d{2})\.(\d{2})\.(\d{4})", shift, csv)
+
+
+class StraubingMensaMenuParserRunTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.metrics = metrics.Metrics()
+        self.metrics.enable()
+        patcher = mock.patch.object(metrics, "metrics", self.metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(fetch.reset)
+        self.calendar_week = date.today().isocalendar()[1]
+
+    def get_url(self, week_offset: int) -> str:
+        return StraubingMensaMenuParser.url.format(calendar_week=self.calendar_week + week_offset)
+
+    def test_should_time_regex_parsing_as_stage_of_its_own(self):
+        record_responses(self.directory, {self.get_url(0): get_current_straubing_csv(16), self.get_url(1): 404})
+        fetch.replay(self.directory)
+        menus = StraubingMensaMenuParser().parse(Canteen.MENSA_STRAUBING)
+        assert menus is not None
+        self.assertEqual(len(menus), 3)
+        self.assertEqual(self.metrics.calls["regex"], 1)
+        self.assertEqual(self.metrics.calls["fetch"], 2)
+        # the missing file of the next week is the regular end of the menus
+        self.assertEqual(self.metrics.errors, {})
+
+    def test_should_report_lost_week_as_degraded(self):
+        record_responses(self.directory, {self.get_url(0): get_current_straubing_csv(16), self.get_url(1): 503})
+        fetch.replay(self.directory)
+        menus = StraubingMensaMenuParser().parse(Canteen.MENSA_STRAUBING)
+        assert menus is not None
+        self.metrics.count("days", len(menus))
+
+        report = get_canteen_report(self.metrics, Canteen.MENSA_STRAUBING.canteen_id)
+        self.assertEqual(report["status"], "degraded")
+        self.assertEqual(report["errors"], {"HTTPError": 1})
+        next_monday = date.today() + datetime.timedelta(days=7 - date.today().weekday())
+        self.assertEqual(
+            list(report["skipped_dates"]),
+            [(next_monday + datetime.timedelta(days=day)).isoformat() for day in range(5)],
+        )
@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from src.utils.metrics import Metrics
+
+
+class MetricsTest(TestCase):
+    def test_should_ignore_everything_while_disabled(self):
+        metrics = Metrics()
+        with metrics.stage("fetch"):
+            metrics.count("bytes_fetched", 100)
+        self.assertEqual(metrics.seconds, {})
+        self.assertEqual(metrics.counters, {})
+
+    def test_should_exclude_nested_stages(self):
+        metrics = Metrics()
+        metrics.enable()
+        with metrics.stage("parse"):
+            with metrics.stage("fetch"):
+                time.sleep(0.05)
+            with metrics.stage("fetch"):
+                time.sleep(0.05)
+        metrics.count("bytes_fetched", 100)
+        metrics.count("bytes_fetched", 50)
+        self.assertGreaterEqual(metrics.seconds["fetch"], 0.1)
+        self.assertLess(metrics.seconds["parse"], 0.05)
+        self.assertEqual(metrics.calls, {"fetch": 2, "parse": 1})
+        self.assertEqual(metrics.counters, {"bytes_fetched": 150})
+
+        json_obj = metrics.to_json_obj("mensa-garching")
+        self.assertEqual(set(json_obj["stages"]), {"parse", "fetch", "other"})
+        self.assertAlmostEqual(sum(stage["seconds"] for stage in json_obj["stages"].values()), json_obj["seconds"], 3)
+
+    def test_should_write_json_and_prometheus_textfile(self):
+        metrics = Metrics()
+        metrics.enable()
+        with metrics.stage("jsonify"):
+            metrics.count("dishes", 12)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            metrics.write(temp_dir, "mensa-garching")
+            self.assertEqual(sorted(os.listdir(temp_dir)), ["mensa-garching.json", "mensa-garching.prom"])
+            with open(os.path.join(temp_dir, "mensa-garching.json"), encoding="utf-8") as infile:
+                self.assertEqual(json.load(infile)["counters"], {"dishes": 12})
+            with open(os.path.join(temp_dir, "mensa-garching.prom"), encoding="utf-8") as infile:
+                lines = infile.read().splitlines()
+        self.assertIn('eat_api_dishes{canteen="mensa-garching"} 12', lines)
+        self.assertIn("# TYPE eat_api_stage_seconds gauge", lines)
+        self.assertTrue(
+            any(line.startswith('eat_api_stage_seconds{canteen="mensa-garching",stage="jsonify"}') for line in lines),
+        )
@@ -1,15 +1,40 @@
+import os
+import tempfile
 from datetime import date
+from typing import Dict, List, Optional, Tuple
 from unittest import TestCase
 
+from lxml import etree  # nosec: the feeds are created by the test
 from pyopenmensa.feed import LazyBuilder
 
 from src import openmensa
 from src.entities import Dish, Label, Menu, Price, Prices, Week
 
+NAMESPACES = {"o": openmensa.NAMESPACE}
+
+
+def write_feed(weeks: Dict[int, Week]) -> etree._Element:
+    """
+    :return: The root of the feed written by openmensa.write_feed
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "feed.xml")
+        openmensa.write_feed(weeks, path)
+        return etree.parse(path, etree.XMLParser(remove_blank_text=True)).getroot()
+
+
+def get_meals(feed: etree._Element, day: date) -> List[Tuple[str, Optional[str]]]:
+    """
+    :return: The name and students' price (None if missing) of every meal of the day
+    """
+    return [
+        (meal.findtext("o:name", namespaces=NAMESPACES), meal.findtext("o:price", namespaces=NAMESPACES))
+        for meal in feed.iterfind(f"o:canteen/o:day[@date='{day}']/o:category/o:meal", NAMESPACES)
+    ]
+
 
 class OpenMensaTest(TestCase):
-    def test_should_add_dish_to_canteen(self):
-        canteen = LazyBuilder()
+    def test_should_write_dish_to_feed(self):
         dateobj = date(2017, 3, 27)
         dish = Dish(
             "Gulasch vom Schwein",
@@ -18,12 +43,17 @@ class OpenMensaTest(TestCase):
             "Tagesgericht",
         )
 
-        openmensa.addDishToCanteen(dish, dateobj, canteen)
-        meal = canteen._days[dateobj]["Speiseplan"][0]  # pylint: disable=protected-access
-        self.assertEqual(meal[0], "Gulasch vom Schwein")
-        self.assertEqual(meal[2], {"other": 190})
+        feed = write_feed(Week.to_weeks({dateobj: Menu(dateobj, [dish])}))
+        self.assertEqual(get_meals(feed, dateobj), [("Gulasch vom Schwein", "1.90")])
+
+    def test_should_write_dish_without_students_price_to_feed(self):
+        dateobj = date(2017, 3, 27)
+        dish = Dish("Salatbar", Prices(staff=Price(2.5)), set(), "Beilagen")
 
-    def test_should_add_week_to_canteen(self):
+        feed = write_feed(Week.to_weeks({dateobj: Menu(dateobj, [dish])}))
+        self.assertEqual(get_meals(feed, dateobj), [("Salatbar", None)])
+
+    def test_should_write_week_to_feed(self):
         date_mon2 = date(2017, 11, 6)
         date_tue2 = date(2017, 11, 7)
         date_wed2 = date(2017, 11, 8)
@@ -102,17 +132,43 @@ class OpenMensaTest(TestCase):
         }
         weeks = Week.to_weeks(week)
 
-        canteen = openmensa.weeksToCanteenFeed(weeks)
-        self.assertEqual(canteen.hasMealsFor(date_mon2), True)
-        self.assertEqual(canteen.hasMealsFor(date_tue2), True)
-        self.assertEqual(canteen.hasMealsFor(date_wed2), True)
-        self.assertEqual(canteen.hasMealsFor(date_thu2), True)
-        self.assertEqual(canteen.hasMealsFor(date_fri2), True)
-
-        canteen_wed2 = canteen._days[date_wed2]["Speiseplan"]  # pylint: disable=protected-access
-        self.assertEqual(canteen_wed2[0], ("Pochiertes Lachsfilet mit Dillsoße dazu Minze-Reis", [], {"other": 650}))
-        self.assertEqual(canteen_wed2[1], ("Spaghetti al Pomodoro", [], {"other": 360}))
+        feed = write_feed(weeks)
+        days = feed.findall("o:canteen/o:day", NAMESPACES)
+        self.assertEqual(
+            [day.get("date") for day in days],
+            [str(day) for day in (date_mon2, date_tue2, date_wed2, date_thu2, date_fri2)],
+        )
         self.assertEqual(
-            canteen_wed2[2],
-            ("Krustenbraten vom Schwein mit Kartoffelknödel und Krautsalat", [], {"other": 530}),
+            get_meals(feed, date_wed2),
+            [
+                ("Pochiertes Lachsfilet mit Dillsoße dazu Minze-Reis", "6.50"),
+                ("Spaghetti al Pomodoro", "3.60"),
+                ("Krustenbraten vom Schwein mit Kartoffelknödel und Krautsalat", "5.30"),
+            ],
         )
+
+    def test_should_stream_same_feed_as_lazy_builder(self):
+        menus = {
+            date(2017, 11, 7): Menu(
+                date(2017, 11, 7),
+                [
+                    Dish("Spaghetti al Pomodoro", Prices(Price(3.6)), {Label.GLUTEN}, "Tagesgericht"),
+                    Dish("Milchreis & Kirschen", Prices(Price(3)), {Label.MILK}, "Tagesgericht"),
+                    Dish("K" + "a" * 300, Prices(Price(1.0)), set(), "Tagesgericht"),
+                ],
+            ),
+            date(2017, 11, 6): Menu(date(2017, 11, 6), [Dish("Dampfkartoffeln", Prices(Price(3.6)), set(), "Beilage")]),
+            date(2017, 11, 8): Menu(date(2017, 11, 8), []),
+        }
+        builder = LazyBuilder()
+        for menu_date, menu in menus.items():
+            for dish in menu.dishes:
+                price = dish.prices.students.base_price if dish.prices.students is not None else None
+                # as in the streamed feed, only float prices are written
+                prices = {"other": price} if isinstance(price, float) else {}
+                builder.addMeal(menu_date, openmensa.CATEGORY, dish.name, prices=prices)
+        parser = etree.XMLParser(remove_blank_text=True)
+        expected = etree.fromstring(builder.toXMLFeed().encode("utf-8"), parser)
+        streamed = write_feed(Week.to_weeks(menus))
+        self.assertEqual(etree.tostring(streamed, method="c14n"), etree.tostring(expected, method="c14n"))
+        self.assertEqual(len(streamed[0]), 2)
@@ -0,0 +1,62 @@
+import json
+import os
+import pstats
+import tempfile
+import time
+from typing import List
+from unittest import TestCase
+
+from src.utils.metrics import Metrics
+from src.utils.profiler import Profiler
+
+
+def allocate(count: int) -> List[str]:
+    return [str(i) * 10 for i in range(count)]
+
+
+class ProfilerTest(TestCase):
+    def test_should_write_profile_stacks_and_allocations_per_stage(self):
+        metrics = Metrics()
+        metrics.enable()
+        profiler = Profiler(metrics, top=5)
+        profiler.start()
+        try:
+            with metrics.stage("parse"):
+                with metrics.stage("fetch"):
+                    kept = allocate(10000)
+                deadline = time.perf_counter() + 0.05
+                while time.perf_counter() < deadline:
+                    allocate(100)
+        finally:
+            profiler.stop()
+        self.assertEqual(metrics.observers, [])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profiler.write(temp_dir, "mensa-garching")
+            self.assertEqual(
+                sorted(os.listdir(temp_dir)),
+                ["mensa-garching.allocations.json", "mensa-garching.collapsed", "mensa-garching.pstats"],
+            )
+            stats = pstats.Stats(os.path.join(temp_dir, "mensa-garching.pstats"))
+            self.assertTrue(any(function == "allocate" for _, _, function in stats.stats))  # type: ignore
+            with open(os.path.join(temp_dir, "mensa-garching.collapsed"), encoding="utf-8") as infile:
+                lines = infile.read().splitlines()
+            with open(os.path.join(temp_dir, "mensa-garching.allocations.json"), encoding="utf-8") as infile:
+                allocations = json.load(infile)
+
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+            for frame in stack.split(";"):
+                self.assertRegex(frame, r"^\S+ \(.+:\d+\)$")
+        self.assertTrue(any("test_should_write_profile_stacks_and_allocations_per_stage" in line for line in lines))
+
+        # nested stages are part of the outermost one
+        self.assertEqual(list(allocations["stages"]), ["parse"])
+        top = allocations["stages"]["parse"]["top"]
+        self.assertLessEqual(len(top), 5)
+        self.assertEqual(os.path.basename(top[0]["file"]), "test_profiler.py")
+        self.assertGreaterEqual(top[0]["count"], 10000)
+        self.assertGreater(allocations["stages"]["parse"]["peak_bytes"], top[0]["bytes"] // 2)
+        self.assertEqual(len(kept), 10000)
@@ -0,0 +1,64 @@
+from datetime import date
+from unittest import TestCase
+
+from src.entities import Dish, Label, Menu, Price, Prices
+from src.query import MenuIndex
+
+
+class MenuIndexTest(TestCase):
+    def setUp(self):
+        self.index = MenuIndex()
+        garching = {
+            date(2022, 5, 2): Menu(
+                date(2022, 5, 2),
+                [
+                    Dish("Gemüsecurry", Prices(Price(2.5), Price(3.5), Price(4.5)), {Label.VEGAN}, "Tagesgericht"),
+                    Dish("Schnitzel", Prices(Price(3.2)), {Label.PORK, Label.GLUTEN}, "Tagesgericht"),
+                    Dish("Salatbuffet", Prices(Price(0.9, 0.9, "100g")), {Label.VEGAN}, "Salat"),
+                ],
+            ),
+            date(2022, 5, 3): Menu(
+                date(2022, 5, 3),
+                [Dish("Linsen-Dal", Prices(Price(2.9)), {Label.VEGAN, Label.GLUTEN}, "Tagesgericht")],
+            ),
+        }
+        arcisstrasse = {
+            date(2022, 5, 2): Menu(
+                date(2022, 5, 2),
+                [
+                    Dish("Falafel", Prices(Price(3.4)), {Label.VEGAN}, "Tagesgericht"),
+                    Dish("Pommes frites", Prices(), {Label.VEGAN}, "Beilagen"),
+                ],
+            ),
+        }
+        self.index.add_menus("mensa-garching", garching)
+        self.index.add_menus("mensa-arcisstrasse", arcisstrasse)
+
+    def __query_names(self, **kwargs):
+        return [entry.dish.name for entry in self.index.query(**kwargs)]
+
+    def test_should_filter_by_labels_date_canteen_and_price(self):
+        names = self.__query_names(
+            canteen_ids=["mensa-garching"],
+            start=date(2022, 5, 2),
+            end=date(2022, 5, 2),
+            include_labels=[Label.VEGAN],
+            max_price=3.0,
+        )
+        self.assertEqual(names, ["Gemüsecurry", "Salatbuffet"])
+
+    def test_should_exclude_labels(self):
+        names = self.__query_names(include_labels=[Label.VEGAN], exclude_labels=[Label.GLUTEN])
+        self.assertEqual(names, ["Gemüsecurry", "Salatbuffet", "Falafel", "Pommes frites"])
+
+    def test_should_filter_by_price_role(self):
+        self.assertEqual(self.__query_names(min_price=4.0, price_role="guests"), ["Gemüsecurry"])
+        # dishes without a price never match a price range
+        self.assertNotIn("Pommes frites", self.__query_names(min_price=0))
+        with self.assertRaises(ValueError):
+            self.index.query(price_role="children")
+
+    def test_should_return_everything_without_filters(self):
+        self.assertEqual(len(self.index.query()), len(self.index))
+        self.assertEqual(self.__query_names(start=date(2022, 5, 3)), ["Linsen-Dal"])
+        self.assertEqual(self.__query_names(canteen_ids=["mensa-leopoldstrasse"]), [])
@@ -0,0 +1,107 @@
+import datetime
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from src.run_report import build_run_report, get_canteen_report, percentile, write_run_report
+from src.utils.metrics import Metrics
+
+
+def _report(status="ok", seconds=2.0, p90=0.4, dishes=100, errors=None):
+    return {
+        "canteen_id": "mensa-garching",
+        "status": status,
+        "started": "2022-05-02T09:00:00+00:00",
+        "seconds": seconds,
+        "fetch": {"requests": 10, "bytes": 1000, "seconds": 1.5, "p50": 0.1, "p90": p90, "p99": p90, "max": p90},
+        "days": 5,
+        "dishes": dishes,
+        "skipped_dates": {},
+        "errors": errors or {},
+    }
+
+
+class RunReportTest(TestCase):
+    def test_should_compute_nearest_rank_percentiles(self):
+        values = [0.5, 0.1, 0.4, 0.2, 0.3]
+        self.assertEqual(percentile(values, 0.5), 0.3)
+        self.assertEqual(percentile(values, 0.9), 0.5)
+        self.assertEqual(percentile(values, 0.0), 0.1)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_should_report_status_of_canteen(self):
+        metrics = Metrics()
+        metrics.enable()
+        for seconds in (0.1, 0.2, 0.3, 0.4):
+            metrics.sample("fetch", seconds)
+        self.assertEqual(get_canteen_report(metrics, "mensa-garching")["status"], "failed")
+
+        metrics.count("days", 4)
+        metrics.count("dishes", 40)
+        self.assertEqual(get_canteen_report(metrics, "mensa-garching")["status"], "ok")
+
+        metrics.error(ValueError("no dishes"), datetime.date(2022, 5, 2))
+        report = get_canteen_report(metrics, "mensa-garching")
+        self.assertEqual(report["status"], "degraded")
+        self.assertEqual(report["skipped_dates"], {"2022-05-02": "ValueError"})
+        self.assertEqual(report["fetch"]["requests"], 4)
+        self.assertEqual(report["fetch"]["p50"], 0.2)
+        self.assertEqual(report["fetch"]["max"], 0.4)
+
+        report = get_canteen_report(metrics, "mensa-garching", ConnectionError())
+        self.assertEqual(report["status"], "failed")
+        self.assertEqual(report["errors"], {"ValueError": 1, "ConnectionError": 1})
+
+    def test_should_flag_canteens_that_got_worse(self):
+        previous = build_run_report(
+            {
+                "fast": _report(),
+                "slow": _report(),
+                "degraded": _report(),
+                "fewer": _report(),
+                "gone": _report(),
+                "quick": _report(seconds=0.1),
+            },
+        )
+        current = build_run_report(
+            {
+                "fast": _report(seconds=2.5),
+                "slow": _report(seconds=5.0, p90=2.0),
+                "degraded": _report(status="degraded", errors={"HTTPError": 1}),
+                "fewer": _report(dishes=40),
+                # short runs vary a lot
+                "quick": _report(seconds=0.5),
+                "new": _report(status="failed"),
+            },
+            previous,
+        )
+        self.assertEqual(
+            current["flagged"],
+            {
+                "degraded": ["status changed from ok to degraded", "new errors: HTTPError"],
+                "fewer": ["40 dishes instead of 100"],
+                "gone": ["no report, the run did not finish"],
+                "new": ["status is failed"],
+                "slow": ["run took 5.0 s instead of 2.0 s", "90 % of the requests took up to 2.0 s instead of 0.4 s"],
+            },
+        )
+        self.assertEqual(current["summary"], {"ok": 4, "empty": 0, "degraded": 1, "failed": 1})
+        self.assertEqual(current["previous"], previous["created"])
+
+    def test_should_compare_with_previous_run_report(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            reports_dir = os.path.join(temp_dir, "reports")
+            state_dir = os.path.join(temp_dir, "state")
+            os.makedirs(reports_dir)
+            with open(os.path.join(reports_dir, "mensa-garching.json"), "w", encoding="utf-8") as outfile:
+                json.dump(_report(), outfile)
+            self.assertEqual(write_run_report(reports_dir, temp_dir, state_dir)["flagged"], {})
+
+            with open(os.path.join(reports_dir, "mensa-garching.json"), "w", encoding="utf-8") as outfile:
+                json.dump(_report(dishes=0), outfile)
+            write_run_report(reports_dir, temp_dir, state_dir)
+            with open(os.path.join(temp_dir, "run_report.json"), encoding="utf-8") as infile:
+                run_report = json.load(infile)
+        self.assertEqual(run_report["flagged"], {"mensa-garching": ["0 dishes instead of 100"]})
+        self.assertEqual(run_report["canteens"]["mensa-garching"]["dishes"], 0)
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from src.search import MappedSearchIndex, SearchIndex, SearchResult, tokenize, write_index
+
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.add("mensa-garching", "2022-05-02", "Käsespätzle mit Röstzwiebeln")
+        self.index.add("mensa-garching", "2022-05-02", "Schweinsbraten mit Kartoffelknödel")
+        self.index.add("mensa-arcisstrasse", "2022-05-03", "Wiener Schnitzel vom Schwein")
+        self.index.add("mensa-arcisstrasse", "2022-05-03", "Kartoffelsuppe")
+
+    @staticmethod
+    def __names(results):
+        return [result.name for result in results]
+
+    def test_should_fold_and_split_compounds(self):
+        self.assertEqual(tokenize("Käsespätzle"), ["kaesespaetzle", "kaese", "spaetzle"])
+        # decomposed umlauts are normalized first
+        self.assertEqual(tokenize("Ka\u0308sespa\u0308tzle"), tokenize("Käsespätzle"))
+        self.assertEqual(tokenize("Schweinsbraten"), ["schweinsbraten", "schwein", "braten"])
+        self.assertEqual(tokenize("Wiener"), ["wiener"])
+
+    def test_should_search_words_and_parts(self):
+        self.assertEqual(self.__names(self.index.search("spätzle", prefix=False)), ["Käsespätzle mit Röstzwiebeln"])
+        self.assertEqual(
+            self.__names(self.index.search("kartoffel", prefix=False)),
+            ["Schweinsbraten mit Kartoffelknödel", "Kartoffelsuppe"],
+        )
+        self.assertEqual(self.__names(self.index.search("SCHNITZEL schwein")), ["Wiener Schnitzel vom Schwein"])
+        self.assertEqual(self.index.search("schnitz", prefix=False), [])
+
+    def test_should_search_prefixes(self):
+        self.assertEqual(self.__names(self.index.search("kaesesp")), ["Käsespätzle mit Röstzwiebeln"])
+        self.assertEqual(self.__names(self.index.search("mit schwein")), ["Schweinsbraten mit Kartoffelknödel"])
+
+    def test_should_index_dishes_once(self):
+        self.assertTrue(self.index.add("mensa-garching", "2022-05-02", "Kartoffelsuppe"))
+        self.assertFalse(self.index.add("mensa-garching", "2022-05-02", "Kartoffelsuppe"))
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(len(self.index.search("suppe")), 2)
+
+    def test_should_search_mapped_index(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "search_index.bin")
+            self.index.save(path)
+            with MappedSearchIndex(path) as mapped:
+                for query in ("spätzle", "kartoffel", "schw", "mit schwein", "pizza", ""):
+                    self.assertEqual(mapped.search(query), self.index.search(query))
+                self.assertEqual(
+                    mapped.search("kaese")[0],
+                    SearchResult("mensa-garching", "2022-05-02", "Käsespätzle mit Röstzwiebeln"),
+                )
+
+            loaded = SearchIndex.load(path)
+            self.assertFalse(loaded.add("mensa-arcisstrasse", "2022-05-03", "Kartoffelsuppe"))
+            self.assertTrue(loaded.add("mensa-arcisstrasse", "2022-05-04", "Linsensuppe"))
+            self.assertEqual(self.__names(loaded.search("suppe")), ["Kartoffelsuppe", "Linsensuppe"])
+
+    def test_should_extend_index_kept_in_state_directory(self):
+        def all_json(date, name):
+            day = {"date": date, "dishes": [{"name": name}]}
+            return {"canteens": [{"canteen_id": "mensa-garching", "weeks": [{"days": [day]}]}]}
+
+        with tempfile.TemporaryDirectory() as directory:
+            state_dir = os.path.join(directory, "state")
+            # the output directory is created from scratch in every run
+            for run, (date, name) in enumerate([("2022-05-02", "Käsespätzle"), ("2022-05-09", "Linsensuppe")]):
+                base_dir = os.path.join(directory, f"run-{run}")
+                os.makedirs(base_dir)
+                with open(os.path.join(base_dir, "all.json"), "w", encoding="utf-8") as f:
+                    json.dump(all_json(date, name), f)
+                self.assertEqual(write_index(base_dir, state_dir), 1)
+
+            with MappedSearchIndex(os.path.join(base_dir, "search_index.bin")) as mapped:
+                self.assertEqual(len(mapped), 2)
+                self.assertEqual(self.__names(mapped.search("kaesesp")), ["Käsespätzle"])
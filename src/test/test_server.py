@@ -0,0 +1,209 @@
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from unittest import TestCase, mock
+
+from src import main, query, server
+from src.entities import Canteen, Dish, Label, Language, Menu, Price, Prices, Week
+
+# the fetch module the parsers use, not the one of the "src" package
+from utils import fetch
+
+
+class ApiServerTest(TestCase):
+    @staticmethod
+    def __get_cache(dish_name: str) -> server.ResponseCache:
+        menu_date = date(2021, 9, 13)
+        menus = {menu_date: Menu(menu_date, [Dish(dish_name, Prices(Price(2.5)), {Label.VEGETARIAN}, "Tagesgericht")])}
+        canteen_id = Canteen.MENSA_GARCHING.canteen_id
+        outputs = {canteen_id: main.get_json_outputs(Week.to_weeks(menus), Canteen.MENSA_GARCHING, True)}
+        return server.ResponseCache(server.build_bodies(outputs), query.build_index({canteen_id: menus}))
+
+    def setUp(self):
+        self.server = server.ApiServer(("127.0.0.1", 0))
+        self.server.update("", self.__get_cache("Käsespätzle"))
+        self.server.update("en", self.__get_cache("Cheese spaetzle"))
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __get(self, path: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        connection = HTTPConnection("127.0.0.1", self.server.server_address[1])
+        try:
+            connection.request("GET", path, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            connection.close()
+
+    def test_should_serve_api_paths(self):
+        status, _, body = self.__get("/mensa-garching/2021/37.json")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)["days"][0]["dishes"][0]["name"], "Käsespätzle")
+
+        _, _, body = self.__get("/mensa-garching/combined/combined.json")
+        self.assertEqual(json.loads(body)["canteen_id"], "mensa-garching")
+        _, _, body = self.__get("/all.json")
+        self.assertEqual(json.loads(body)["canteens"][0]["canteen_id"], "mensa-garching")
+        _, _, body = self.__get("/mensa-garching/days/2021-09-13.json")
+        self.assertEqual(json.loads(body)["dishes"][0]["name"], "Käsespätzle")
+        self.assertEqual(json.loads(body)["canteen_id"], "mensa-garching")
+        _, _, body = self.__get("/today.json")
+        self.assertEqual(json.loads(body), {"date": date.today().isoformat(), "canteens": []})
+        _, _, body = self.__get("/all_ref.json")
+        self.assertEqual(json.loads(body)[0]["canteen_id"], "mensa-garching")
+        _, _, body = self.__get("/enums/labels.json")
+        self.assertIn("VEGETARIAN", [label["enum_name"] for label in json.loads(body)])
+        self.assertEqual(self.__get("/mensa-garching/2021/38.json")[0], 404)
+
+    def test_should_serve_language_prefix(self):
+        _, _, body = self.__get("/en/mensa-garching/2021/37.json")
+        self.assertEqual(json.loads(body)["days"][0]["dishes"][0]["name"], "Cheese spaetzle")
+
+    def test_should_compress_and_revalidate(self):
+        status, headers, body = self.__get("/all.json", {"Accept-Encoding": "gzip"})
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(body))["canteens"][0]["canteen_id"], "mensa-garching")
+
+        status, _, body = self.__get("/all.json", {"Accept-Encoding": "gzip", "If-None-Match": headers["ETag"]})
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+        # the uncompressed representation has a different strong ETag
+        self.assertEqual(self.__get("/all.json", {"If-None-Match": headers["ETag"]})[0], 200)
+
+    def test_should_not_compress_refused_gzip(self):
+        _, headers, body = self.__get("/query?canteen=mensa-garching", {"Accept-Encoding": "gzip;q=0, identity"})
+        self.assertNotIn("Content-Encoding", headers)
+        self.assertEqual(json.loads(body)[0]["name"], "Käsespätzle")
+        self.assertTrue(server.accepts_gzip("deflate, gzip;q=0.5"))
+        self.assertTrue(server.accepts_gzip("*"))
+        self.assertFalse(server.accepts_gzip("*, gzip;q=0"))
+        self.assertFalse(server.accepts_gzip(""))
+
+    def test_should_swap_refreshed_data(self):
+        _, headers, _ = self.__get("/all.json")
+        self.server.update("", self.__get_cache("Pommes frites"))
+
+        status, new_headers, body = self.__get("/all.json", {"If-None-Match": headers["ETag"]})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(new_headers["ETag"], headers["ETag"])
+        self.assertIn("Pommes frites", body.decode("utf-8"))
+
+    def test_should_answer_queries(self):
+        status, _, body = self.__get("/en/query?canteen=mensa-garching&from=2021-09-13&labels=VEGETARIAN&max_price=3")
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [(dish["canteen_id"], dish["date"], dish["name"]) for dish in json.loads(body)],
+            [("mensa-garching", "2021-09-13", "Cheese spaetzle")],
+        )
+        _, _, body = self.__get("/query?exclude=VEGETARIAN")
+        self.assertEqual(json.loads(body), [])
+        self.assertEqual(self.__get("/query?labels=DELICIOUS")[0], 400)
+        self.assertEqual(self.__get("/query?from=yesterday")[0], 400)
+
+    def test_should_answer_nearest(self):
+        status, _, body = self.__get("/nearest?lat=48.2681&lon=11.6723&k=2&at=2021-09-13T12:00&labels=VEGETARIAN")
+        self.assertEqual(status, 200)
+        self.assertEqual([canteen["canteen_id"] for canteen in json.loads(body)], ["mensa-garching"])
+        _, _, body = self.__get("/nearest?lat=48.2681&lon=11.6723&at=2021-09-13T15:00")
+        self.assertEqual(json.loads(body), [])
+        self.assertEqual(self.__get("/nearest?lat=48.2681")[0], 400)
+
+    def test_should_compare_opening_hours_in_local_time_of_canteens(self):
+        # 10:00 UTC is 12:00 in Munich in summer
+        self.assertEqual(server.parse_time("2021-09-13T10:00+00:00").strftime("%H:%M"), "12:00")
+        self.assertEqual(server.parse_time("2021-09-13T12:00").utcoffset(), timedelta(hours=2))
+
+
+# main runs with the modules as found on the PYTHONPATH, so canteens are compared by id instead of the enum of "src"
+class FakeParser:
+    def parse(self, canteen: Canteen) -> Dict[date, Menu]:
+        if canteen.canteen_id == Canteen.MENSA_ARCISSTR.canteen_id:
+            raise ConnectionError("unreachable")
+        menu_date = date.today()
+        return {menu_date: Menu(menu_date, [Dish("Käsespätzle", Prices(Price(2.5)), set(), "Tagesgericht")])}
+
+
+class FetchingParser:
+    url = ""
+
+    def parse(self, canteen: Canteen) -> Dict[date, Menu]:
+        fetch.get(self.url, timeout=1.0)
+        return FakeParser().parse(canteen)
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # noqa: N802
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def get_fake_parser(canteen: Canteen) -> Optional[FakeParser]:
+    if canteen.canteen_id in (Canteen.MENSA_GARCHING.canteen_id, Canteen.MENSA_ARCISSTR.canteen_id):
+        return FakeParser()
+    return None
+
+
+class ApiServerRefreshTest(TestCase):
+    def test_should_serve_all_languages_of_scrape(self):
+        api_server = server.ApiServer(("127.0.0.1", 0))
+        try:
+            with mock.patch.dict(os.environ, {"TRANSLATOR_EAT_API": "fake", "TRANSLATION_MEMORY_EAT_API": ""}):
+                with mock.patch.object(main, "get_menu_parsing_strategy", get_fake_parser):
+                    api_server.refresh(lambda: main.scrape_all_canteens([Language.DE, Language.EN]))
+        finally:
+            api_server.server_close()
+
+        for path in ("/all.json", "/en/all.json"):
+            cache, cache_path = api_server.resolve(path)
+            assert cache is not None
+            response = cache.get(cache_path)
+            assert response is not None, path
+            # the canteen that failed to parse is left out, the others are served nevertheless
+            self.assertEqual(
+                [canteen["canteen_id"] for canteen in json.loads(response.body)["canteens"]],
+                ["mensa-garching"],
+            )
+        self.assertIsNot(api_server.resolve("/en/all.json")[0], api_server.resolve("/all.json")[0])
+
+    def test_should_refresh_after_deadline_of_previous_scrape(self):
+        origin = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+        threading.Thread(target=origin.serve_forever, daemon=True).start()
+        FetchingParser.url = f"http://127.0.0.1:{origin.server_address[1]}/speiseplan.html"
+        api_server = server.ApiServer(("127.0.0.1", 0))
+
+        def get_fetching_parser(canteen: Canteen) -> Optional[FetchingParser]:
+            return FetchingParser() if canteen.canteen_id == Canteen.MENSA_GARCHING.canteen_id else None
+
+        try:
+            with mock.patch.dict(os.environ, {"FETCH_DEADLINE_EAT_API": "0.5"}):
+                with mock.patch.object(main, "get_menu_parsing_strategy", get_fetching_parser):
+                    for _ in range(2):
+                        api_server.refresh(lambda: main.scrape_all_canteens([Language.DE]))
+                        cache, path = api_server.resolve("/all.json")
+                        assert cache is not None
+                        response = cache.get(path)
+                        assert response is not None
+                        canteens = json.loads(response.body)["canteens"]
+                        self.assertEqual([canteen["canteen_id"] for canteen in canteens], ["mensa-garching"])
+                        # the deadline of the first scrape passes before the next one
+                        time.sleep(0.6)
+        finally:
+            fetch.reset()
+            api_server.server_close()
+            origin.shutdown()
+            origin.server_close()
@@ -0,0 +1,60 @@
+import datetime
+import os
+import subprocess  # nosec: runs main.py with fixed arguments
+import sys
+import tempfile
+from typing import List, Set
+from unittest import TestCase
+
+import requests
+
+from src.menu_parser import StraubingMensaMenuParser
+from src.utils.fetch import Recordings
+
+MAIN = os.path.join(os.path.dirname(__file__), "..", "main.py")
+# modules, which only some commands need and which take long to import
+HEAVY_MODULES = {"deepl", "lxml", "menu_parser", "numpy", "pyopenmensa", "requests", "sqlite3", "http.server"}
+
+
+def import_main(args: List[str]) -> Set[str]:
+    """
+    Runs main.py with "-X importtime", which lists every imported module.
+
+    :return: The names of all modules imported by the run
+    """
+    process = subprocess.run(  # nosec: see above
+        [sys.executable, "-X", "importtime", MAIN, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        line.split("|")[-1].strip()
+        for line in process.stderr.splitlines()
+        if line.startswith("import time:") and "cumulative" not in line
+    }
+
+
+class StartupTest(TestCase):
+    def assert_imports(self, args: List[str], allowed: Set[str]) -> None:
+        modules = import_main(args)
+        self.assertEqual(modules & HEAVY_MODULES - allowed, set(), f"imported by 'main.py {' '.join(args)}'")
+
+    def test_should_list_canteens_and_languages_without_heavy_modules(self):
+        for args in (["--canteens"], ["--languages"]):
+            with self.subTest(args=args):
+                self.assert_imports(args, set())
+
+    def test_should_only_import_the_parsers_when_parsing(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # a single 404, which ends the Straubing week loop right away
+            url = StraubingMensaMenuParser.url.format(calendar_week=datetime.date.today().isocalendar()[1])
+            not_found = requests.Response()
+            not_found.status_code = 404
+            not_found.reason = "Not Found"
+            not_found._content = b""  # pylint: disable=protected-access
+            Recordings(temp_dir).save("GET", url, not_found)
+            self.assert_imports(
+                ["-p", "mensa-straubing", "-j", os.path.join(temp_dir, "out"), "--replay", temp_dir],
+                {"lxml", "menu_parser", "requests"},
+            )
@@ -0,0 +1,142 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from datetime import date
+from unittest import TestCase, mock
+
+import deepl
+
+from src import cli, main
+from src.entities import Dish, Language, Menu, Prices
+from src.test.translation_server import TranslationServer
+from src.utils import util
+from src.utils.translation_memory import TranslationMemory
+from src.utils.translation_scheduler import SchedulerTranslator, TranslationScheduler
+
+
+class TranslateDishesTest(TestCase):
+    def test_should_translate_unique_names_in_batches(self):
+        shared_dish = Dish("Pommes frites", Prices(), set(), "Beilagen")
+        menus = {}
+        for day in range(1, 29):
+            menu_date = date(2022, 2, day)
+            dishes = [Dish(f"Tagesgericht {day}", Prices(), set(), "Tagesgericht"), shared_dish]
+            dishes += [Dish("Pommes frites", Prices(), set(), "Beilagen")]
+            menus[menu_date] = Menu(menu_date, dishes)
+        translator = util.FakeTranslator()
+
+        self.assertTrue(util.translate_dishes(menus, "EN-US", translator))
+
+        # 28 daily dishes and "Pommes frites" fit into one request
+        self.assertEqual(translator.requests, 1)
+        self.assertEqual(translator.texts, 29)
+        self.assertEqual(shared_dish.name, "[EN-US] Pommes frites")
+        self.assertEqual(menus[date(2022, 2, 3)].dishes[0].name, "[EN-US] Tagesgericht 3")
+        self.assertEqual(menus[date(2022, 2, 3)].dishes[2].name, "[EN-US] Pommes frites")
+
+    def test_should_not_translate_to_source_language(self):
+        translator = util.FakeTranslator()
+        menus = {date(2022, 2, 1): Menu(date(2022, 2, 1), [Dish("Pommes frites", Prices(), set(), "Beilagen")])}
+        self.assertTrue(util.translate_dishes(menus, "de", translator))
+        self.assertEqual(translator.requests, 0)
+
+    def test_should_respect_request_limits(self):
+        texts = [f"Gericht {i}" for i in range(120)]
+        self.assertEqual([len(batch) for batch in util.batch_texts(texts)], [50, 50, 20])
+        self.assertEqual([len(batch) for batch in util.batch_texts(["a" * 10, "b" * 10, "c" * 30], 50, 20)], [2, 1])
+
+
+class TranslationMemoryTest(TestCase):
+    def test_should_not_call_translator_for_known_names(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "translations.sqlite3")
+            menus = {date(2022, 2, 1): Menu(date(2022, 2, 1), [Dish("Pommes frites", Prices(), set(), "Beilagen")])}
+            with TranslationMemory(path) as memory:
+                util.translate_dishes(menus, "EN-US", util.FakeTranslator(), memory)
+                self.assertEqual((memory.hits, memory.misses), (0, 1))
+
+            # the same week in the next run
+            menus = {date(2022, 2, 1): Menu(date(2022, 2, 1), [Dish("Pommes  frites", Prices(), set(), "Beilagen")])}
+            translator = util.FakeTranslator()
+            with TranslationMemory(path) as memory:
+                util.translate_dishes(menus, "EN-US", translator, memory)
+                self.assertEqual((memory.hits, memory.misses), (1, 0))
+            self.assertEqual(translator.requests, 0)
+            self.assertEqual(menus[date(2022, 2, 1)].dishes[0].name, "[EN-US] Pommes frites")
+
+    def test_should_evict_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with TranslationMemory(os.path.join(temp_dir, "translations.sqlite3"), max_entries=2) as memory:
+                memory.put_many("DE", "EN-US", {"Suppe": "Soup"})
+                memory.put_many("DE", "EN-US", {"Salat": "Salad"})
+                self.assertEqual(memory.get("DE", "EN-US", "Suppe"), "Soup")
+                memory.put_many("DE", "EN-US", {"Obst": "Fruit"})
+                self.assertEqual(len(memory), 2)
+                self.assertIsNone(memory.get("DE", "EN-US", "Salat"))
+                self.assertEqual(memory.get("DE", "en-us", "Suppe"), "Soup")
+
+
+class AllLanguagesTest(TestCase):
+    def test_should_translate_copies_for_every_language(self):
+        menus = {date(2022, 2, 1): Menu(date(2022, 2, 1), [Dish("Pommes frites", Prices(), set(), "Beilagen")])}
+        with mock.patch.dict(os.environ, {"TRANSLATOR_EAT_API": "fake", "TRANSLATION_MEMORY_EAT_API": ""}):
+            language_menus = dict(main.translate_to_all_languages(menus))
+
+        self.assertEqual({language.name for language in language_menus}, {"DE", "EN"})
+        for language, translated_menus in language_menus.items():
+            expected = "Pommes frites" if language.name == "DE" else "[EN-US] Pommes frites"
+            self.assertEqual(translated_menus[date(2022, 2, 1)].dishes[0].name, expected)
+
+    def test_should_place_language_next_to_directory(self):
+        self.assertEqual(main.get_language_directory("dist/mensa-garching", Language.DE), "dist/mensa-garching")
+        self.assertEqual(main.get_language_directory("./dist/mensa-garching/", Language.EN), "dist/en/mensa-garching")
+
+    def test_should_not_combine_language_with_all_languages(self):
+        argv = ["main.py", "-p", "mensa-garching", "-j", "dist", "--all-languages", "--language", "EN-US"]
+        with mock.patch.object(sys, "argv", argv), contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                cli.parse_cli_args()
+
+
+class TranslationSchedulerTest(TestCase):
+    @staticmethod
+    def __get_scheduler(server: TranslationServer, concurrency: int = 2) -> TranslationScheduler:
+        translator = SchedulerTranslator("fake-key", server_url=server.url)
+        return TranslationScheduler(translator, concurrency, requests_per_second=100.0, base_backoff=0.01)
+
+    def test_should_retry_throttled_requests(self):
+        texts = [f"Gericht {i}" for i in range(120)]
+        with TranslationServer(3) as server:
+            scheduler = self.__get_scheduler(server)
+            result = scheduler.translate(list(util.batch_texts(texts)), "DE", "EN-US")
+
+        self.assertTrue(result.complete)
+        self.assertEqual(result.translations["Gericht 7"], "[EN-US] Gericht 7")
+        self.assertEqual(len(result.translations), 120)
+        self.assertEqual(scheduler.throttled, 3)
+        self.assertEqual(server.requests, 6)
+
+    def test_should_leave_retries_to_the_scheduler(self):
+        with TranslationServer(1) as server:
+            translator = SchedulerTranslator("fake-key", server_url=server.url)
+            with self.assertRaises(deepl.TooManyRequestsException):
+                translator.translate_text("Gericht", source_lang="DE", target_lang="EN-US")
+
+        self.assertEqual(server.requests, 1)
+        # other DeepL clients of the process keep retrying
+        self.assertEqual(deepl.http_client.max_network_retries, 5)
+
+    def test_should_return_partial_result_when_quota_is_exceeded(self):
+        texts = [f"Gericht {i}" for i in range(120)]
+        with TranslationServer(quota=100) as server:
+            result = self.__get_scheduler(server, concurrency=1).translate(
+                list(util.batch_texts(texts)),
+                "DE",
+                "EN-US",
+            )
+
+        self.assertFalse(result.complete)
+        self.assertEqual(len(result.translations), 100)
+        self.assertEqual(result.untranslated, set(texts[100:]))
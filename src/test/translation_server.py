@@ -0,0 +1,85 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs
+
+
+class TranslationServer:
+    """
+    Local stand-in for the DeepL API, which implements "POST /v2/translate" by prefixing every text with the target
+    language. The first throttled_requests requests are answered with HTTP 429, and once more than quota texts have
+    been translated, requests are answered with HTTP 456 (quota exceeded).
+    """
+
+    def __init__(self, throttled_requests: int = 0, quota: Optional[int] = None):
+        self.throttled_requests = throttled_requests
+        self.quota = quota
+        self.requests = 0
+        self.translated_texts = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.__handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __handler(self):
+        translation_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):  # noqa: N802
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    request = json.loads(body)
+                else:
+                    request = {
+                        key: values if key == "text" else values[0] for key, values in parse_qs(body.decode()).items()
+                    }
+                texts: List[str] = request.get("text", [])
+                status = translation_server.count(len(texts))
+                if status != 200:
+                    self.__respond(status, {"message": "Too many requests" if status == 429 else "Quota exceeded"})
+                    return
+                translations = [
+                    {
+                        "detected_source_language": "DE",
+                        "text": f"[{request.get('target_lang')}] {text}",
+                        "billed_characters": len(text),
+                    }
+                    for text in texts
+                ]
+                self.__respond(200, {"translations": translations})
+
+            def __respond(self, status: int, content: object) -> None:
+                body = json.dumps(content).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        return Handler
+
+    def count(self, texts: int) -> int:
+        with self.lock:
+            self.requests += 1
+            if self.throttled_requests > 0:
+                self.throttled_requests -= 1
+                return 429
+            if self.quota is not None and self.translated_texts + texts > self.quota:
+                return 456
+            self.translated_texts += texts
+            return 200
+
+    def __enter__(self) -> "TranslationServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.server.shutdown()
+        self.server.server_close()
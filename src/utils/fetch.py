@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import time
+from typing import Optional, Union
+
+import requests  # type: ignore
+from requests.structures import CaseInsensitiveDict  # type: ignore
+
+from utils import metrics
+from utils.fetch_scheduler import FetchScheduler
+
+# set by the replay server on responses to requests, which have not been recorded
+REPLAY_MISS_HEADER: str = "X-Eat-Api-Replay-Miss"
+# the body is stored decoded, so these headers do not apply anymore
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class Recordings:
+    """
+    HTTP responses stored in a directory, keyed by method and URL. Every response is stored as "<key>.json" with the
+    status and headers and "<key>.body" with the (decoded) body, where key is the SHA-256 hash of method and URL.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @staticmethod
+    def get_key(method: str, url: str) -> str:
+        return hashlib.sha256(f"{method.upper()} {url}".encode("utf-8")).hexdigest()
+
+    def save(self, method: str, url: str, response: requests.Response) -> None:
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        key = self.get_key(method, url)
+        with open(os.path.join(self.directory, f"{key}.body"), "wb") as outfile:
+            outfile.write(response.content)
+        head = {
+            "method": method.upper(),
+            "url": url,
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                name: value for name, value in response.headers.items() if name.lower() not in _DROPPED_HEADERS
+            },
+        }
+        with open(os.path.join(self.directory, f"{key}.json"), "w", encoding="utf-8") as outfile:
+            json.dump(head, outfile, indent=2)
+
+    def load(self, method: str, url: str) -> Optional[requests.Response]:
+        """
+        :return: The recorded response or None, if the request has not been recorded
+        """
+        key = self.get_key(method, url)
+        try:
+            with open(os.path.join(self.directory, f"{key}.json"), encoding="utf-8") as infile:
+                head = json.load(infile)
+            with open(os.path.join(self.directory, f"{key}.body"), "rb") as infile:
+                body = infile.read()
+        except FileNotFoundError:
+            return None
+        response = requests.Response()
+        response.status_code = head["status_code"]
+        response.reason = head["reason"]
+        response.headers = CaseInsensitiveDict(head["headers"])
+        response.url = url
+        response._content = body  # pylint: disable=protected-access
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+
+_recordings: Optional[Recordings] = None
+# recordings or the URL of a replay server
+_replay: Optional[Union[Recordings, str]] = None
+_scheduler: Optional[FetchScheduler] = None
+
+
+def get_deadline() -> float:
+    """
+    :return: The seconds all requests of a canteen's run have to be done in, configured via FETCH_DEADLINE_EAT_API
+    """
+    return float(os.environ.get("FETCH_DEADLINE_EAT_API", "120"))
+
+
+def start_run(deadline: Optional[float] = None) -> None:
+    """
+    Starts a new run with a deadline from now on and circuit breakers without any failures, e.g. for every refresh of
+    the server.
+
+    :param deadline: Seconds all requests of the run have to be done in, get_deadline() by default
+    """
+    global _scheduler  # pylint: disable=global-statement
+    _scheduler = FetchScheduler(
+        deadline=get_deadline() if deadline is None else deadline,
+        max_retries=int(os.environ.get("FETCH_RETRIES_EAT_API", "3")),
+        failure_threshold=int(os.environ.get("FETCH_FAILURE_THRESHOLD_EAT_API", "3")),
+    )
+
+
+def start_deadline(deadline: Optional[float] = None) -> None:
+    """
+    Starts a new deadline from now on within the current run, which keeps its circuit breakers, e.g. for every canteen
+    of a refresh of the server.
+
+    :param deadline: Seconds all further requests of the run have to be done in, get_deadline() by default
+    """
+    get_scheduler().restart(get_deadline() if deadline is None else deadline)
+
+
+def get_scheduler() -> FetchScheduler:
+    """
+    The scheduler of the run's requests. Unless start_run() has been called, the run starts with the first request,
+    so the deadline counts from there on. It is configured via FETCH_DEADLINE_EAT_API (seconds),
+    FETCH_RETRIES_EAT_API and FETCH_FAILURE_THRESHOLD_EAT_API.
+    """
+    if _scheduler is None:
+        start_run()
+    return _scheduler  # type: ignore
+
+
+def record(directory: str) -> None:
+    """
+    Stores every fetched response in the directory, so the same run can be replayed later on.
+    """
+    global _recordings, _replay  # pylint: disable=global-statement
+    _recordings = Recordings(directory)
+    _replay = None
+
+
+def replay(source: str) -> None:
+    """
+    Answers every fetch with a recorded response instead of fetching it.
+    Requests that have not been recorded fail like an unreachable host, with a requests.ConnectionError.
+
+    :param source: Directory of the recordings or URL of a replay server, e.g. "http://127.0.0.1:8081"
+    """
+    global _recordings, _replay  # pylint: disable=global-statement
+    _recordings = None
+    _replay = source.rstrip("/") if source.startswith(("http://", "https://")) else Recordings(source)
+
+
+def reset() -> None:
+    """
+    Fetches from the network again, with a new deadline.
+    """
+    global _recordings, _replay, _scheduler  # pylint: disable=global-statement
+    _recordings = None
+    _replay = None
+    _scheduler = None
+
+
+def get(url: str, timeout: float = 10.0) -> requests.Response:
+    """
+    Fetches a page or file for a parser within the deadline of the run, see get_scheduler().
+    The time spent, the duration of the request and the fetched bytes are recorded in the metrics.
+
+    :param timeout: The longest a single attempt may take
+    """
+    start = time.perf_counter()
+    with metrics.stage("fetch"):
+        response = _get(url, timeout)
+    metrics.sample("fetch", time.perf_counter() - start)
+    metrics.count("requests")
+    metrics.count("bytes_fetched", len(response.content))
+    return response
+
+
+def _get(url: str, timeout: float) -> requests.Response:
+    if isinstance(_replay, Recordings):
+        recorded = _replay.load("GET", url)
+        if recorded is None:
+            raise requests.ConnectionError(f"{url} has not been recorded in {_replay.directory}")
+        return recorded
+    if _replay is not None:
+        # the replay server expects the original URL as path
+        response = requests.get(f"{_replay}/{url}", timeout=timeout)
+        if REPLAY_MISS_HEADER in response.headers:
+            raise requests.ConnectionError(f"{url} has not been recorded by the replay server at {_replay}")
+        response.url = url
+        return response
+    scheduler = get_scheduler()
+    retries = scheduler.retries
+    try:
+        response = scheduler.get(url, timeout, _send)
+    finally:
+        if scheduler.retries > retries:
+            metrics.count("retries", scheduler.retries - retries)
+    if _recordings is not None:
+        _recordings.save("GET", url, response)
+    return response
+
+
+def _send(url: str, timeout: float) -> requests.Response:
+    return requests.get(url, timeout=timeout)
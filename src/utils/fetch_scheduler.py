@@ -0,0 +1,165 @@
+import random
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests  # type: ignore
+
+# responses worth another try, as they are usually caused by an overloaded or restarting server
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+class DeadlineExceeded(requests.Timeout):
+    """
+    Raised instead of sending a request, once the deadline of the run has passed.
+    """
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """
+    Raised instead of sending a request to a host, which failed too often in a row.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops requests to a host after failure_threshold failures in a row. Once reset_timeout has passed, a single request
+    is let through again: if it succeeds, the host is used as before, otherwise it is blocked for another reset_timeout.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self.clock() - self.opened_at < self.reset_timeout:
+            return False
+        # half-open: the next failure opens the circuit again right away
+        self.opened_at = None
+        self.failures = self.failure_threshold - 1
+        return True
+
+    def success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+
+
+class FetchScheduler:  # pylint: disable=too-many-instance-attributes
+    """
+    Sends the GET requests of a run within a deadline. Every request gets the time left until the deadline as budget,
+    at most its own timeout. Connection errors, timeouts and responses with one of RETRY_STATUS_CODES are retried with
+    exponential backoff and full jitter, as long as the budget allows for it. Every host has a circuit breaker, so a
+    host that is down fails fast instead of taking up the budget of the remaining requests.
+    """
+
+    def __init__(
+        self,
+        deadline: float = 120.0,
+        max_retries: int = 3,
+        base_backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        :param deadline: Seconds from now on, in which all requests have to be done
+        """
+        self.deadline_at = clock() + deadline
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.sleep = sleep
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.retries = 0
+
+    def restart(self, deadline: float) -> None:
+        """
+        Gives the requests a new deadline, but keeps the circuit breakers, so hosts that are down still fail fast.
+
+        :param deadline: Seconds from now on, in which all further requests have to be done
+        """
+        self.deadline_at = self.clock() + deadline
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline_at - self.clock())
+
+    def backoff(self, attempt: int) -> float:
+        # full jitter: https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2**attempt))  # nosec: no cryptography
+
+    def get_breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout, self.clock)
+        return self.breakers[host]
+
+    def get(
+        self,
+        url: str,
+        timeout: float,
+        send: Callable[[str, float], requests.Response],
+    ) -> requests.Response:
+        """
+        :param timeout: The longest a single attempt may take
+        :param send: Sends the request with the given timeout, e.g. requests.get
+        :return: The first response that is not retried or the last one, once no retries are left
+        """
+        breaker = self.get_breaker(url)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(f"{url} is not requested, as {urlsplit(url).netloc} failed too often")
+            budget = min(timeout, self.remaining())
+            if budget <= 0:
+                raise DeadlineExceeded(f"{url} is not requested, as the deadline of the run has passed")
+            try:
+                response = send(url, budget)
+            except (requests.ConnectionError, requests.Timeout):
+                breaker.failure()
+                if not self.__retry(attempt, breaker):
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    breaker.success()
+                    return response
+                breaker.failure()
+                if not self.__retry(attempt, breaker):
+                    return response
+            attempt += 1
+
+    def __retry(self, attempt: int, breaker: CircuitBreaker) -> bool:
+        """
+        Waits for the next attempt, if there is one left, the host's circuit is closed and the budget allows for it.
+        """
+        if attempt >= self.max_retries or breaker.open:
+            return False
+        delay = self.backoff(attempt)
+        if delay >= self.remaining():
+            return False
+        self.retries += 1
+        self.sleep(delay)
+        return True
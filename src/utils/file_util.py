@@ -1,11 +1,33 @@
-import json
+from __future__ import annotations
 
-from lxml import html  # nosec: https://github.com/TUM-Dev/eat-api/issues/19
+import json
+import os.path
+import sys
+from typing import TYPE_CHECKING
 
 from utils import json_util
 
+# lxml is only needed to load HTML
+if TYPE_CHECKING:
+    from lxml import html  # nosec: https://github.com/TUM-Dev/eat-api/issues/19
+
+
+def get_base_directory(default: str = "dist") -> str:
+    """
+    Base directory of a command line script, which is given by its first argument.
+
+    :param default: Directory to use if no argument is given
+    :return: Path of the existing base directory
+    """
+    base_directory = sys.argv[1] if len(sys.argv) > 1 else default
+    if not os.path.exists(base_directory):
+        raise FileNotFoundError(f"There is no such directory '{base_directory}'.")
+    return base_directory
+
 
 def load_html(path: str) -> html.Element:
+    from lxml import html  # nosec # pylint: disable=import-outside-toplevel
+
     with open(path, encoding="utf-8") as f:
         html_element = html.fromstring(f.read())
     # suppress flake8 warning about "unnecessary variable assignment before return statement".
@@ -1,7 +1,8 @@
+import hashlib
 import json
 from enum import Enum
 from json import JSONEncoder
-from typing import Any, Dict, Union
+from typing import Any, Dict, Iterable, Union
 
 
 class CustomJsonEncoder(JSONEncoder):
@@ -43,3 +44,41 @@ def dict_to_json_dict(dict_: Dict[Any, Any]) -> Dict[Union[str, float, int], Any
 
 def to_json_str(obj: Any) -> str:
     return json.dumps(obj, cls=CustomJsonEncoder, separators=(",", ":"))
+
+
+def to_json_bytes(obj: Any) -> bytes:
+    return json.dumps(obj, cls=CustomJsonEncoder, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def splice_json_object(members: Dict[str, bytes]) -> bytes:
+    """
+    Assembles a JSON object out of already serialized member values without decoding them again.
+    """
+    return b"{" + b",".join(to_json_bytes(key) + b":" + value for key, value in members.items()) + b"}"
+
+
+def splice_json_array(items: Iterable[bytes]) -> bytes:
+    """
+    Assembles a JSON array out of already serialized items without decoding them again.
+    """
+    return b"[" + b",".join(items) + b"]"
+
+
+def extend_json_object(fragment: bytes, members: Dict[str, bytes]) -> bytes:
+    """
+    Appends already serialized members to a serialized JSON object.
+    """
+    if not members:
+        return fragment
+    spliced_members = splice_json_object(members)
+    if fragment == b"{}":
+        return spliced_members
+    return fragment[:-1] + b"," + spliced_members[1:]
+
+
+def content_hash(obj: Any) -> str:
+    """
+    Stable hash of a JSON object, which does neither depend on the order of its keys nor on the python process.
+    """
+    canonical = json.dumps(obj, cls=CustomJsonEncoder, separators=(",", ":"), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
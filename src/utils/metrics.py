@@ -0,0 +1,197 @@
+import datetime
+import os
+import time
+from typing import Any, Dict, List, Union
+
+from utils import json_util
+
+PROMETHEUS_PREFIX: str = "eat_api"
+
+
+class _NullStage:
+    """
+    Returned for every stage while the metrics are disabled, so timing a stage costs a single method call.
+    """
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("owner", "name", "start", "nested")
+
+    def __init__(self, owner: "Metrics", name: str):
+        self.owner = owner
+        self.name = name
+        self.start = 0.0
+        # time spent in stages within this stage
+        self.nested = 0.0
+
+    def __enter__(self) -> "_Stage":
+        for observer in self.owner.observers:
+            observer.stage_entered(self.name, len(self.owner.stack))
+        self.owner.stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        elapsed = time.perf_counter() - self.start
+        self.owner.stack.pop()
+        for observer in self.owner.observers:
+            observer.stage_exited(self.name, len(self.owner.stack))
+        if self.owner.stack:
+            self.owner.stack[-1].nested += elapsed
+        self.owner.seconds[self.name] = self.owner.seconds.get(self.name, 0.0) + elapsed - self.nested
+        self.owner.calls[self.name] = self.owner.calls.get(self.name, 0) + 1
+
+
+class Metrics:  # pylint: disable=too-many-instance-attributes
+    """
+    Durations of the stages and counters of a run, e.g. the time spent fetching and the number of fetched bytes.
+    The time of a stage excludes the stages within it, so the durations of all stages add up to the time of the run.
+    Stages must only be entered by the main thread. Nothing is recorded until the metrics get enabled.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.started = 0.0
+        self.start = 0.0
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        # durations of single operations, e.g. of every request
+        self.samples: Dict[str, List[float]] = {}
+        # number of errors per class of exception, e.g. {"ConnectionError": 1}
+        self.errors: Dict[str, int] = {}
+        # dates the parser skipped, with the class of the exception
+        self.skipped_dates: Dict[str, str] = {}
+        self.stack: List[_Stage] = []
+        # get notified about every entered and exited stage, e.g. the profiler
+        self.observers: List[Any] = []
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.started = time.time()
+        self.start = time.perf_counter()
+
+    def observe(self, observer: Any) -> None:
+        """
+        Calls observer.stage_entered(name, depth) and observer.stage_exited(name, depth) for every stage, where depth is
+        the number of stages the stage is nested in.
+        """
+        self.observers.append(observer)
+
+    def stage(self, name: str) -> Union[_Stage, _NullStage]:
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def count(self, name: str, value: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def sample(self, name: str, seconds: float) -> None:
+        if self.enabled:
+            self.samples.setdefault(name, []).append(seconds)
+
+    def error(self, exception: BaseException, *dates: datetime.date) -> None:
+        """
+        Records an error by its class, e.g. an exception because of which the parser had to skip a date.
+
+        :param dates: The dates the parser skipped because of the error, e.g. all days of a week without menu
+        """
+        if not self.enabled:
+            return
+        error_class = type(exception).__name__
+        self.errors[error_class] = self.errors.get(error_class, 0) + 1
+        for date in dates:
+            self.skipped_dates[date.isoformat()] = error_class
+
+    def to_json_obj(self, canteen_id: str) -> Dict[str, Any]:
+        total = time.perf_counter() - self.start
+        stages = {
+            name: {"seconds": round(seconds, 6), "calls": self.calls[name]} for name, seconds in self.seconds.items()
+        }
+        stages["other"] = {"seconds": round(max(total - sum(self.seconds.values()), 0.0), 6), "calls": 1}
+        return {
+            "canteen_id": canteen_id,
+            "started": datetime.datetime.fromtimestamp(self.started, datetime.timezone.utc).isoformat(),
+            "seconds": round(total, 6),
+            "stages": stages,
+            "counters": dict(self.counters),
+        }
+
+    def to_prometheus(self, canteen_id: str) -> str:
+        """
+        :return: The metrics in the text format of Prometheus, e.g. for the textfile collector of the node exporter
+        """
+        return self.__format_prometheus(self.to_json_obj(canteen_id))
+
+    def __format_prometheus(self, json_obj: Dict[str, Any]) -> str:
+        canteen_id = json_obj["canteen_id"]
+        labels = f'canteen="{canteen_id}"'
+        lines = [
+            f"# HELP {PROMETHEUS_PREFIX}_run_seconds Duration of the last run",
+            f"# TYPE {PROMETHEUS_PREFIX}_run_seconds gauge",
+            f"{PROMETHEUS_PREFIX}_run_seconds{{{labels}}} {json_obj['seconds']}",
+            f"# HELP {PROMETHEUS_PREFIX}_last_run_timestamp_seconds Start of the last run",
+            f"# TYPE {PROMETHEUS_PREFIX}_last_run_timestamp_seconds gauge",
+            f"{PROMETHEUS_PREFIX}_last_run_timestamp_seconds{{{labels}}} {self.started:.3f}",
+            f"# HELP {PROMETHEUS_PREFIX}_stage_seconds Time spent in a stage of the last run",
+            f"# TYPE {PROMETHEUS_PREFIX}_stage_seconds gauge",
+        ]
+        for name, stage_json in json_obj["stages"].items():
+            lines.append(f'{PROMETHEUS_PREFIX}_stage_seconds{{{labels},stage="{name}"}} {stage_json["seconds"]}')
+        for name, value in json_obj["counters"].items():
+            lines += [
+                f"# HELP {PROMETHEUS_PREFIX}_{name} Number of {name.replace('_', ' ')} in the last run",
+                f"# TYPE {PROMETHEUS_PREFIX}_{name} gauge",
+                f"{PROMETHEUS_PREFIX}_{name}{{{labels}}} {value}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: str, canteen_id: str) -> None:
+        """
+        Writes "<canteen_id>.json" and "<canteen_id>.prom" to the directory.
+        """
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        json_obj = self.to_json_obj(canteen_id)
+        with open(os.path.join(directory, f"{canteen_id}.json"), "wb") as outfile:
+            outfile.write(json_util.to_json_bytes(json_obj))
+        # the textfile collector may read at any time, so the file gets replaced at once
+        path = os.path.join(directory, f"{canteen_id}.prom")
+        with open(path + ".tmp", "w", encoding="utf-8") as outfile:
+            outfile.write(self.__format_prometheus(json_obj))
+        os.replace(path + ".tmp", path)
+
+
+metrics = Metrics()
+"""
+The metrics of the current process, which are disabled unless "main.py --metrics" is used.
+"""
+
+
+def stage(name: str) -> Union[_Stage, _NullStage]:
+    """
+    Times the code within the returned context manager as the given stage of the current process' metrics.
+    """
+    return metrics.stage(name)
+
+
+def count(name: str, value: int = 1) -> None:
+    metrics.count(name, value)
+
+
+def sample(name: str, seconds: float) -> None:
+    metrics.sample(name, seconds)
+
+
+def error(exception: BaseException, *dates: datetime.date) -> None:
+    metrics.error(exception, *dates)
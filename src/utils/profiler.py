@@ -0,0 +1,153 @@
+import cProfile
+import os
+import sys
+import threading
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import json_util
+from utils.metrics import Metrics
+
+TOP_ALLOCATIONS: int = 25
+SAMPLE_INTERVAL: float = 0.001
+
+
+class StackSampler:
+    """
+    Samples the call stack of a thread in regular intervals and counts how often every stack has been seen.
+    The counts are written in the collapsed format ("outer;inner;innermost count"), which flamegraph.pl, speedscope and
+    inferno accept.
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Dict[str, int] = {}
+        self.__stopped = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.__stopped.clear()
+        self.__thread = threading.Thread(target=self.__run, name="stack-sampler", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.__stopped.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __run(self) -> None:
+        while not self.__stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)  # pylint: disable=protected-access
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                # semicolons separate the frames of the collapsed format
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack = ";".join(reversed(names))
+            self.samples[stack] = self.samples.get(stack, 0) + 1
+
+    def to_collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.samples.items()))
+
+
+class Profiler:  # pylint: disable=too-many-instance-attributes
+    """
+    Profiles a run with cProfile, a StackSampler and tracemalloc.
+    The memory allocated within every outermost stage of the observed metrics, which is still alive at the end of the
+    stage, is summed up per source line, so the top allocation sites of e.g. "parse" and "jsonify" can be told apart.
+    """
+
+    def __init__(self, observed: Metrics, top: int = TOP_ALLOCATIONS, interval: float = SAMPLE_INTERVAL):
+        self.observed = observed
+        self.top = top
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        # stage -> (file, line) -> [size, count]
+        self.allocations: Dict[str, Dict[Tuple[str, int], List[int]]] = {}
+        self.peaks: Dict[str, int] = {}
+        self.__snapshot: Optional[tracemalloc.Snapshot] = None
+        self.__started_tracing = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracing = True
+        self.observed.observe(self)
+        self.sampler.start()
+        self.profile.enable()
+
+    def stop(self) -> None:
+        self.profile.disable()
+        self.sampler.stop()
+        self.observed.observers.remove(self)
+        if self.__started_tracing:
+            tracemalloc.stop()
+            self.__started_tracing = False
+
+    def stage_entered(self, name: str, depth: int) -> None:  # pylint: disable=unused-argument
+        if depth > 0:
+            return
+        # taking a snapshot must not show up in the profile of the run
+        self.profile.disable()
+        self.__snapshot = self.__take_snapshot()
+        tracemalloc.reset_peak()
+        self.profile.enable()
+
+    def stage_exited(self, name: str, depth: int) -> None:
+        if depth > 0 or self.__snapshot is None:
+            return
+        self.profile.disable()
+        self.peaks[name] = max(self.peaks.get(name, 0), tracemalloc.get_traced_memory()[1])
+        sites = self.allocations.setdefault(name, {})
+        for diff in self.__take_snapshot().compare_to(self.__snapshot, "lineno"):
+            if diff.size_diff <= 0:
+                continue
+            frame = diff.traceback[0]
+            site = sites.setdefault((frame.filename, frame.lineno), [0, 0])
+            site[0] += diff.size_diff
+            site[1] += diff.count_diff
+        self.__snapshot = None
+        self.profile.enable()
+
+    @staticmethod
+    def __take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                # the samples of the StackSampler
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            ),
+        )
+
+    def get_allocations_json_obj(self, canteen_id: str) -> Dict[str, Any]:
+        stages = {}
+        for name, sites in self.allocations.items():
+            top_sites = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)[: self.top]
+            stages[name] = {
+                "peak_bytes": self.peaks.get(name, 0),
+                "top": [
+                    {"file": filename, "line": lineno, "bytes": size, "count": count}
+                    for (filename, lineno), (size, count) in top_sites
+                ],
+            }
+        return {"canteen_id": canteen_id, "stages": stages}
+
+    def write(self, directory: str, canteen_id: str) -> None:
+        """
+        Writes "<canteen_id>.pstats" (cProfile), "<canteen_id>.collapsed" (sampled stacks for flame graphs) and
+        "<canteen_id>.allocations.json" (top allocation sites per stage) to the directory.
+        """
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.profile.dump_stats(os.path.join(directory, f"{canteen_id}.pstats"))
+        with open(os.path.join(directory, f"{canteen_id}.collapsed"), "w", encoding="utf-8") as outfile:
+            outfile.write(self.sampler.to_collapsed())
+        with open(os.path.join(directory, f"{canteen_id}.allocations.json"), "wb") as outfile:
+            outfile.write(json_util.to_json_bytes(self.get_allocations_json_obj(canteen_id)))
@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import time
+import unicodedata
+from typing import Dict, Iterable, Optional
+
+
+class TranslationMemory:
+    """
+    Persistent cache for translations, stored in a single SQLite file.
+    Entries are keyed by source language, target language and the normalized source text.
+    If the memory grows beyond max_entries, the least recently used entries get evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # several canteens are translated in parallel processes, so wait for locks instead of failing
+        self.connection = sqlite3.connect(path, timeout=60.0)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "source_lang TEXT NOT NULL, "
+                "target_lang TEXT NOT NULL, "
+                "source_text TEXT NOT NULL, "
+                "translation TEXT NOT NULL, "
+                "last_used INTEGER NOT NULL, "
+                "PRIMARY KEY (source_lang, target_lang, source_text))",
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        # get rid of two-character umlauts and differences in whitespaces
+        return " ".join(unicodedata.normalize("NFKC", text).split())
+
+    def get_many(self, source_lang: str, target_lang: str, texts: Iterable[str]) -> Dict[str, str]:
+        """
+        :return: Mapping from each of the given texts to its translation, texts without a translation are missing
+        """
+        translations: Dict[str, str] = {}
+        now = time.time_ns()
+        with self.connection:
+            for text in texts:
+                key = (source_lang.upper(), target_lang.upper(), self.normalize(text))
+                row = self.connection.execute(
+                    "SELECT translation FROM translations "
+                    "WHERE source_lang = ? AND target_lang = ? AND source_text = ?",
+                    key,
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    continue
+                self.hits += 1
+                translations[text] = row[0]
+                self.connection.execute(
+                    "UPDATE translations SET last_used = ? "
+                    "WHERE source_lang = ? AND target_lang = ? AND source_text = ?",
+                    (now, *key),
+                )
+        return translations
+
+    def get(self, source_lang: str, target_lang: str, text: str) -> Optional[str]:
+        return self.get_many(source_lang, target_lang, [text]).get(text)
+
+    def put_many(self, source_lang: str, target_lang: str, translations: Dict[str, str]) -> None:
+        now = time.time_ns()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO translations (source_lang, target_lang, source_text, translation, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    (source_lang.upper(), target_lang.upper(), self.normalize(text), translation, now)
+                    for text, translation in translations.items()
+                ),
+            )
+            self.__evict()
+
+    def __evict(self) -> None:
+        (size,) = self.connection.execute("SELECT COUNT(*) FROM translations").fetchone()
+        if size > self.max_entries:
+            self.connection.execute(
+                "DELETE FROM translations WHERE rowid IN "
+                "(SELECT rowid FROM translations ORDER BY last_used ASC LIMIT ?)",
+                (size - self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        (size,) = self.connection.execute("SELECT COUNT(*) FROM translations").fetchone()
+        return int(size)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "TranslationMemory":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+def get_translation_memory() -> Optional[TranslationMemory]:
+    """
+    Opens the translation memory at the path given by TRANSLATION_MEMORY_EAT_API, if set.
+    """
+    path = os.environ.get("TRANSLATION_MEMORY_EAT_API")
+    if not path:
+        return None
+    max_entries = int(os.environ.get("TRANSLATION_MEMORY_SIZE_EAT_API", "100000"))
+    return TranslationMemory(path, max_entries)
@@ -0,0 +1,178 @@
+import asyncio
+import random
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import deepl
+
+from utils.util import Translator
+
+
+class SchedulerHttpClient(deepl.http_client.HttpClient):
+    """
+    HTTP client of DeepL, which retries requests up to its own max_network_retries instead of the process-wide
+    deepl.http_client.max_network_retries.
+    """
+
+    def __init__(self, max_network_retries: int):
+        super().__init__()
+        self.max_network_retries = max_network_retries
+
+    def _should_retry(
+        self,
+        response: Optional[Tuple[int, str]],
+        exception: Optional[deepl.ConnectionException],
+        num_retries: int,
+    ) -> bool:
+        return num_retries < self.max_network_retries and bool(super()._should_retry(response, exception, num_retries))
+
+
+class SchedulerTranslator(deepl.Translator):
+    """
+    DeepL translator, which by default leaves retrying throttled requests to the TranslationScheduler, as only the
+    scheduler knows about all concurrent requests.
+    """
+
+    _client: SchedulerHttpClient
+
+    def __init__(self, auth_key: str, server_url: Optional[str] = None, max_network_retries: int = 0):
+        super().__init__(auth_key, server_url=server_url)
+        self._client.close()
+        self._client = SchedulerHttpClient(max_network_retries)
+
+
+class TokenBucket:
+    """
+    Limits the rate of requests: every request takes a token, tokens are refilled at a constant rate up to capacity.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+        self.lock = asyncio.Lock()
+
+    def __refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            self.__refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.__refill()
+            self.tokens -= 1
+
+
+class TranslationResult:
+    """
+    Result of a translation run. Texts that could not be translated (e.g. due to throttling or an exceeded quota)
+    are missing in translations and listed in untranslated instead.
+    """
+
+    def __init__(self, translations: Dict[str, str], untranslated: Set[str]):
+        self.translations = translations
+        self.untranslated = untranslated
+
+    @property
+    def complete(self) -> bool:
+        return not self.untranslated
+
+
+class TranslationScheduler:  # pylint: disable=too-many-instance-attributes
+    """
+    Translates batches of texts with a number of concurrent requests, which are limited by a token bucket.
+    Throttled requests (HTTP 429) are retried with exponential backoff and full jitter. Once the quota is exceeded,
+    no further requests are sent. Batches that fail are reported as untranslated instead of failing the whole run.
+    """
+
+    def __init__(
+        self,
+        translator: Translator,
+        concurrency: int = 4,
+        requests_per_second: float = 5.0,
+        max_retries: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+    ):
+        self.translator = translator
+        self.concurrency = concurrency
+        self.requests_per_second = requests_per_second
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.requests = 0
+        self.throttled = 0
+
+    def backoff(self, attempt: int) -> float:
+        # full jitter: https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2**attempt))  # nosec: no cryptography
+
+    async def __translate_batch(
+        self,
+        batch: List[str],
+        source_lang: str,
+        target_lang: str,
+        semaphore: asyncio.Semaphore,
+        bucket: TokenBucket,
+        quota_exceeded: asyncio.Event,
+    ) -> Optional[Dict[str, str]]:
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                if quota_exceeded.is_set():
+                    return None
+                await bucket.acquire()
+                self.requests += 1
+                try:
+                    results = await asyncio.to_thread(
+                        self.translator.translate_text,
+                        batch,
+                        source_lang=source_lang,
+                        target_lang=target_lang,
+                    )
+                except deepl.TooManyRequestsException:
+                    self.throttled += 1
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(self.backoff(attempt))
+                    continue
+                except deepl.QuotaExceededException:
+                    print("Warning: DeepL quota exceeded. Remaining dishes will not be translated.")
+                    quota_exceeded.set()
+                    return None
+                except deepl.DeepLException as e:
+                    print(f"Warning: Translation of {len(batch)} dishes failed. Exception args: {e.args}")
+                    return None
+                return {text: result.text for text, result in zip(batch, results)}
+        print(f"Warning: Translation of {len(batch)} dishes still throttled after {self.max_retries} retries.")
+        return None
+
+    async def translate_batches(
+        self,
+        batches: List[List[str]],
+        source_lang: str,
+        target_lang: str,
+    ) -> TranslationResult:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        bucket = TokenBucket(self.requests_per_second, max(1.0, float(self.concurrency)))
+        quota_exceeded = asyncio.Event()
+        batch_results = await asyncio.gather(
+            *(
+                self.__translate_batch(batch, source_lang, target_lang, semaphore, bucket, quota_exceeded)
+                for batch in batches
+            ),
+        )
+        translations: Dict[str, str] = {}
+        untranslated: Set[str] = set()
+        for batch, batch_result in zip(batches, batch_results):
+            if batch_result is None:
+                untranslated.update(batch)
+            else:
+                translations.update(batch_result)
+        return TranslationResult(translations, untranslated)
+
+    def translate(self, batches: List[List[str]], source_lang: str, target_lang: str) -> TranslationResult:
+        return asyncio.run(self.translate_batches(batches, source_lang, target_lang))
@@ -2,17 +2,26 @@
 from __future__ import annotations
 
 import os
+import threading
+import time
 from datetime import date, datetime
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, NamedTuple, Optional, Protocol, Sequence, Set, Union
 
-import deepl
+from utils import metrics
 
+# DeepL and the translation memory are only imported when translating, the parsers import this module as well
 if TYPE_CHECKING:
     from src.entities import Menu
+    from utils.translation_memory import TranslationMemory
+    from utils.translation_scheduler import TranslationResult
 
 date_pattern = "%d.%m.%Y"
 cli_date_format = "dd.mm.yyyy"
 
+# limits of a single DeepL translate request: https://www.deepl.com/docs-api/translate-text/
+deepl_max_texts_per_request = 50
+deepl_max_request_bytes = 128 * 1024
+
 
 def parse_date(date_str):
     return datetime.strptime(date_str, date_pattern).date()
@@ -34,20 +43,147 @@ def make_duplicates_unique(names_with_duplicates):
     return names_without_duplicates
 
 
-def translate_dishes(menus: Dict[date, Menu], language: str) -> bool:
+class TextResult(Protocol):
+    @property
+    def text(self) -> str:
+        ...
+
+
+class Translator(Protocol):
+    """
+    The part of deepl.Translator, which is used to translate dishes.
     """
-    Translate the dish titles of a menu
 
-    :param menus: Menus dictionary as given by the menu parser, will be modified
-    :param language: Identifier for a language
-    :return: Whether translation was successful
+    def translate_text(
+        self,
+        text: Union[str, Iterable[str]],
+        *,
+        source_lang: str,
+        target_lang: str,
+    ) -> Union[TextResult, Sequence[TextResult]]:
+        ...
+
+
+class FakeTextResult(NamedTuple):
+    text: str
+    detected_source_lang: str
+
+
+class FakeTranslator:
+    """
+    Offline stand-in for deepl.Translator.
+    It "translates" a text by prefixing it with the target language and optionally sleeps for every request to
+    simulate the round trip to DeepL. Requests and texts are counted, so the translation throughput can be measured.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        self.texts = 0
+        # requests may be sent concurrently
+        self.lock = threading.Lock()
+
+    def translate_text(
+        self,
+        text: Union[str, Iterable[str]],
+        source_lang: str,
+        target_lang: str,
+    ) -> Union[FakeTextResult, List[FakeTextResult]]:
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(text, str):
+            with self.lock:
+                self.requests += 1
+                self.texts += 1
+            return FakeTextResult(f"[{target_lang}] {text}", source_lang)
+        results = [FakeTextResult(f"[{target_lang}] {text_}", source_lang) for text_ in text]
+        with self.lock:
+            self.requests += 1
+            self.texts += len(results)
+        return results
+
+
+def get_translator() -> Translator:
+    """
+    Returns a DeepL translator, or the offline FakeTranslator if TRANSLATOR_EAT_API is set to "fake".
     """
+    if os.environ.get("TRANSLATOR_EAT_API", "deepl").lower() == "fake":
+        return FakeTranslator()
+    from utils.translation_scheduler import SchedulerTranslator  # pylint: disable=import-outside-toplevel
+
     # get api key from environment, abort if not given
     deepl_api_key = os.environ.get("DEEPL_API_KEY_EAT_API")
     if deepl_api_key is None:
         raise Exception("For translation please provide a DeepL api key via DEEPL_API_KEY_EAT_API")
+    translator: Translator = SchedulerTranslator(deepl_api_key)
+    return translator
+
+
+def batch_texts(
+    texts: List[str],
+    max_texts: int = deepl_max_texts_per_request,
+    max_bytes: int = deepl_max_request_bytes,
+) -> Iterator[List[str]]:
+    """
+    Splits texts into batches, which do not exceed the given number of texts and (UTF-8 encoded) bytes.
+    A single text that exceeds max_bytes on its own is sent in a batch of its own.
+    """
+    batch: List[str] = []
+    batch_bytes = 0
+    for text in texts:
+        text_bytes = len(text.encode("utf-8"))
+        if batch and (len(batch) >= max_texts or batch_bytes + text_bytes > max_bytes):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(text)
+        batch_bytes += text_bytes
+    if batch:
+        yield batch
+
+
+def translate_texts(
+    translator: Translator,
+    texts: List[str],
+    source_language: str,
+    language: str,
+    max_texts: int = deepl_max_texts_per_request,
+) -> TranslationResult:
+    """
+    Translates texts in as few requests as possible. The requests are sent concurrently, the concurrency and the rate
+    can be configured via TRANSLATION_CONCURRENCY_EAT_API and TRANSLATION_RATE_EAT_API (requests per second).
 
-    translator = deepl.Translator(deepl_api_key)
+    :return: Translations of the given texts and the texts that could not be translated
+    """
+    from utils.translation_scheduler import TranslationScheduler  # pylint: disable=import-outside-toplevel
+
+    scheduler = TranslationScheduler(
+        translator,
+        concurrency=int(os.environ.get("TRANSLATION_CONCURRENCY_EAT_API", "4")),
+        requests_per_second=float(os.environ.get("TRANSLATION_RATE_EAT_API", "5")),
+    )
+    result = scheduler.translate(list(batch_texts(texts, max_texts)), source_language, language)
+    metrics.count("translation_calls", scheduler.requests)
+    # suppress flake8 warning about "unnecessary variable assignment before return statement".
+    # reason: the requests are only known after translating
+    return result  # noqa: R504
+
+
+def translate_dishes(
+    menus: Dict[date, Menu],
+    language: str,
+    translator: Optional[Translator] = None,
+    memory: Optional[TranslationMemory] = None,
+) -> bool:
+    """
+    Translate the dish titles of a menu
+
+    :param menus: Menus dictionary as given by the menu parser, will be modified
+    :param language: Identifier for a language
+    :param translator: Translator to use instead of the one returned by get_translator()
+    :param memory: Translation memory to use instead of the one configured by TRANSLATION_MEMORY_EAT_API
+    :return: Whether translation was successful
+    """
     # source language is always german
     source_language = "DE"
 
@@ -55,10 +191,40 @@ def translate_dishes(menus: Dict[date, Menu], language: str) -> bool:
     if source_language.lower() == language.lower():
         return True
 
-    # traverse through all dish titles
-    for menu in menus.values():
-        for dish in menu.dishes:
-            result = translator.translate_text(dish.name, source_lang=source_language, target_lang=language)
-            dish.name = result.text
-
+    # the same Dish object may be part of several menus, but must only be translated once
+    dishes = list({id(dish): dish for menu in menus.values() for dish in menu.dishes}.values())
+    # dishes repeat across days, so every unique title gets translated only once
+    dish_names = list(dict.fromkeys(dish.name for dish in dishes))
+
+    untranslated: Set[str] = set()
+    own_memory = memory is None
+    if own_memory:
+        from utils.translation_memory import get_translation_memory  # pylint: disable=import-outside-toplevel
+
+        memory = get_translation_memory()
+    try:
+        # only ask the translator for titles, which have never been translated before
+        translations = memory.get_many(source_language, language, dish_names) if memory is not None else {}
+        missing_names = [name for name in dish_names if name not in translations]
+        if missing_names:
+            if translator is None:
+                translator = get_translator()
+            result = translate_texts(translator, missing_names, source_language, language)
+            if memory is not None:
+                memory.put_many(source_language, language, result.translations)
+            translations.update(result.translations)
+            untranslated = result.untranslated
+        if memory is not None:
+            print(f"Translation memory: {memory.hits} hits, {memory.misses} misses")
+    finally:
+        if own_memory and memory is not None:
+            memory.close()
+
+    # traverse through all dish titles, untranslated ones keep their german title
+    for dish in dishes:
+        dish.name = translations.get(dish.name, dish.name)
+
+    if untranslated:
+        print(f"Warning: {len(untranslated)} of {len(dish_names)} dish titles could not be translated to {language}")
+        return False
     return True